@@ -1,34 +1,120 @@
 import arxiv
+import asyncio
+import itertools
 import logging
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 from arxiv import HTTPError as ArxivHTTPError, UnexpectedEmptyPageError as ArxivUnexpectedEmptyPageError
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, RetryCallState
 
-from backend.schemas.arxiv_schema import ArxivPaper, ArxivAuthor
+from backend.app.pipeline_hub import pipeline_key
+from backend.app.tiered_cache import arxiv_search_cache
+from backend.core import deadline
+from backend.core.config import ARXIV_REQUEST_TIMEOUT_S
+from backend.core.metrics import counter
+from backend.schemas.arxiv_schema import ArxivPaper, ArxivAuthor, SearchFilters, SortOrder
 
 logger = logging.getLogger(__name__)
 
+SORT_CRITERIA: Dict[SortOrder, arxiv.SortCriterion] = {
+    "relevance": arxiv.SortCriterion.Relevance,
+    "submitted": arxiv.SortCriterion.SubmittedDate,
+    "updated": arxiv.SortCriterion.LastUpdatedDate,
+}
+
+# Open ends of a submittedDate range; arXiv only accepts closed ranges.
+_EARLIEST_SUBMISSION = date(1991, 1, 1)
+_LATEST_SUBMISSION = date(9999, 12, 31)
+
+def compile_query(
+    keyword: str,
+    categories: Optional[List[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> str:
+    """
+    Adds category and submission date filters to an arXiv query, e.g.
+    `(graph neural networks) AND (cat:cs.LG OR cat:stat.ML) AND submittedDate:[202301010000 TO 202312312359]`.
+    Categories must be validated arXiv category names (see ArxivCategory).
+    """
+    clauses = []
+    if categories:
+        clauses.append("(" + " OR ".join(f"cat:{category}" for category in categories) + ")")
+    if date_from is not None or date_to is not None:
+        start = (date_from or _EARLIEST_SUBMISSION).strftime("%Y%m%d") + "0000"
+        end = (date_to or _LATEST_SUBMISSION).strftime("%Y%m%d") + "2359"
+        clauses.append(f"submittedDate:[{start} TO {end}]")
+    if not clauses:
+        return keyword
+    return " AND ".join([f"({keyword})", *clauses])
+
+def search_options(filters: SearchFilters, sort: bool = True) -> Dict[str, Any]:
+    """
+    The search_papers keyword arguments for `filters`; empty for the defaults, so that
+    unfiltered searches are unchanged. `sort=False` leaves the caller's sort order.
+    """
+    options: Dict[str, Any] = {}
+    if filters.categories:
+        options["categories"] = filters.categories
+    date_from, date_to = filters.date_range()
+    if date_from is not None:
+        options["date_from"] = date_from
+    if date_to is not None:
+        options["date_to"] = date_to
+    if sort and filters.sort != "relevance":
+        options["sort_by"] = SORT_CRITERIA[filters.sort]
+    return options
+
+def _stop_at_request_deadline(retry_state: RetryCallState) -> bool:
+    """Stops retrying when the backoff sleep would run past the current request deadline."""
+    left = deadline.remaining()
+    if left is None:
+        return False
+    return left <= (getattr(retry_state, "upcoming_sleep", 0) or 0)
+
 class ArxivAPIClient:
     def __init__(self, default_max_results: int = 10):
         self.client = arxiv.Client()
         self.default_max_results = default_max_results
 
-    @retry(stop=stop_after_attempt(3),
+    @retry(stop=stop_after_attempt(3) | _stop_at_request_deadline,
            wait=wait_exponential(multiplier=1, min=4, max=10),
            retry=retry_if_exception_type((ArxivHTTPError, ArxivUnexpectedEmptyPageError)))
-    async def search_papers(self, keyword: str, max_results: Optional[int] = None) -> List[ArxivPaper]:
+    async def search_papers(
+        self,
+        keyword: str,
+        max_results: Optional[int] = None,
+        sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+        submitted_after: Optional[datetime] = None,
+        categories: Optional[List[str]] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> List[ArxivPaper]:
         """
         Search for papers on arXiv based on a keyword.
 
+        The blocking arXiv request runs in a worker thread and is bounded by
+        ARXIV_REQUEST_TIMEOUT_S and the remaining request deadline, if any. Results are
+        cached for ARXIV_SEARCH_CACHE_TTL_S (see arxiv_search_cache); concurrent identical
+        searches, also from other worker processes, share one arXiv request.
+
         Args:
             keyword: The keyword to search for.
             max_results: The maximum number of results to return. Defaults to self.default_max_results.
+            sort_by: Sort order of the results (descending). Defaults to relevance.
+            submitted_after: Only return papers published after this naive UTC datetime.
+                Use with sort_by=SubmittedDate: result pages are then only fetched until
+                the first older paper.
+            categories: Only return papers in any of these arXiv categories.
+            date_from, date_to: Only return papers first submitted within these dates
+                (inclusive). Categories and dates are compiled into the arXiv query
+                (see compile_query), so filtered-out papers are never fetched.
 
         Returns:
             A list of ArxivPaper objects.
         
         Raises:
+            TimeoutError: If the search does not finish in time.
             ArxivHTTPError: If there is an issue with the arXiv API request.
             ArxivUnexpectedEmptyPageError: If the arXiv API returns an empty page unexpectedly.
             Exception: For other unexpected errors.
@@ -36,15 +122,25 @@ class ArxivAPIClient:
         if max_results is None:
             max_results = self.default_max_results
 
+        query = compile_query(keyword, categories, date_from, date_to)
         search = arxiv.Search(
-            query=keyword,
+            query=query,
             max_results=max_results,
-            sort_by=arxiv.SortCriterion.Relevance
+            sort_by=sort_by
         )
 
-        try:
-            results_generator = self.client.results(search)
-            results = list(results_generator) # This is a blocking call
+        def fetch() -> list:
+            results = self.client.results(search)
+            if submitted_after is not None:
+                results = itertools.takewhile(
+                    lambda result: result.published.replace(tzinfo=None) > submitted_after, results
+                )
+            return list(results)
+
+        async def fetch_papers() -> List[ArxivPaper]:
+            timeout = deadline.call_timeout(ARXIV_REQUEST_TIMEOUT_S)
+            # Consuming the results generator is blocking, so keep it off the event loop.
+            results = await deadline.run_in_thread(fetch, timeout=timeout)
 
             papers = []
             for result in results:
@@ -57,16 +153,29 @@ class ArxivAPIClient:
                     published=result.published.replace(tzinfo=None), # Remove timezone for naive datetime
                     updated=result.updated.replace(tzinfo=None),   # Remove timezone for naive datetime
                     pdf_url=result.pdf_url,
-                    categories=result.categories
+                    categories=result.categories,
+                    primary_category=result.primary_category,
                 )
                 papers.append(paper)
             return papers
+
+        try:
+            cache_key = pipeline_key("arxiv-search", query, max_results, sort_by.value, submitted_after)
+            return list(await arxiv_search_cache.get_or_compute(cache_key, fetch_papers))
         except ArxivHTTPError as e: # Use aliased exception
             logger.error(f"arXiv API HTTPError for keyword \'{keyword}\': {e}")
             raise
         except ArxivUnexpectedEmptyPageError as e: # Use aliased exception
             logger.error(f"arXiv API UnexpectedEmptyPageError for keyword \'{keyword}\': {e}")
             return [] 
+        except asyncio.CancelledError:
+            # The request was abandoned (e.g. the stream client disconnected); the
+            # worker thread finishes on its own and its results are discarded.
+            counter("arxiv.searches_abandoned").increment()
+            raise
+        except TimeoutError:
+            logger.warning(f"arXiv search for keyword \'{keyword}\' timed out")
+            raise
         except Exception as e:
             logger.error(f"An unexpected error occurred during arXiv search for keyword \'{keyword}\': {e}")
             raise
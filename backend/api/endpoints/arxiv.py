@@ -1,13 +1,62 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from typing import List, Literal, Optional
 import logging
 
-from backend.api.arxiv_client import ArxivAPIClient, get_arxiv_client
-from backend.schemas.arxiv_schema import ArxivPaper, ArxivSearchResponse, ArxivSearchRequest
+from datetime import date
+from backend.api.arxiv_client import ArxivAPIClient, get_arxiv_client, search_options
+from backend.app.paper_index import normalize_author, paper_index
+from backend.schemas.arxiv_schema import (
+    ArxivCategory, ArxivPaper, ArxivSearchResponse, ArxivSearchRequest, SortOrder, canonical_arxiv_id
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+def _matches(paper: ArxivPaper, request: ArxivSearchRequest) -> bool:
+    if request.authors:
+        wanted = {normalize_author(name) for name in request.authors}
+        if not any(normalize_author(author.name) in wanted for author in paper.authors):
+            return False
+    if request.categories and not set(request.categories) & set(paper.categories):
+        return False
+    date_from, date_to = request.date_range()
+    if date_from is not None and paper.published.date() < date_from:
+        return False
+    if date_to is not None and paper.published.date() > date_to:
+        return False
+    return True
+
+async def _search(request: ArxivSearchRequest, client: ArxivAPIClient) -> ArxivSearchResponse:
+    if request.source == "local":
+        # Served from the paper cache through the in-memory indexes, without calling arXiv.
+        date_from, date_to = request.date_range()
+        papers = await paper_index.search(
+            keyword=request.keyword,
+            authors=request.authors,
+            categories=request.categories,
+            date_from=date_from,
+            date_to=date_to,
+            sort=request.sort,
+            limit=request.max_results,
+        )
+        results = [paper.to_arxiv() for paper in papers]
+        return ArxivSearchResponse(papers=results, total_results=len(results))
+
+    try:
+        papers = await client.search_papers(
+            keyword=request.keyword, max_results=request.max_results, **search_options(request)
+        )
+    except Exception as e:
+        logger.error(f"Error searching arXiv with keyword '{request.keyword}': {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to search arXiv: {str(e)}")
+    if request.has_filters:
+        # Authors are not pushed down to arXiv (its author search is fuzzy); the other
+        # filters are, and are checked again against the exact local semantics.
+        papers = [paper for paper in papers if _matches(paper, request)]
+    return ArxivSearchResponse(papers=papers, total_results=len(papers))
+
 @router.post("/search", response_model=ArxivSearchResponse, summary="Search arXiv papers by keyword")
 async def search_arxiv_papers_post(
     request: ArxivSearchRequest,
@@ -15,26 +64,59 @@ async def search_arxiv_papers_post(
 ):
     """
     Search for papers on arXiv using a keyword provided in the request body.
+
+    Categories and the date range are compiled into the arXiv query, so papers outside
+    them are never fetched; `sort` selects the arXiv sort order. With source "local", only
+    the papers cached locally are searched, filtered by author, category and publication
+    date through in-memory indexes; the keyword is then optional and matched against
+    titles and abstracts.
     """
-    try:
-        papers = await client.search_papers(keyword=request.keyword, max_results=request.max_results)
-        return ArxivSearchResponse(papers=papers, total_results=len(papers))
-    except Exception as e:
-        logger.error(f"Error searching arXiv with keyword '{request.keyword}': {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to search arXiv: {str(e)}")
+    return await _search(request, client)
 
 @router.get("/search", response_model=ArxivSearchResponse, summary="Search arXiv papers by keyword (GET)")
 async def search_arxiv_papers_get(
-    keyword: str = Query(..., description="Keyword to search for on arXiv"),
+    keyword: Optional[str] = Query(None, description="Keyword to search for (required when searching arXiv)"),
     max_results: Optional[int] = Query(10, description="Maximum number of results to return"),
+    source: Literal["arxiv", "local"] = Query("arxiv", description="Search arXiv, or only the papers cached locally"),
+    author: Optional[List[str]] = Query(None, description="Only papers by any of these authors (repeatable)"),
+    category: Optional[List[ArxivCategory]] = Query(None, description="Only papers in any of these arXiv categories (repeatable)"),
+    year_from: Optional[int] = Query(None, description="Only papers published in or after this year"),
+    year_to: Optional[int] = Query(None, description="Only papers published in or before this year"),
+    date_from: Optional[date] = Query(None, description="Only papers first submitted on or after this date"),
+    date_to: Optional[date] = Query(None, description="Only papers first submitted on or before this date"),
+    sort: SortOrder = Query("relevance", description="Order of the results (submitted/updated: newest first)"),
     client: ArxivAPIClient = Depends(get_arxiv_client)
 ):
     """
     Search for papers on arXiv using a keyword provided as a query parameter.
+
+    Supports the same local search and filters as the POST endpoint.
     """
     try:
-        papers = await client.search_papers(keyword=keyword, max_results=max_results)
-        return ArxivSearchResponse(papers=papers, total_results=len(papers))
-    except Exception as e:
-        logger.error(f"Error searching arXiv with keyword '{keyword}': {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to search arXiv: {str(e)}")
+        request = ArxivSearchRequest(
+            keyword=keyword, max_results=max_results, source=source,
+            authors=author, categories=category, year_from=year_from, year_to=year_to,
+            date_from=date_from, date_to=date_to, sort=sort,
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await _search(request, client)
+
+@router.get(
+    "/papers/{arxiv_id}/more-from-authors",
+    response_model=ArxivSearchResponse,
+    summary="Cached papers by the authors of a cached paper",
+)
+async def more_from_authors(
+    arxiv_id: str,
+    max_results: int = Query(10, description="Maximum number of results to return"),
+):
+    """
+    Returns other locally cached papers by any author of the cached paper `arxiv_id`
+    (with or without a version suffix), newest first, without calling arXiv.
+    """
+    papers = await paper_index.more_from_authors(canonical_arxiv_id(arxiv_id), limit=max_results)
+    if papers is None:
+        raise HTTPException(status_code=404, detail=f"Paper {arxiv_id} is not cached")
+    results = [paper.to_arxiv() for paper in papers]
+    return ArxivSearchResponse(papers=results, total_results=len(results))
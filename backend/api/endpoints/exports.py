@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Annotated
+
+from backend.app.exports import MEDIA_TYPES, ExportDataset, ExportFormat, check_format, export
+
+router = APIRouter()
+
+
+@router.get("/{dataset}", summary="Stream cached papers, stored research trees or their scores")
+async def export_dataset(
+    dataset: ExportDataset,
+    file_format: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+):
+    """
+    Streams a whole dataset for offline analytics, as NDJSON (one JSON object per line) or
+    as a Parquet file (one row group per batch; needs pyarrow on the server, otherwise 501):
+
+    - papers: the paper cache, one row per paper
+    - trees: the saved research trees and research jobs, one row per tree
+    - scores: the scored papers of their query nodes, one row per paper and node
+
+    Rows are read and sent in batches, so exports of any size use constant memory.
+    """
+    try:
+        check_format(file_format)
+    except ValueError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return StreamingResponse(
+        export(dataset, file_format),
+        media_type=MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{file_format}"'},
+    )
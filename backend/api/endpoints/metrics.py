@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+
+from backend.app.admission import admission_controller
+from backend.app.cache_coherence import cache_coherence
+from backend.app.cache_janitor import cache_janitor
+from backend.app.fair_scheduler import fair_scheduler
+from backend.app.job_runner import research_job_runner
+from backend.app.paper_index import paper_index
+from backend.app.tiered_cache import arxiv_search_cache, llm_response_cache, score_cache
+from backend.core import metrics
+
+router = APIRouter()
+
+
+@router.get("", summary="Process-wide pipeline metrics")
+async def get_metrics():
+    """
+    Returns the process-wide counters (e.g. cancelled pipelines and saved LLM calls),
+    latency percentiles per LLM route, the current LLM scheduler load, the research
+    tree admission queue, the background job pool load, the size of the SQLite cache
+    tables, of the in-process cache tiers and of the local search indexes.
+    """
+    return {
+        **metrics.snapshot(),
+        "llm_scheduler": fair_scheduler.stats(),
+        "admission": admission_controller.stats(),
+        "research_jobs": research_job_runner.stats(),
+        "paper_index": paper_index.stats(),
+        "cache": {
+            **cache_janitor.stats(),
+            "memory": {cache.namespace: cache.stats() for cache in (arxiv_search_cache, score_cache, llm_response_cache)},
+            "coherence": cache_coherence.stats(),
+        },
+    }
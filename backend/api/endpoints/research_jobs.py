@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+
+from backend.api.endpoints.research_tree import ResearchTreeRequest, QueryNode, _deduplicate_papers
+from backend.app.job_runner import research_job_runner
+from backend.core.database import get_db
+from backend.crud import research_jobs as crud
+from backend.models.research_job import ResearchJob
+
+router = APIRouter()
+
+# === Output Models ===
+class ResearchJobCreated(BaseModel):
+    job_id: str
+    status: str
+
+class ResearchJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued / running / completed / failed
+    original_query: str
+    research_goal: Optional[str] = None
+    total_nodes: Optional[int] = None  # 研究計画が生成されるまではNone
+    completed_nodes: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class ResearchJobResults(ResearchJobStatus):
+    query_nodes: List[QueryNode]  # 完了済みノードのみ（計画順）
+    total_papers: int
+    total_unique_papers: int
+
+def _job_status(job: ResearchJob) -> dict:
+    return dict(
+        job_id=job.id,
+        status=job.status,
+        original_query=job.request["natural_language_query"],
+        research_goal=job.research_goal,
+        total_nodes=len(job.query_plan) if job.query_plan is not None else None,
+        completed_nodes=len(job.nodes),
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+async def _get_job_or_404(db: AsyncSession, job_id: str) -> ResearchJob:
+    job = await crud.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Research job '{job_id}' not found")
+    return job
+
+# === Endpoints ===
+@router.post("/research-jobs", response_model=ResearchJobCreated, status_code=202, summary="Start a research tree search as a background job")
+async def create_research_job(request: ResearchTreeRequest, db: AsyncSession = Depends(get_db)):
+    """
+    リサーチツリー検索をバックグラウンドジョブとして登録し、ジョブIDを即座に返却
+    進捗と結果は GET /research-jobs/{job_id} で取得する
+    """
+    job = await crud.create_job(db, request.model_dump())
+    research_job_runner.submit(job.id)
+    return ResearchJobCreated(job_id=job.id, status=job.status)
+
+@router.get("/research-jobs/{job_id}", response_model=ResearchJobStatus, summary="Get research job status")
+async def get_research_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """ジョブの状態と進捗（完了ノード数 / 全ノード数）を取得"""
+    return ResearchJobStatus(**_job_status(await _get_job_or_404(db, job_id)))
+
+@router.get("/research-jobs/{job_id}/results", response_model=ResearchJobResults, summary="Get research job results (partial while running)")
+async def get_research_job_results(job_id: str, db: AsyncSession = Depends(get_db)):
+    """完了済みノードの結果を取得（ジョブ実行中は途中結果）"""
+    job = await _get_job_or_404(db, job_id)
+    query_nodes = [
+        QueryNode(query=node.query, description=node.description, papers=node.papers, paper_count=node.paper_count)
+        for node in job.nodes
+    ]
+    return ResearchJobResults(
+        **_job_status(job),
+        query_nodes=query_nodes,
+        total_papers=sum(node.paper_count for node in query_nodes),
+        total_unique_papers=_deduplicate_papers(query_nodes),
+    )
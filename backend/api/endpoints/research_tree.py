@@ -1,29 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from pydantic import BaseModel, Field
 import logging
 import re
-from typing import List, Optional, Union, Dict, Any
+from typing import Annotated, AsyncIterator, List, Literal, Optional, Union, Dict, Any, Callable
+from dataclasses import dataclass, fields
 from datetime import datetime
 from fastapi.responses import StreamingResponse
 import asyncio
-import json
+import heapq
+import itertools
+import time
 
 from backend.app.dependencies import get_llm_client
 from backend.app.clients.gemini_client import GeminiClient # For type hinting
 from backend.app.clients.ollama_client import OllamaClient # For type hinting
-from backend.api.arxiv_client import ArxivAPIClient, get_arxiv_client
+from backend.api.arxiv_client import ArxivAPIClient, get_arxiv_client, search_options
+from backend.schemas.arxiv_schema import ArxivPaper, SearchFilters
+from backend.app import llm
+from backend.app.scoring_batcher import scoring_batcher
+from backend.app.near_duplicates import NearDuplicateIndex, paper_text
+from backend.app.fair_scheduler import flow_scope
+from backend.app.admission import AdmissionRejected, AdmissionTicket, admission_controller
+from backend.app.pipeline_hub import pipeline_hub, pipeline_key
+from backend.app.response_cache import research_tree_cache, etag_matches
+from backend.app.tiered_cache import score_cache
+from backend.app.compression import encode_body
+from backend.app.serialization import ORJSONResponse, dumps
+from backend.core.metrics import counter
+from backend.core import deadline
+from backend.core.config import (
+    SSE_HEARTBEAT_INTERVAL_S,
+    TOP_K_SNAPSHOT_INTERVAL_S,
+    EARLY_STOP_SCORING_WINDOW,
+    EARLY_STOP_MIN_REMAINING_MS,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# プロンプト（研究計画・スコアリング）を変更したら更新する。キャッシュ済みレスポンスのキーに含まれる
+PROMPT_VERSION = "1"
+
+# スコアリング失敗時の説明文（これを含む結果はキャッシュしない）
+SCORE_TIMEOUT_EXPLANATION = "スコア計算タイムアウト"
+SCORE_ERROR_EXPLANATION = "スコア計算エラー"
+# 早期打ち切りでスコアリングされなかった論文の説明文
+UNSCORED_EXPLANATION = "未評価（時間予算または目標件数に到達したためスコアリングを省略）"
+
 # === Input Models ===
-class ResearchTreeRequest(BaseModel):
+class ResearchTreeRequest(SearchFilters):
+    # categories / date_from / date_to / sort はarXiv検索クエリに組み込まれ、範囲外の論文は取得もスコアリングもしない
     natural_language_query: str
     max_results_per_query: int = 5
     max_queries: int = 5
+    # リクエスト全体の時間予算（ミリ秒）。各LLM/arXiv呼び出しのタイムアウトに伝播される
+    time_budget_ms: Optional[int] = Field(None, gt=0)
+    # ストリーミング時に配信する全ノード横断の上位論文数
+    top_k: int = Field(10, ge=1)
+    # 関連性スコアがこの値以上の論文を「高関連」とみなす
+    high_relevance_threshold: float = Field(0.7, ge=0.0, le=1.0)
+    # 高関連論文がこの件数に達したら新たなスコアリングを打ち切る（未指定なら打ち切らない）
+    target_high_relevance: Optional[int] = Field(None, ge=1)
 
 # === Output Models ===
-class ScoredPaper(BaseModel):
+@dataclass(slots=True)
+class ScoredPaper:
+    """
+    パイプライン内で論文1件を運ぶ軽量レコード。arXiv検索結果から1回だけ生成し（スコア前は scored=False）、
+    スコアは同じインスタンスに書き込む。レスポンスモデルにもそのまま格納し、orjson / pydantic が直接シリアライズする
+    """
     title: str
     authors: List[str]
     abstract: str
@@ -33,6 +78,38 @@ class ScoredPaper(BaseModel):
     arxiv_id: str
     relevance_score: float
     relevance_explanation: str
+    # 早期打ち切りでスコアリングされなかった論文は scored=False となり、
+    # arXiv検索結果内の順位（1始まり）を暫定順位として持つ
+    scored: bool = True
+    provisional_rank: Optional[int] = None
+    # 別IDの論文とほぼ同一（再投稿・クロスリスト）としてスコアを共有した場合、その論文のarxiv_id
+    duplicate_of: Optional[str] = None
+
+    @classmethod
+    def from_arxiv(cls, result: ArxivPaper) -> "ScoredPaper":
+        """arXiv検索結果からスコア前の論文レコードを作る"""
+        return cls(
+            title=result.title,
+            authors=[author.name for author in result.authors],
+            abstract=result.summary or "",
+            published_date=result.published,
+            url=result.pdf_url,
+            categories=result.categories,
+            arxiv_id=result.arxiv_id,  # バージョンを除いたarXiv ID
+            relevance_score=0.0,
+            relevance_explanation="",
+            scored=False
+        )
+
+    def metadata(self) -> Dict[str, Any]:
+        """スコア以外の論文メタデータ"""
+        return {field: getattr(self, field) for field in _PAPER_RECORD_FIELDS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON互換の辞書（日時はISO 8601文字列）。DBへの保存用"""
+        data = {field.name: getattr(self, field.name) for field in fields(self)}
+        data['published_date'] = self.published_date.isoformat()
+        return data
 
 class QueryNode(BaseModel):
     """個別のクエリとその結果を表すノード"""
@@ -48,6 +125,52 @@ class SearchTreeResponse(BaseModel):
     query_nodes: List[QueryNode]
     total_papers: int
     total_unique_papers: int  # 重複除去後の論文数
+    unscored_papers: int = 0  # 早期打ち切りでスコアリングされなかった論文数
+    stop_reason: Optional[str] = None  # 早期打ち切りの理由（"budget_spent" / "target_reached"）
+
+# === Normalized Output Models (format=normalized) ===
+ResponseFormat = Literal["tree", "normalized"]
+
+class PaperRecord(BaseModel):
+    """ノードに依存しない論文メタデータ（正規化形式では論文ごとに1回だけ返す）"""
+    title: str
+    authors: List[str]
+    abstract: str
+    published_date: datetime
+    url: str
+    categories: List[str]
+    arxiv_id: str
+
+class NodePaperRef(BaseModel):
+    """ノード内の論文への参照。rank はノード内の順位（1始まり）"""
+    arxiv_id: str
+    rank: int
+    relevance_score: float
+    relevance_explanation: str
+    scored: bool = True
+    provisional_rank: Optional[int] = None
+    duplicate_of: Optional[str] = None
+
+class NormalizedQueryNode(BaseModel):
+    query: str
+    description: str
+    papers: List[NodePaperRef]
+    paper_count: int
+
+class NormalizedSearchTreeResponse(BaseModel):
+    """正規化形式の検索結果。論文本体は papers（arxiv_idがキー）に1回だけ含め、各ノードはIDで参照する"""
+    format: Literal["normalized"] = "normalized"
+    original_query: str
+    research_goal: str
+    papers: Dict[str, PaperRecord]
+    query_nodes: List[NormalizedQueryNode]
+    total_papers: int
+    total_unique_papers: int
+    unscored_papers: int = 0
+    stop_reason: Optional[str] = None
+
+_PAPER_RECORD_FIELDS = tuple(PaperRecord.model_fields)
+_PAPER_SCORE_FIELDS = ("relevance_score", "relevance_explanation", "scored", "provisional_rank", "duplicate_of")
 
 # === Helper Functions ===
 async def _generate_research_plan(natural_query: str, client: Union[GeminiClient, OllamaClient], max_queries: int) -> tuple[str, List[tuple[str, str]]]:
@@ -86,8 +209,7 @@ async def _generate_research_plan(natural_query: str, client: Union[GeminiClient
     )
     
     try:
-        # Both clients now support a model parameter with a default, so just passing prompt is fine.
-        response = client.generate_text(prompt=prompt) 
+        response = await llm.generate_text(client, prompt, stage="plan")
         # logger.info(f"Raw LLM Response: {repr(response)}")
 
         # Pre-process the response string for robustness
@@ -136,8 +258,7 @@ async def _calculate_relevance_score(
     )
     
     try:
-        # Both clients now support a model parameter with a default.
-        response = client.generate_text(prompt=prompt)
+        response = await llm.generate_text(client, prompt, stage="score")
         
         score = 0.0
         explanation = "Could not parse score or explanation."
@@ -176,22 +297,454 @@ async def _calculate_relevance_score(
 
         return score, explanation
         
+    except TimeoutError:
+        logger.warning(f"Relevance scoring timed out for paper: {title}")
+        return 0.0, SCORE_TIMEOUT_EXPLANATION
     except Exception as e:
         logger.error(f"Error calculating relevance score: {e}")
-        return 0.0, "スコア計算エラー"
+        return 0.0, SCORE_ERROR_EXPLANATION
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"data: {dumps(event).decode()}\n\n"
+
+def _normalize_response(response: SearchTreeResponse) -> NormalizedSearchTreeResponse:
+    """ツリー形式のレスポンスを、論文を重複させない正規化形式に変換する"""
+    papers: Dict[str, PaperRecord] = {}
+    query_nodes = []
+    for node in response.query_nodes:
+        refs = []
+        for rank, paper in enumerate(node.papers, start=1):
+            if paper.arxiv_id not in papers:
+                papers[paper.arxiv_id] = PaperRecord(**paper.metadata())
+            refs.append(NodePaperRef(arxiv_id=paper.arxiv_id, rank=rank, **{field: getattr(paper, field) for field in _PAPER_SCORE_FIELDS}))
+        query_nodes.append(NormalizedQueryNode(query=node.query, description=node.description, papers=refs, paper_count=node.paper_count))
+    return NormalizedSearchTreeResponse(
+        original_query=response.original_query,
+        research_goal=response.research_goal,
+        papers=papers,
+        query_nodes=query_nodes,
+        total_papers=response.total_papers,
+        total_unique_papers=response.total_unique_papers,
+        unscored_papers=response.unscored_papers,
+        stop_reason=response.stop_reason
+    )
+
+class _NormalizedEventEncoder:
+    """
+    ストリームのイベントを正規化形式に変換する（format=normalized）。
+    論文を含むイベント（papers_found / papers / top_k）の papers は、このストリームで初出の論文の
+    メタデータだけを arxiv_id をキーとする辞書で持ち、論文の並びは refs（IDと順位、スコア）で表す。
+    """
+    def __init__(self):
+        self._sent_ids: set[str] = set()
+
+    def encode(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        if event['type'] not in ('papers_found', 'papers', 'top_k'):
+            return event
+        scored = event['type'] != 'papers_found'
+        records: Dict[str, Dict[str, Any]] = {}
+        refs = []
+        for rank, paper in enumerate(event['papers'], start=1):
+            # papers_found はメタデータの辞書、papers / top_k は ScoredPaper を持つ
+            metadata = paper.metadata() if scored else paper
+            arxiv_id = metadata['arxiv_id']
+            if arxiv_id not in self._sent_ids:
+                self._sent_ids.add(arxiv_id)
+                records[arxiv_id] = metadata
+            ref = {'arxiv_id': arxiv_id, 'rank': rank}
+            if scored:
+                ref.update((field, getattr(paper, field)) for field in _PAPER_SCORE_FIELDS)
+            refs.append(ref)
+        return {**event, 'papers': records, 'refs': refs}
+
+class _LiveTopK:
+    """
+    全ノード横断で関連性スコア上位k件を保持する（arxiv_idごとに最高スコアのみ。ほぼ同一の論文は代表の1件のみ）。
+    サイズkの最小ヒープで管理し、新しいスコアがヒープ最小値を超えた場合のみ入れ替える。
+    """
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[tuple[float, str]] = []
+        self._papers: Dict[str, ScoredPaper] = {}
+
+    def add(self, paper: ScoredPaper) -> bool:
+        """論文を追加し、上位k件が変化した場合にTrueを返す"""
+        if paper.duplicate_of is not None:
+            return False
+        current = self._papers.get(paper.arxiv_id)
+        if current is not None:
+            if paper.relevance_score <= current.relevance_score:
+                return False
+            # 既にヒープ内にある論文のスコア更新はまれなので再構築で対応
+            self._papers[paper.arxiv_id] = paper
+            self._heap = [(p.relevance_score, arxiv_id) for arxiv_id, p in self._papers.items()]
+            heapq.heapify(self._heap)
+            return True
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (paper.relevance_score, paper.arxiv_id))
+        elif paper.relevance_score > self._heap[0][0]:
+            _, evicted_id = heapq.heapreplace(self._heap, (paper.relevance_score, paper.arxiv_id))
+            del self._papers[evicted_id]
+        else:
+            return False
+        self._papers[paper.arxiv_id] = paper
+        return True
+
+    def snapshot(self) -> List[ScoredPaper]:
+        return sorted(self._papers.values(), key=lambda p: p.relevance_score, reverse=True)
+
+async def _score_paper(paper: ScoredPaper, original_query: str, llm_client: Union[GeminiClient, OllamaClient]) -> ScoredPaper:
+    """
+    論文1件の関連性スコアを計算し（元の自然言語クエリに対して）、同じレコードに書き込んで返す。
+    ジョブはプロセス共通のバッチャーに投入され、他のリクエストのジョブとまとめて評価される。
+    同じ論文・クエリ・LLM構成のスコアはscore_cacheから返す（失敗時のスコアはキャッシュしない）。
+    同じスコアを同時に計算しようとする他のリクエストや他のワーカープロセスは、その結果を待って共有する
+    """
+    async def compute() -> tuple:
+        return await scoring_batcher.score(
+            title=paper.title,
+            authors=paper.authors,
+            abstract=paper.abstract,
+            original_query=original_query,
+            client=llm_client,
+            single_scorer=_calculate_relevance_score,
+        )
+
+    score, explanation = await score_cache.get_or_compute(
+        pipeline_key("score", paper.arxiv_id, original_query, llm.client_fingerprint(llm_client), PROMPT_VERSION),
+        compute,
+        cacheable=lambda result: result[1] not in (SCORE_TIMEOUT_EXPLANATION, SCORE_ERROR_EXPLANATION),
+    )
+    paper.relevance_score = score
+    paper.relevance_explanation = explanation
+    paper.scored = True
+    return paper
+
+class _ScoringDispatcher:
+    """
+    1リクエスト分の論文スコアリングを優先度順に発行する。
+
+    優先度はarXiv検索結果内の順位（上位ほど先、同順位はノード順）。ノードの検索が終わるたびに
+    論文が追加され、後から届いたノードの上位論文も先に届いたノードの下位論文より先に発行される。
+
+    時間予算か高関連論文の目標件数が指定された場合（早期打ち切り）は、同時に評価する論文を
+    EARLY_STOP_SCORING_WINDOW 件に制限し、時間予算の残りが EARLY_STOP_MIN_REMAINING_MS を
+    下回った時点、または高関連論文が目標件数に達した時点で新たな発行を止める。
+    発行されなかった論文（および時間切れになった論文）は None で解決される。
+
+    同じ論文（バージョン違いを含む）やタイトル・要旨がほぼ同一の論文（NearDuplicateIndex）が
+    リクエスト内で再び投入された場合は、スコアリングせずに最初の論文（代表）の結果を共有する。
+    代表のスコアリングが呼び出し側にキャンセルされた場合は、改めて自身をスコアリングする。
+    """
+    def __init__(self, request: ResearchTreeRequest, llm_client: Union[GeminiClient, OllamaClient]):
+        self.original_query = request.natural_language_query
+        self.llm_client = llm_client
+        self.target = request.target_high_relevance
+        self.threshold = request.high_relevance_threshold
+        early_termination = self.target is not None or deadline.get_deadline() is not None
+        self.window = EARLY_STOP_SCORING_WINDOW if early_termination else None
+        self.high_relevance = 0
+        self.stop_reason: Optional[str] = None
+        self._queue: List[tuple] = []  # (rank, node_index, seq, paper, future) の最小ヒープ
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._scorings: Dict[str, asyncio.Future] = {}  # arxiv_id -> 代表論文のスコアリング
+        self._near_duplicates = NearDuplicateIndex()
+
+    def submit(self, node_index: int, rank: int, paper: ScoredPaper) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if self.stop_reason is not None:
+            future.set_result(None)
+            return future
+        if paper.arxiv_id in self._scorings:
+            representative = paper.arxiv_id
+        else:
+            representative = self._near_duplicates.add(paper.arxiv_id, paper_text(paper.title, paper.abstract))
+        if representative is not None:
+            counter("scoring.duplicates_collapsed").increment()
+            self._scorings[representative].add_done_callback(
+                lambda scoring: self._share(scoring, node_index, rank, paper, future)
+            )
+            return future
+        self._scorings[paper.arxiv_id] = future
+        self._enqueue(node_index, rank, paper, future)
+        return future
+
+    def _enqueue(self, node_index: int, rank: int, paper: ScoredPaper, future: asyncio.Future) -> None:
+        if self.stop_reason is not None:
+            future.set_result(None)
+            return
+        heapq.heappush(self._queue, (rank, node_index, next(self._sequence), paper, future))
+        self._dispatch()
+
+    def _share(self, scoring: asyncio.Future, node_index: int, rank: int, paper: ScoredPaper, future: asyncio.Future) -> None:
+        """代表論文のスコアリング結果を重複論文に写す"""
+        if future.done():
+            return
+        if scoring.cancelled():
+            self._scorings[paper.arxiv_id] = future
+            self._enqueue(node_index, rank, paper, future)
+        elif scoring.exception() is not None:
+            future.set_exception(scoring.exception())
+        elif scoring.result() is None:
+            future.set_result(None)
+        else:
+            representative = scoring.result()
+            paper.relevance_score = representative.relevance_score
+            paper.relevance_explanation = representative.relevance_explanation
+            paper.scored = True
+            if representative.arxiv_id != paper.arxiv_id:
+                paper.duplicate_of = representative.duplicate_of or representative.arxiv_id
+            future.set_result(paper)
+
+    def _check_stop(self) -> Optional[str]:
+        if self.target is not None and self.high_relevance >= self.target:
+            return "target_reached"
+        left = deadline.remaining()
+        if left is not None and left * 1000.0 <= EARLY_STOP_MIN_REMAINING_MS:
+            return "budget_spent"
+        return None
+
+    def _dispatch(self) -> None:
+        while self._queue and (self.window is None or self._in_flight < self.window):
+            reason = self._check_stop()
+            if reason is not None:
+                self._stop(reason)
+                return
+            _, _, _, paper, future = heapq.heappop(self._queue)
+            if future.done():  # 呼び出し側がキャンセル済み
+                continue
+            self._in_flight += 1
+            task = asyncio.get_running_loop().create_task(self._score(paper, future))
+            future.add_done_callback(lambda f, task=task: task.cancel() if f.cancelled() else None)
+
+    def _stop(self, reason: str) -> None:
+        self.stop_reason = reason
+        skipped = 0
+        while self._queue:
+            future = heapq.heappop(self._queue)[-1]
+            if not future.done():
+                future.set_result(None)
+                skipped += 1
+        counter(f"scoring.early_stop.{reason}").increment()
+        counter("scoring.papers_skipped").increment(skipped)
+        logger.info(f"Stopped scoring early ({reason}); {skipped} papers left unscored")
+
+    async def _score(self, paper: ScoredPaper, future: asyncio.Future) -> None:
+        try:
+            scored_paper = await _score_paper(paper, self.original_query, self.llm_client)
+            if scored_paper.relevance_explanation == SCORE_TIMEOUT_EXPLANATION and self.window is not None:
+                scored_paper = None  # 時間切れは未評価として扱う
+            elif scored_paper.relevance_score >= self.threshold:
+                self.high_relevance += 1
+            if not future.done():
+                future.set_result(scored_paper)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._in_flight -= 1
+            self._dispatch()
+
+def _unscored_paper(paper: ScoredPaper, rank: int) -> ScoredPaper:
+    paper.relevance_score = 0.0
+    paper.relevance_explanation = UNSCORED_EXPLANATION
+    paper.scored = False
+    paper.provisional_rank = rank + 1
+    return paper
+
+def _rank_papers(papers: List[ScoredPaper]) -> List[ScoredPaper]:
+    """スコア済み論文をスコア順に並べ、その後に未評価論文を暫定順位順に並べる"""
+    return sorted(papers, key=lambda p: (not p.scored, -p.relevance_score, p.provisional_rank or 0))
+
+async def _build_query_node(
+    query_text: str,
+    description: str,
+    request: ResearchTreeRequest,
+    llm_client: Union[GeminiClient, OllamaClient],
+    arxiv_client: ArxivAPIClient,
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+    dispatcher: Optional[_ScoringDispatcher] = None,
+    node_index: int = 0,
+    on_scored: Optional[Callable[[ScoredPaper], None]] = None,
+    raise_errors: bool = False
+) -> QueryNode:
+    """
+    1つのクエリについてarXiv検索とスコアリングを行い、QueryNodeを返す。
+    emitが指定された場合は進捗イベント（papers_found / paper_scored / papers）を逐次通知する。
+    on_scoredが指定された場合は、スコアが確定した論文を paper_scored イベントの直前に渡す。
+    スコアリングはリクエスト全体で共有する dispatcher 経由で優先度順に行う。
+    検索に失敗したクエリは空のノードになる（raise_errors=True なら例外をそのまま送出する）。
+    """
+    emit = emit or (lambda event: None)
+    dispatcher = dispatcher or _ScoringDispatcher(request, llm_client)
+    logger.info(f"Searching with query: {query_text}")
+    try:
+        # arXiv検索
+        arxiv_results = await arxiv_client.search_papers(
+            keyword=query_text,
+            max_results=request.max_results_per_query,
+            **search_options(request)
+        )
+        metadata = [ScoredPaper.from_arxiv(result) for result in arxiv_results]
+        # スコア前のメタデータを即座に通知
+        emit({'type': 'papers_found', 'query': query_text, 'description': description, 'papers': [paper.metadata() for paper in metadata]})
+
+        async def score_paper(rank: int, paper: ScoredPaper, scoring: asyncio.Future) -> ScoredPaper:
+            scored_paper = await scoring
+            if scored_paper is None:
+                return _unscored_paper(paper, rank)
+            if on_scored is not None:
+                on_scored(scored_paper)
+            emit({
+                'type': 'paper_scored',
+                'query': query_text,
+                'arxiv_id': scored_paper.arxiv_id,
+                'relevance_score': scored_paper.relevance_score,
+                'relevance_explanation': scored_paper.relevance_explanation,
+            })
+            return scored_paper
+
+        # ノード内の全論文をarXivの順位順にスコアリングへ投入
+        scorings = [dispatcher.submit(node_index, rank, paper) for rank, paper in enumerate(metadata)]
+        try:
+            scored_papers = list(await asyncio.gather(*(
+                score_paper(rank, paper, scoring) for rank, (paper, scoring) in enumerate(zip(metadata, scorings))
+            )))
+        finally:
+            for scoring in scorings:
+                scoring.cancel()
+
+        # スコア順でソート（未評価論文は末尾に暫定順位順）
+        scored_papers = _rank_papers(scored_papers)
+        node = QueryNode(
+            query=query_text,
+            description=description,
+            papers=scored_papers,
+            paper_count=len(scored_papers)
+        )
+        emit({'type': 'papers', 'query': query_text, 'description': description, 'papers': scored_papers})
+        return node
+
+    except Exception as e:
+        logger.error(f"Error searching with query '{query_text}': {e}")
+        if raise_errors:
+            raise
+        # エラーが発生したクエリも空のノードとして追加
+        emit({'type': 'papers', 'query': query_text, 'description': description, 'papers': [], 'error': str(e)})
+        return QueryNode(
+            query=query_text,
+            description=description,
+            papers=[],
+            paper_count=0
+        )
 
 def _deduplicate_papers(query_nodes: List[QueryNode]) -> int:
     """
-    重複論文を数えて、ユニークな論文数を返す
+    重複論文を数えて、ユニークな論文数を返す（ほぼ同一の論文は代表と同じ1件と数える）
     """
     seen_ids = set()
     for node in query_nodes:
         for paper in node.papers:
-            seen_ids.add(paper.arxiv_id)
+            seen_ids.add(paper.duplicate_of or paper.arxiv_id)
     return len(seen_ids)
 
+def _response_cache_key(request: ResearchTreeRequest, llm_client: Any, response_format: ResponseFormat = "tree") -> str:
+    """
+    リクエストの正規化ハッシュ（LLM構成とプロンプトバージョン、正規化形式ならその旨を含む）
+    time_budget_ms / top_k は結果の内容に影響しないためキーから除外する
+    """
+    params = request.model_dump(exclude={"time_budget_ms", "top_k"})
+    params["natural_language_query"] = " ".join(request.natural_language_query.split())
+    parts = ["research-tree", params, llm.client_fingerprint(llm_client), PROMPT_VERSION]
+    if response_format != "tree":
+        parts.append(response_format)
+    return pipeline_key(*parts)
+
+def _stream_key(request: ResearchTreeRequest, llm_client: Any, response_format: ResponseFormat = "tree") -> str:
+    """ストリーミング実行を相乗りさせるキー（LLM構成とプロンプトバージョンを含む）"""
+    return pipeline_key(
+        "research-tree/stream", request.model_dump(), llm.client_fingerprint(llm_client), PROMPT_VERSION, response_format
+    )
+
+def _is_cacheable(response: SearchTreeResponse) -> bool:
+    """検索失敗（空ノード）やスコア計算失敗、時間予算による打ち切りを含む結果はキャッシュしない"""
+    if response.stop_reason == "budget_spent":
+        return False
+    degraded = {SCORE_TIMEOUT_EXPLANATION, SCORE_ERROR_EXPLANATION}
+    return all(
+        node.papers and all(paper.relevance_explanation not in degraded for paper in node.papers)
+        for node in response.query_nodes
+    )
+
+async def _admit() -> AdmissionTicket:
+    """パイプラインの実行枠を確保する。待ち行列が満杯・待ち時間超過の場合は Retry-After 付きの 429 を返す"""
+    try:
+        return await admission_controller.acquire()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many research tree pipelines in progress ({e.reason}). Please retry later.",
+            headers={"Retry-After": str(e.retry_after_s)},
+        )
+
+def _json_response(body: str, accept_encoding: Optional[str], headers: Dict[str, str]) -> ORJSONResponse:
+    """Accept-Encoding に応じて gzip / brotli で圧縮したJSONレスポンスを返す"""
+    content, encoding_headers = encode_body(body.encode("utf-8"), accept_encoding)
+    return ORJSONResponse(content=content, headers={**headers, **encoding_headers})
+
+async def _release_when_done(stream: AsyncIterator[str], ticket: AdmissionTicket) -> AsyncIterator[str]:
+    try:
+        async for event in stream:
+            yield event
+    finally:
+        ticket.release()
+
 # === Main Endpoint ===
-@router.post("/research-tree", response_model=SearchTreeResponse, summary="Multi-query research with tree visualization")
+@router.post("/research-tree", response_model=SearchTreeResponse, response_class=ORJSONResponse, summary="Multi-query research with tree visualization")
+async def research_tree(
+    request: ResearchTreeRequest,
+    refresh: bool = False,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    llm_client: Union[GeminiClient, OllamaClient] = Depends(get_llm_client),
+    arxiv_client: ArxivAPIClient = Depends(get_arxiv_client),
+    response_format: Annotated[ResponseFormat, Query(alias="format")] = "tree",
+    accept_encoding: Annotated[Optional[str], Header()] = None
+):
+    """
+    research_tree_search の結果をキャッシュして返却する
+
+    - 同じリクエスト（正規化後）・LLM構成・プロンプトバージョンの結果はTTLの間キャッシュから返す
+    - ETag を返し、If-None-Match が一致すれば 304 Not Modified を返す
+    - refresh=true でキャッシュを無視して再計算する
+    - キャッシュにない場合はアドミッション制御の実行枠を待つ（混雑時は 429 + Retry-After）
+    - format=normalized で論文を重複させない正規化形式（NormalizedSearchTreeResponse）を返す
+    - Accept-Encoding に応じて gzip / brotli で圧縮する
+    """
+    cache_enabled = research_tree_cache.enabled
+    key = _response_cache_key(request, llm_client, response_format)
+    if cache_enabled and not refresh:
+        cached = await research_tree_cache.get(key)
+        if cached is not None:
+            etag, body = cached
+            if etag_matches(if_none_match, etag):
+                counter("research_tree_cache.not_modified").increment()
+                return ORJSONResponse(content=b"", status_code=304, headers={"ETag": etag})
+            counter("research_tree_cache.hits").increment()
+            return _json_response(body, accept_encoding, {"ETag": etag, "X-Cache": "hit"})
+    counter("research_tree_cache.misses").increment()
+
+    ticket = await _admit()
+    try:
+        response = await research_tree_search(request, llm_client, arxiv_client)
+    finally:
+        ticket.release()
+    body = dumps(_normalize_response(response) if response_format == "normalized" else response).decode()
+    if not (cache_enabled and _is_cacheable(response)):
+        return _json_response(body, accept_encoding, {"X-Cache": "miss"})
+    etag = await research_tree_cache.put(key, body)
+    return _json_response(body, accept_encoding, {"ETag": etag, "X-Cache": "miss"})
+
 async def research_tree_search(
     request: ResearchTreeRequest,
     llm_client: Union[GeminiClient, OllamaClient] = Depends(get_llm_client),
@@ -202,159 +755,165 @@ async def research_tree_search(
     
     フロー:
     1. 自然言語クエリ → Geminiが研究目標と複数クエリ生成
-    2. 各クエリでarXiv検索
+    2. 各クエリでarXiv検索（クエリ間は並行実行）
     3. 各論文に元の自然言語クエリとの関連性スコア計算
     4. ツリー構造で返却（フロントエンド可視化用）
     """
-    try:
-        # Step 1: 研究計画生成（目標 + 複数クエリ）
-        logger.info(f"Generating research plan for: {request.natural_language_query}")
-        research_goal, query_plans = await _generate_research_plan(
-            request.natural_language_query,
-            llm_client,
-            request.max_queries
-        )
-        logger.info(f"Research goal: {research_goal}")
-        logger.info(f"Generated {len(query_plans)} queries")
-        
-        # Step 2: 各クエリで検索実行
-        query_nodes = []
-        total_papers = 0
-        
-        for query_text, description in query_plans:
-            logger.info(f"Searching with query: {query_text}")
-            
-            try:
-                # arXiv検索
-                arxiv_results = await arxiv_client.search_papers(
-                    keyword=query_text,
-                    max_results=request.max_results_per_query
-                )
-                
-                # 各論文にスコア付与
-                scored_papers = []
-                for result in arxiv_results:
-                    authors = [author.name for author in result.authors]
-                    
-                    # 関連性スコア計算（元の自然言語クエリに対して）
-                    score, explanation = await _calculate_relevance_score(
-                        title=result.title,
-                        authors=authors,
-                        abstract=result.summary or "",
-                        original_query=request.natural_language_query,
-                        client=llm_client
-                    )
-                    
-                    scored_paper = ScoredPaper(
-                        title=result.title,
-                        authors=authors,
-                        abstract=result.summary or "",
-                        published_date=result.published,
-                        url=result.pdf_url,
-                        categories=result.categories,
-                        arxiv_id=result.entry_id.split('/')[-1],  # arXiv IDを抽出
-                        relevance_score=score,
-                        relevance_explanation=explanation
-                    )
-                    scored_papers.append(scored_paper)
-                
-                # スコア順でソート
-                scored_papers.sort(key=lambda x: x.relevance_score, reverse=True)
-                
-                # QueryNodeを作成
-                query_node = QueryNode(
-                    query=query_text,
-                    description=description,
-                    papers=scored_papers,
-                    paper_count=len(scored_papers)
-                )
-                query_nodes.append(query_node)
-                total_papers += len(scored_papers)
-                
-            except Exception as e:
-                logger.error(f"Error searching with query '{query_text}': {e}")
-                # エラーが発生したクエリも空のノードとして追加
-                query_nodes.append(QueryNode(
-                    query=query_text,
-                    description=description,
-                    papers=[],
-                    paper_count=0
-                ))
-        
-        # Step 3: 重複論文数を計算
-        unique_papers_count = _deduplicate_papers(query_nodes)
-        
-        return SearchTreeResponse(
-            original_query=request.natural_language_query,
-            research_goal=research_goal,
-            query_nodes=query_nodes,
-            total_papers=total_papers,
-            total_unique_papers=unique_papers_count
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in research tree search: {e}")
-        raise HTTPException(status_code=500, detail=f"Research tree search failed: {str(e)}")
+    with deadline.deadline_scope(request.time_budget_ms), flow_scope("interactive"):
+        try:
+            # Step 1: 研究計画生成（目標 + 複数クエリ）
+            logger.info(f"Generating research plan for: {request.natural_language_query}")
+            research_goal, query_plans = await _generate_research_plan(
+                request.natural_language_query,
+                llm_client,
+                request.max_queries
+            )
+            logger.info(f"Research goal: {research_goal}")
+            logger.info(f"Generated {len(query_plans)} queries")
+
+            # Step 2: 各クエリで検索・スコアリング（スコアリングは全ノード共通の優先度順）
+            dispatcher = _ScoringDispatcher(request, llm_client)
+            query_nodes = list(await asyncio.gather(*(
+                _build_query_node(query_text, description, request, llm_client, arxiv_client, dispatcher=dispatcher, node_index=index)
+                for index, (query_text, description) in enumerate(query_plans)
+            )))
+            total_papers = sum(node.paper_count for node in query_nodes)
+
+            # Step 3: 重複論文数を計算
+            unique_papers_count = _deduplicate_papers(query_nodes)
+
+            return SearchTreeResponse(
+                original_query=request.natural_language_query,
+                research_goal=research_goal,
+                query_nodes=query_nodes,
+                total_papers=total_papers,
+                total_unique_papers=unique_papers_count,
+                unscored_papers=sum(not paper.scored for node in query_nodes for paper in node.papers),
+                stop_reason=dispatcher.stop_reason
+            )
+
+        except Exception as e:
+            logger.error(f"Error in research tree search: {e}")
+            raise HTTPException(status_code=500, detail=f"Research tree search failed: {str(e)}")
 
 @router.post("/research-tree/stream", summary="Multi-query research with streaming response")
 async def research_tree_stream(
     request: ResearchTreeRequest,
     llm_client: Union[GeminiClient, OllamaClient] = Depends(get_llm_client),
-    arxiv_client: ArxivAPIClient = Depends(get_arxiv_client)
+    arxiv_client: ArxivAPIClient = Depends(get_arxiv_client),
+    last_event_id: Annotated[Optional[str], Header()] = None,
+    response_format: Annotated[ResponseFormat, Query(alias="format")] = "tree"
 ):
     """
-    クエリ生成→即返却→各クエリごとに論文検索→都度返却（ストリーミング）
+    クエリ生成→即返却→各クエリごとに論文検索→論文単位で逐次返却（ストリーミング）
+
+    イベント:
+    - queries: 生成された検索クエリ
+    - papers_found: arXiv検索直後のスコア前メタデータ
+    - paper_scored: 論文1件のスコア確定
+    - top_k: 全ノード横断の上位k件スナップショット（変化時に一定間隔で送信）
+    - papers: 1ノード分のスコア済み論文リスト（ノード完了時）
+    - done: 全ノード完了（早期打ち切りした場合は未評価論文数と理由を含む）
+    処理待ちの間はSSEコメントのハートビートを送信する。
+    format=normalized では論文メタデータを初出時に1回だけ送り、以降はIDで参照する（_NormalizedEventEncoder）。
+
+    同じリクエストが同時に複数届いた場合はパイプラインを1回だけ実行し、
+    イベントを全購読者に配信する（途中参加者には配信済みイベントを再送）。
+
+    各イベントには「id: <セッションID>:<連番>」が付与され、SQLiteのイベントログにも保存される。
+    切断後に同じリクエストを Last-Event-ID ヘッダー付きで送ると、未受信のイベントだけを再送し、
+    パイプラインが実行中であればそのまま合流する（LLM/arXiv呼び出しは再実行しない）。
+
+    新しくパイプラインを開始する場合はアドミッション制御の実行枠を待ち、確保できなければ
+    ストリームを開始せずに 429 + Retry-After を返す。実行枠はパイプライン終了まで保持する。
     """
+    encoder = _NormalizedEventEncoder() if response_format == "normalized" else None
+
+    def sse(event: Dict[str, Any]) -> str:
+        return _sse(encoder.encode(event) if encoder is not None else event)
+
     async def event_stream():
-        # Step 1: クエリ生成
-        research_goal, query_plans = await _generate_research_plan(
-            request.natural_language_query,
-            llm_client,
-            request.max_queries
-        )
-        # クエリ生成結果をまず送信
-        yield f"data: {json.dumps({'type': 'queries', 'original_query': request.natural_language_query, 'research_goal': research_goal, 'queries': [{'query': q, 'description': d} for q, d in query_plans]})}\n\n"
-        await asyncio.sleep(0.05)
+        with deadline.deadline_scope(request.time_budget_ms), flow_scope("interactive"):
+            # Step 1: クエリ生成
+            research_goal, query_plans = await _generate_research_plan(
+                request.natural_language_query,
+                llm_client,
+                request.max_queries
+            )
+            # クエリ生成結果をまず送信
+            yield sse({'type': 'queries', 'original_query': request.natural_language_query, 'research_goal': research_goal, 'queries': [{'query': q, 'description': d} for q, d in query_plans]})
 
-        # Step 2: 各クエリで検索実行
-        for query_text, description in query_plans:
-            try:
-                arxiv_results = await arxiv_client.search_papers(
-                    keyword=query_text,
-                    max_results=request.max_results_per_query
+            # Step 2: 全クエリを並行して検索・スコアリングし、イベントをキュー経由で受け取る
+            events: asyncio.Queue = asyncio.Queue()
+            finished = object()
+            dispatcher = _ScoringDispatcher(request, llm_client)
+            # 上位k件はノードの完了を待たず、論文1件のスコアが確定するたびに更新する
+            top_k = _LiveTopK(request.top_k)
+            top_k_changed = False
+            last_snapshot = 0.0
+
+            def on_scored(paper: ScoredPaper) -> None:
+                nonlocal top_k_changed
+                top_k_changed |= top_k.add(paper)
+
+            work = asyncio.gather(*(
+                _build_query_node(
+                    query_text, description, request, llm_client, arxiv_client,
+                    emit=events.put_nowait, dispatcher=dispatcher, node_index=index, on_scored=on_scored
                 )
-                scored_papers = []
-                for result in arxiv_results:
-                    authors = [author.name for author in result.authors]
-                    score, explanation = await _calculate_relevance_score(
-                        title=result.title,
-                        authors=authors,
-                        abstract=result.summary or "",
-                        original_query=request.natural_language_query,
-                        client=llm_client
-                    )
-                    scored_paper = {
-                        'title': result.title,
-                        'authors': authors,
-                        'abstract': result.summary or "",
-                        'published_date': result.published.isoformat() if hasattr(result.published, 'isoformat') else str(result.published),
-                        'url': result.pdf_url,
-                        'categories': result.categories,
-                        'arxiv_id': result.entry_id.split('/')[-1],
-                        'relevance_score': score,
-                        'relevance_explanation': explanation
-                    }
-                    scored_papers.append(scored_paper)
-                scored_papers.sort(key=lambda x: x['relevance_score'], reverse=True)
-                # クエリごとの論文リストを送信
-                yield f"data: {json.dumps({'type': 'papers', 'query': query_text, 'description': description, 'papers': scored_papers})}\n\n"
-                await asyncio.sleep(0.05)
-            except Exception as e:
-                # エラー時も空リストで送信
-                yield f"data: {json.dumps({'type': 'papers', 'query': query_text, 'description': description, 'papers': [], 'error': str(e)})}\n\n"
-                await asyncio.sleep(0.05)
-
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+                for index, (query_text, description) in enumerate(query_plans)
+            ))
+            work.add_done_callback(lambda _: events.put_nowait(finished))
+
+            try:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(events.get(), timeout=SSE_HEARTBEAT_INTERVAL_S)
+                    except asyncio.TimeoutError:
+                        yield ": heartbeat\n\n"
+                        continue
+                    if event is finished:
+                        break
+                    yield sse(event)
+
+                    now = time.monotonic()
+                    if top_k_changed and now - last_snapshot >= TOP_K_SNAPSHOT_INTERVAL_S:
+                        yield sse({'type': 'top_k', 'papers': top_k.snapshot()})
+                        top_k_changed, last_snapshot = False, now
+
+                query_nodes = work.result()
+                yield sse({'type': 'top_k', 'papers': top_k.snapshot()})
+                yield sse({
+                    'type': 'done',
+                    'total_papers': sum(node.paper_count for node in query_nodes),
+                    'total_unique_papers': _deduplicate_papers(query_nodes),
+                    'unscored_papers': sum(not paper.scored for node in query_nodes for paper in node.papers),
+                    'stop_reason': dispatcher.stop_reason,
+                })
+            finally:
+                work.cancel()
+
+    # 同一パラメータで実行中のパイプラインがあれば、それに相乗りしてイベントを受け取る
+    key = _stream_key(request, llm_client, response_format)
+    ticket = await _admit() if pipeline_hub.get(key) is None else None
+    started = False
+
+    def start_pipeline():
+        nonlocal started
+        started = True
+        return _release_when_done(event_stream(), ticket) if ticket is not None else event_stream()
+
+    async def admitted_stream():
+        try:
+            async for chunk in pipeline_hub.subscribe(key, start_pipeline, last_event_id=last_event_id):
+                if ticket is not None and not started:
+                    ticket.release()  # 実行中のパイプラインへの合流・ログからの再送だけなら実行枠は不要
+                yield chunk
+        finally:
+            if ticket is not None and not started:
+                ticket.release()
+
+    return StreamingResponse(admitted_stream(), media_type="text/event-stream")
 
 # === Optional: 統計情報取得エンドポイント ===
 @router.get("/research-stats", summary="Get research statistics")
@@ -0,0 +1,204 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+import arxiv
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
+
+from backend.api.arxiv_client import ArxivAPIClient, get_arxiv_client, search_options
+from backend.api.endpoints.research_tree import (
+    ResearchTreeRequest,
+    ScoredPaper,
+    SearchTreeResponse,
+    QueryNode,
+    SCORE_TIMEOUT_EXPLANATION,
+    SCORE_ERROR_EXPLANATION,
+    _score_paper,
+    _admit,
+    _deduplicate_papers,
+    research_tree_search,
+)
+from backend.app.clients.gemini_client import GeminiClient # For type hinting
+from backend.app.clients.ollama_client import OllamaClient # For type hinting
+from backend.app.dependencies import get_llm_client
+from backend.app.fair_scheduler import flow_scope
+from backend.core import deadline
+from backend.core.config import SAVED_TREE_REFRESH_OVERLAP_S
+from backend.core.database import get_db
+from backend.crud import saved_trees as crud
+from backend.models.saved_tree import SavedResearchTree, SavedResearchTreeNode
+from backend.schemas.arxiv_schema import canonical_arxiv_id
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# === Input / Output Models ===
+class RefreshRequest(BaseModel):
+    # クエリごとに取得する新着論文の上限（デフォルト: 保存時の max_results_per_query）
+    max_results_per_query: Optional[int] = Field(None, gt=0)
+
+class SavedTreeResponse(SearchTreeResponse):
+    tree_id: str
+    watermark: datetime  # 次回の差分更新はこの時刻以降に投稿された論文が対象（UTC）
+    refresh_count: int
+    new_papers: int = 0  # 今回の差分更新で追加された論文数
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _tree_response(tree: SavedResearchTree, new_papers: int = 0) -> SavedTreeResponse:
+    query_nodes = [
+        QueryNode(query=node.query, description=node.description, papers=node.papers, paper_count=len(node.papers))
+        for node in tree.nodes
+    ]
+    return SavedTreeResponse(
+        tree_id=tree.id,
+        original_query=tree.request["natural_language_query"],
+        research_goal=tree.research_goal,
+        query_nodes=query_nodes,
+        total_papers=sum(node.paper_count for node in query_nodes),
+        total_unique_papers=_deduplicate_papers(query_nodes),
+        watermark=tree.watermark,
+        refresh_count=tree.refresh_count,
+        new_papers=new_papers,
+    )
+
+async def _get_tree_or_404(db: AsyncSession, tree_id: str) -> SavedResearchTree:
+    tree = await crud.get_tree(db, tree_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail=f"Saved research tree '{tree_id}' not found")
+    return tree
+
+def _is_settled(paper: Dict[str, Any]) -> bool:
+    """スコアが確定した論文か（未評価・スコア計算失敗の論文は次回の更新で再評価する）"""
+    return paper.get("scored", True) and paper["relevance_explanation"] not in (SCORE_TIMEOUT_EXPLANATION, SCORE_ERROR_EXPLANATION)
+
+def _pending_paper(paper: Dict[str, Any]) -> ScoredPaper:
+    """保存済みの未確定論文をスコア前の論文レコードに戻す"""
+    return ScoredPaper(
+        title=paper["title"],
+        authors=paper["authors"],
+        abstract=paper["abstract"],
+        published_date=datetime.fromisoformat(paper["published_date"]),
+        url=paper["url"],
+        categories=paper["categories"],
+        arxiv_id=paper["arxiv_id"],
+        relevance_score=0.0,
+        relevance_explanation="",
+        scored=False
+    )
+
+async def _fetch_new_papers(
+    node: SavedResearchTreeNode,
+    request: ResearchTreeRequest,
+    since: datetime,
+    max_results: int,
+    llm_client: Union[GeminiClient, OllamaClient],
+    arxiv_client: ArxivAPIClient
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    ノードの保存済みクエリ（リクエストのカテゴリ・日付フィルタ付き）で since 以降に投稿された論文を新しい順に取得し、未評価の論文だけをスコアリングする。
+    前回までにスコアが確定しなかった保存済みの論文（arxiv_ids に含まれない論文）も再評価する
+    Returns: (スコアが確定した論文, 新着論文を取りこぼしなく処理できたか)
+    """
+    try:
+        results = await arxiv_client.search_papers(
+            keyword=node.query,
+            max_results=max_results,
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+            submitted_after=since,
+            **search_options(request, sort=False)
+        )
+        searched = True
+    except Exception as e:
+        logger.error(f"Error refreshing query '{node.query}': {e}")
+        results, searched = [], False
+
+    # 以前のバージョンで保存されたIDはバージョン付きの場合がある
+    seen = {canonical_arxiv_id(arxiv_id) for arxiv_id in node.arxiv_ids}
+    pending = [_pending_paper(paper) for paper in node.papers if canonical_arxiv_id(paper["arxiv_id"]) not in seen]
+    pending_ids = {paper.arxiv_id for paper in pending}
+    seen |= pending_ids
+    unseen = [paper for paper in map(ScoredPaper.from_arxiv, results) if paper.arxiv_id not in seen]
+    scored = await asyncio.gather(*(_score_paper(paper, request.natural_language_query, llm_client) for paper in pending + unseen))
+
+    # スコア計算に失敗した論文は保存せず（保存済みの論文は未確定のまま残し）、次回の更新で再評価する
+    settled = [paper for paper in map(ScoredPaper.to_dict, scored) if _is_settled(paper)]
+    new_settled = sum(paper["arxiv_id"] not in pending_ids for paper in settled)
+    complete = searched and new_settled == len(unseen) and len(results) < max_results
+    return settled, complete
+
+# === Endpoints ===
+@router.post("/research-trees", response_model=SavedTreeResponse, summary="Run a research tree search and save it for incremental refresh")
+async def create_saved_tree(
+    request: ResearchTreeRequest,
+    db: AsyncSession = Depends(get_db),
+    llm_client: Union[GeminiClient, OllamaClient] = Depends(get_llm_client),
+    arxiv_client: ArxivAPIClient = Depends(get_arxiv_client)
+):
+    """リサーチツリーを生成し、研究計画とノードごとの論文を保存する（実行枠がなければ Retry-After 付きの 429）"""
+    run_started = _utcnow()
+    ticket = await _admit()
+    try:
+        response = await research_tree_search(request, llm_client, arxiv_client)
+    finally:
+        ticket.release()
+    tree = await crud.create_tree(
+        db,
+        request=request.model_dump(),
+        research_goal=response.research_goal,
+        nodes=[node.model_dump(mode="json") for node in response.query_nodes],
+        watermark=run_started,
+        is_settled=_is_settled,
+    )
+    return _tree_response(tree)
+
+@router.get("/research-trees/{tree_id}", response_model=SavedTreeResponse, summary="Get a saved research tree")
+async def get_saved_tree(tree_id: str, db: AsyncSession = Depends(get_db)):
+    return _tree_response(await _get_tree_or_404(db, tree_id))
+
+@router.post("/research-trees/{tree_id}/refresh", response_model=SavedTreeResponse, summary="Add papers submitted since the last run")
+async def refresh_saved_tree(
+    tree_id: str,
+    refresh: Optional[RefreshRequest] = None,
+    db: AsyncSession = Depends(get_db),
+    llm_client: Union[GeminiClient, OllamaClient] = Depends(get_llm_client),
+    arxiv_client: ArxivAPIClient = Depends(get_arxiv_client)
+):
+    """
+    保存済みツリーの差分更新
+
+    - 保存済みの研究計画（クエリ）を再利用し、LLMによる計画生成は行わない
+    - 各クエリで投稿日順にarXivを検索し、前回実行時刻（watermark）まで遡る
+    - 未評価の論文だけをスコアリングし、保存済みランキングにマージする
+    - 全ノードを取りこぼしなく処理できた場合のみ watermark を進める
+    - 通常の検索と同じ実行枠を使い、空きがなければ Retry-After 付きの 429 を返す
+    """
+    tree = await _get_tree_or_404(db, tree_id)
+    request = ResearchTreeRequest(**tree.request)
+    max_results = (refresh.max_results_per_query if refresh and refresh.max_results_per_query else request.max_results_per_query)
+    run_started = _utcnow()
+    since = tree.watermark - timedelta(seconds=SAVED_TREE_REFRESH_OVERLAP_S)
+
+    ticket = await _admit()
+    try:
+        with deadline.deadline_scope(request.time_budget_ms), flow_scope("interactive"):
+            results = await asyncio.gather(*(
+                _fetch_new_papers(node, request, since, max_results, llm_client, arxiv_client)
+                for node in tree.nodes
+            ))
+    finally:
+        ticket.release()
+
+    new_papers = {node.position: papers for node, (papers, _) in zip(tree.nodes, results)}
+    complete = all(node_complete for _, node_complete in results)
+    # 再評価した保存済みの論文は新着に数えない
+    new_count = sum(
+        len({paper["arxiv_id"] for paper in new_papers[node.position]} - {paper["arxiv_id"] for paper in node.papers})
+        for node in tree.nodes
+    )
+    tree = await crud.merge_new_papers(db, tree, new_papers, watermark=run_started if complete else tree.watermark)
+    logger.info(f"Refreshed saved tree {tree_id}: {new_count} new papers")
+    return _tree_response(tree, new_papers=new_count)
@@ -0,0 +1,131 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from backend.core.config import PIPELINE_MAX_CONCURRENCY, PIPELINE_MAX_QUEUE, PIPELINE_QUEUE_TIMEOUT_MS
+from backend.core.metrics import counter, latency_tracker
+
+
+class AdmissionRejected(Exception):
+    """Raised when a pipeline cannot be admitted; `retry_after_s` is a suggested back-off."""
+
+    def __init__(self, reason: str, retry_after_s: int):
+        super().__init__(f"Pipeline not admitted: {reason}")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionTicket:
+    """A granted pipeline slot. Releasing it more than once has no effect."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._granted_at = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.monotonic() - self._granted_at)
+
+
+class AdmissionController:
+    """
+    Limits how many research tree pipelines run at once.
+
+    Up to `max_concurrent` pipelines run; up to `max_queue` further requests wait in FIFO
+    order for a slot. A request that finds the queue full, or that is still waiting after
+    `queue_timeout_s`, is rejected right away instead of adding to the backlog, so admitted
+    requests keep a stable latency during traffic spikes.
+
+    Queue wait times and pipeline durations are recorded in the latency trackers
+    "admission.queue_wait" and "admission.pipeline_duration"; the latter is used to suggest
+    a Retry-After to rejected clients.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout_s: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._queue_wait = latency_tracker("admission.queue_wait")
+        self._duration = latency_tracker("admission.pipeline_duration")
+
+    async def acquire(self) -> AdmissionTicket:
+        """
+        Waits for a pipeline slot.
+
+        Raises:
+            AdmissionRejected: If the queue is full or no slot frees up within the queue timeout.
+        """
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._queue_wait.observe(0.0)
+            counter("admission.admitted").increment()
+            return AdmissionTicket(self)
+
+        if len(self._waiters) >= self.max_queue:
+            counter("admission.rejected_queue_full").increment()
+            raise AdmissionRejected("queue full", self.retry_after_s())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            counter("admission.rejected_timeout").increment()
+            raise AdmissionRejected("queue timeout", self.retry_after_s())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just before the cancellation arrived; give it back.
+                self._release(0.0)
+            else:
+                self._discard(waiter)
+            raise
+        self._queue_wait.observe(time.monotonic() - started)
+        counter("admission.admitted").increment()
+        return AdmissionTicket(self)
+
+    def retry_after_s(self) -> int:
+        """Rough time until a slot frees up for a new request, from recent pipeline durations."""
+        typical = self._duration.percentile(0.5) or self.queue_timeout_s
+        estimate = typical * (len(self._waiters) + 1) / max(1, self.max_concurrent)
+        return max(1, min(300, math.ceil(estimate)))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_wait_p95_s": self._queue_wait.percentile(0.95),
+        }
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self, duration_s: float) -> None:
+        if duration_s > 0:
+            self._duration.observe(duration_s)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # The slot passes straight to the next waiter.
+                return
+        self._active -= 1
+
+
+admission_controller = AdmissionController(
+    max_concurrent=PIPELINE_MAX_CONCURRENCY,
+    max_queue=PIPELINE_MAX_QUEUE,
+    queue_timeout_s=PIPELINE_QUEUE_TIMEOUT_MS / 1000.0,
+)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.paper_index import PaperIndex, paper_index
+from backend.app.tiered_cache import WORKER_ID, TieredCache, arxiv_search_cache, llm_response_cache, score_cache
+from backend.core.config import CACHE_COHERENCE_INTERVAL_S, CACHE_INVALIDATION_RETENTION_S
+from backend.core.database import SessionLocal
+from backend.core.metrics import counter
+from backend.crud import cache_leases as crud
+from backend.crud.papers import PAPERS_NAMESPACE
+
+logger = logging.getLogger(__name__)
+
+
+class CacheCoherence:
+    """
+    Background task that keeps the memory tiers of this worker's TieredCaches coherent
+    with writes made by other uvicorn workers.
+
+    Every `interval_s` seconds it reads the invalidation log written by TieredCache.put and
+    TieredCache.invalidate and drops the keys written by other workers from the memory
+    tier, so the next lookup reads the new value from SQLite. Papers other workers wrote
+    to the paper cache are re-read into `paper_index`. It also trims log entries older
+    than `retention_s` and deletes expired leases of crashed workers.
+    """
+
+    def __init__(
+        self,
+        caches: List[TieredCache],
+        interval_s: float = CACHE_COHERENCE_INTERVAL_S,
+        retention_s: float = CACHE_INVALIDATION_RETENTION_S,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+        paper_index: Optional[PaperIndex] = None,
+        worker_id: str = WORKER_ID,
+    ):
+        self.caches: Dict[str, TieredCache] = {cache.namespace: cache for cache in caches}
+        self.paper_index = paper_index
+        self.worker_id = worker_id
+        self.interval_s = interval_s
+        self.retention_s = retention_s
+        self._session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._last_id: Optional[int] = None
+
+    async def start(self) -> None:
+        if self._task is not None or self.interval_s <= 0:
+            return
+        # Memory tiers start empty, so earlier writes are irrelevant.
+        async with self._session_factory() as db:
+            self._last_id = await crud.last_invalidation_id(db)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Cache coherence check failed: {e}")
+
+    async def run_once(self) -> int:
+        """Applies the invalidations logged by other workers since the last run; returns how many."""
+        applied = 0
+        papers: List[str] = []
+        async with self._session_factory() as db:
+            if self._last_id is None:
+                self._last_id = await crud.last_invalidation_id(db)
+            while True:
+                rows = await crud.invalidations_since(db, self._last_id)
+                for _, namespace, key, origin in rows:
+                    if namespace == PAPERS_NAMESPACE:
+                        if origin != self.worker_id:
+                            papers.append(key)
+                        continue
+                    cache = self.caches.get(namespace)
+                    if cache is not None and origin != cache.worker_id:
+                        cache.invalidate_local(key)
+                        counter(f"cache.{namespace}.remote_invalidations").increment()
+                        applied += 1
+                if not rows:
+                    break
+                self._last_id = rows[-1][0]
+            await crud.delete_invalidations_before(db, self.retention_s)
+            await crud.delete_expired_leases(db)
+        if papers and self.paper_index is not None:
+            applied += await self.paper_index.refresh(papers)
+        return applied
+
+    def stats(self) -> Dict[str, Any]:
+        return {"worker_id": WORKER_ID, "last_invalidation_id": self._last_id}
+
+
+cache_coherence = CacheCoherence(caches=[arxiv_search_cache, score_cache, llm_response_cache], paper_index=paper_index)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from backend.core.config import (
+    ARXIV_SEARCH_CACHE_MAX_ROWS,
+    CACHE_ANALYZE_INTERVAL_S,
+    CACHE_JANITOR_INTERVAL_S,
+    CACHE_VACUUM_MAX_PAGES,
+    LLM_RESPONSE_CACHE_MAX_BYTES,
+    PAPER_CACHE_EVICTION,
+    PAPER_CACHE_MAX_BYTES,
+    PAPER_CACHE_MAX_ROWS,
+    RESEARCH_TREE_CACHE_EVICTION,
+    RESEARCH_TREE_CACHE_MAX_BYTES,
+    RESEARCH_TREE_CACHE_MAX_ROWS,
+    SCORE_CACHE_MAX_ROWS,
+)
+from backend.core.database import SessionLocal, engine as default_engine
+from backend.core.metrics import counter
+from backend.crud import cache_maintenance as crud
+
+logger = logging.getLogger(__name__)
+
+_INCREMENTAL_AUTO_VACUUM = 2
+
+
+class CacheJanitor:
+    """
+    Background task that keeps the SQLite cache bounded and compact.
+
+    Every `interval_s` seconds it enforces the row and byte budget of each cache table by
+    evicting rows in the table's LRU/LFU order, then returns up to `vacuum_max_pages`
+    free pages to the file system with an incremental vacuum. Every `analyze_interval_s`
+    seconds it refreshes the query planner statistics with ANALYZE.
+
+    Incremental vacuum needs auto_vacuum=INCREMENTAL, which new databases get from the
+    connection profile. A database created before that is converted once with a full
+    VACUUM on the first run.
+    """
+
+    def __init__(
+        self,
+        tables: List[crud.CacheTable],
+        interval_s: float = CACHE_JANITOR_INTERVAL_S,
+        vacuum_max_pages: int = CACHE_VACUUM_MAX_PAGES,
+        analyze_interval_s: float = CACHE_ANALYZE_INTERVAL_S,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+        engine: AsyncEngine = default_engine,
+    ):
+        self.tables = tables
+        self.interval_s = interval_s
+        self.vacuum_max_pages = vacuum_max_pages
+        self.analyze_interval_s = analyze_interval_s
+        self._session_factory = session_factory
+        self._engine = engine
+        self._task: Optional[asyncio.Task] = None
+        self._last_analyze: Optional[float] = None
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._database: Dict[str, int] = {}
+
+    def start(self) -> None:
+        if self._task is None and self.interval_s > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size of each cache table and of the database file as of the last run."""
+        return {
+            "tables": {
+                table.name: {
+                    **self._usage.get(table.name, {}),
+                    "max_rows": table.max_rows,
+                    "max_bytes": table.max_bytes,
+                    "policy": table.policy,
+                }
+                for table in self.tables
+            },
+            "database": self._database,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Cache maintenance failed: {e}")
+            await asyncio.sleep(self.interval_s)
+
+    async def run_once(self) -> None:
+        for table in self.tables:
+            async with self._session_factory() as db:
+                result = await crud.enforce_budget(db, table)
+            counter(f"cache.{table.name}.purged").increment(result.purged)
+            counter(f"cache.{table.name}.evicted").increment(result.evicted)
+            counter(f"cache.{table.name}.evicted_bytes").increment(result.evicted_bytes)
+            self._usage[table.name] = {"rows": result.rows, "bytes": result.bytes}
+            if result.evicted:
+                logger.info(f"Evicted {result.evicted} rows ({result.evicted_bytes} bytes) from the {table.name} cache")
+        await self._compact()
+
+    async def _compact(self) -> None:
+        # VACUUM cannot run inside a transaction.
+        async with self._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            mode = (await conn.exec_driver_sql("PRAGMA auto_vacuum")).scalar()
+            if mode != _INCREMENTAL_AUTO_VACUUM:
+                logger.info("Converting the cache database to incremental auto-vacuum")
+                await conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+                await conn.exec_driver_sql("VACUUM")
+                counter("cache.full_vacuums").increment()
+            else:
+                pages = self.vacuum_max_pages if self.vacuum_max_pages > 0 else ""
+                await conn.exec_driver_sql(f"PRAGMA incremental_vacuum({pages})")
+            now = time.monotonic()
+            if self._last_analyze is None or now - self._last_analyze >= self.analyze_interval_s:
+                await conn.exec_driver_sql("ANALYZE")
+                self._last_analyze = now
+                counter("cache.analyze_runs").increment()
+            self._database = await crud.database_stats(conn)
+
+
+cache_janitor = CacheJanitor(tables=[
+    crud.paper_cache_table(PAPER_CACHE_MAX_ROWS, PAPER_CACHE_MAX_BYTES, PAPER_CACHE_EVICTION),
+    crud.research_tree_cache_table(RESEARCH_TREE_CACHE_MAX_ROWS, RESEARCH_TREE_CACHE_MAX_BYTES, RESEARCH_TREE_CACHE_EVICTION),
+    crud.tiered_cache_table("arxiv_searches", max_rows=ARXIV_SEARCH_CACHE_MAX_ROWS, max_bytes=0),
+    crud.tiered_cache_table("scores", max_rows=SCORE_CACHE_MAX_ROWS, max_bytes=0),
+    crud.tiered_cache_table("llm_responses", max_rows=0, max_bytes=LLM_RESPONSE_CACHE_MAX_BYTES),
+])
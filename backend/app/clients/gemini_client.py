@@ -16,13 +16,16 @@ class GeminiClient:
             raise ValueError("Gemini API key must be provided.")
         genai.configure(api_key=api_key)
 
-    def generate_text(self, prompt: str, model: Optional[str] = None) -> str:
+    def generate_text(self, prompt: str, model: Optional[str] = None, timeout: Optional[float] = None) -> str:
         default_model_name = 'gemini-2.5-flash-preview-05-20'
         effective_model_name = model if model else default_model_name
 
         generative_model = genai.GenerativeModel(effective_model_name)
         try:
-            response = generative_model.generate_content(prompt)
+            if timeout is not None:
+                response = generative_model.generate_content(prompt, request_options={"timeout": timeout})
+            else:
+                response = generative_model.generate_content(prompt)
             # Ensure response.text is accessible and not None
             if hasattr(response, 'text') and response.text:
                 return response.text
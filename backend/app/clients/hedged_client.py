@@ -0,0 +1,89 @@
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+from backend.core.metrics import LatencyTracker, latency_tracker
+
+# Shared by all hedged clients; generate_text itself already runs in a worker thread,
+# so this pool only holds the (at most two) in-flight provider calls per request.
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+class HedgedLLMClient:
+    """
+    Wraps a primary LLM client and sends a duplicate (hedged) request to a second
+    client or model when the primary is slower than its observed latency percentile.
+
+    The first non-empty answer wins; the slower call is left to finish in the background
+    and its result is discarded. Until `min_samples` primary latencies have been observed
+    no hedging takes place.
+    """
+
+    def __init__(
+        self,
+        primary: Any,
+        hedge: Any,
+        hedge_model: Optional[str] = None,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        tracker: Optional[LatencyTracker] = None,
+    ):
+        self.primary = primary
+        self.hedge = hedge
+        self.hedge_model = hedge_model
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.latency = tracker if tracker is not None else latency_tracker("llm.primary")
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Returns how long to wait for the primary before hedging, or None to never hedge."""
+        if self.latency.count < self.min_samples:
+            return None
+        return self.latency.percentile(self.quantile)
+
+    @staticmethod
+    def _call(client: Any, prompt: str, model: Optional[str], timeout: Optional[float]) -> str:
+        kwargs: Dict[str, Any] = {}
+        if model:
+            kwargs["model"] = model
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        return client.generate_text(prompt, **kwargs)
+
+    def _call_primary(self, prompt: str, model: Optional[str], timeout: Optional[float]) -> str:
+        started = time.monotonic()
+        try:
+            return self._call(self.primary, prompt, model, timeout)
+        finally:
+            self.latency.observe(time.monotonic() - started)
+
+    def generate_text(self, prompt: str, model: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        delay = self._hedge_delay()
+        if delay is None:
+            return self._call_primary(prompt, model, timeout)
+
+        started = time.monotonic()
+        primary_future = _executor.submit(self._call_primary, prompt, model, timeout)
+        first_wait = delay if timeout is None else min(delay, timeout)
+        done, _ = wait([primary_future], timeout=first_wait)
+        if done and primary_future.exception() is None and primary_future.result():
+            return primary_future.result()
+
+        hedge_timeout = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+        hedge_future = _executor.submit(self._call, self.hedge, prompt, self.hedge_model, hedge_timeout)
+        pending = {hedge_future} if done else {primary_future, hedge_future}
+        while pending:
+            left = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+            done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Hedged LLM call failed: {e}", file=sys.stderr)
+                    continue
+                if result:
+                    return result
+        return ""
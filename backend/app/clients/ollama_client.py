@@ -1,5 +1,6 @@
 import sys
 import openai
+from typing import Optional
 
 class OllamaClient:
     def __init__(self, base_url: str, api_key: str):
@@ -19,24 +20,28 @@ class OllamaClient:
             api_key=api_key,
         )
 
-    def generate_text(self, prompt: str, model: str = "llama3") -> str:
+    def generate_text(self, prompt: str, model: str = "llama3", timeout: Optional[float] = None) -> str:
         """
         Generates text using the Ollama API.
 
         Args:
             prompt: The input prompt for the language model.
             model: The model to use for generation (e.g., "llama3").
+            timeout: Optional per-request timeout in seconds.
 
         Returns:
             The generated text as a string, or an empty string if an error occurs
             or the response is empty.
         """
         messages = [{"role": "user", "content": prompt}]
+        # Only pass the timeout when set so the client's own default applies otherwise.
+        request_options = {"timeout": timeout} if timeout is not None else {}
 
         try:
             response = self.client.chat.completions.create(
                 model=model,
                 messages=messages,
+                **request_options,
             )
             if response.choices and response.choices[0].message:
                 content = response.choices[0].message.content
@@ -0,0 +1,94 @@
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from backend.core.metrics import LatencyTracker, latency_tracker
+
+# Stages without their own chain fall back to this one.
+DEFAULT_STAGE = "plan"
+
+
+@dataclass
+class RouteTarget:
+    """One provider/model entry of a stage's fallback chain."""
+    provider: str
+    client: Any
+    model: Optional[str] = None
+    slo_ms: Optional[float] = None
+    min_samples: int = 20
+    # Latencies older than this stop counting, so a demoted target recovers.
+    latency_max_age_s: Optional[float] = 300.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}:{self.model or 'default'}"
+
+    @property
+    def latency(self) -> LatencyTracker:
+        return latency_tracker(f"llm.{self.name}", max_age_s=self.latency_max_age_s)
+
+    def within_slo(self) -> bool:
+        """True unless enough recent calls have been observed and their p95 exceeds the SLO."""
+        if self.slo_ms is None or self.latency.count < self.min_samples:
+            return True
+        return self.latency.percentile(0.95) * 1000.0 <= self.slo_ms
+
+
+class RoutedLLMClient:
+    """
+    LLM client that picks the provider and model per pipeline stage.
+
+    Each stage maps to an ordered fallback chain of RouteTargets. Targets whose observed
+    p95 latency is within their SLO are tried first, in configured order; the others are
+    kept as a last resort until their slow latencies age out. A target that returns an empty answer (the clients' error
+    signal) or times out falls through to the next one. Every target except the last is
+    given at most its SLO as timeout, so a slow model leaves time for its fallback.
+    """
+
+    def __init__(self, routes: Dict[str, List[RouteTarget]]):
+        if DEFAULT_STAGE not in routes:
+            raise ValueError(f"LLM routing table must define the '{DEFAULT_STAGE}' stage.")
+        self.routes = routes
+
+    def targets_for(self, stage: Optional[str]) -> List[RouteTarget]:
+        chain = self.routes.get(stage or DEFAULT_STAGE) or self.routes[DEFAULT_STAGE]
+        healthy = [target for target in chain if target.within_slo()]
+        degraded = [target for target in chain if not target.within_slo()]
+        return healthy + degraded
+
+    def generate_text(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        stage: Optional[str] = None,
+    ) -> str:
+        targets = self.targets_for(stage)
+        started = time.monotonic()
+        for index, target in enumerate(targets):
+            attempt_timeout = None if timeout is None else timeout - (time.monotonic() - started)
+            if attempt_timeout is not None and attempt_timeout <= 0:
+                break
+            is_last = index == len(targets) - 1
+            if target.slo_ms is not None and not is_last:
+                slo_s = target.slo_ms / 1000.0
+                attempt_timeout = slo_s if attempt_timeout is None else min(attempt_timeout, slo_s)
+
+            kwargs: Dict[str, Any] = {}
+            effective_model = model or target.model
+            if effective_model:
+                kwargs["model"] = effective_model
+            if attempt_timeout is not None:
+                kwargs["timeout"] = attempt_timeout
+
+            call_started = time.monotonic()
+            try:
+                result = target.client.generate_text(prompt, **kwargs)
+            except Exception as e:
+                print(f"LLM route {target.name} failed for stage '{stage}': {e}", file=sys.stderr)
+                result = ""
+            target.latency.observe(time.monotonic() - call_started)
+            if result:
+                return result
+        return ""
@@ -0,0 +1,66 @@
+import gzip
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: without it, only gzip is offered.
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the framing overhead is not worth it.
+MIN_COMPRESS_BYTES = 1024
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Content codings this server can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Picks the preferred available content coding allowed by an Accept-Encoding header.
+
+    Returns None if the client accepts none of them (or sent no header), in which case
+    the body is sent uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    candidates = [
+        coding for coding in available_encodings()
+        if qualities.get(coding, qualities.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda coding: qualities.get(coding, qualities.get("*", 0.0)))
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    raise ValueError(f"Unsupported content coding '{encoding}'.")
+
+
+def encode_body(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Compresses `body` for the client's Accept-Encoding if it is large enough.
+
+    Returns the (possibly compressed) body and the headers to add to the response.
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding is None:
+        return body, headers
+    headers["Content-Encoding"] = encoding
+    return compress(body, encoding), headers
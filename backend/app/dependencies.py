@@ -1,34 +1,38 @@
 import os
-from typing import Union, TypeVar
+from typing import Any, Dict, List, Union, TypeVar
 
 from backend.app.clients.gemini_client import GeminiClient
 from backend.app.clients.ollama_client import OllamaClient
-from backend.core.config import get_api_provider, GEMINI_API_KEY, OLLAMA_BASE_URL, OLLAMA_API_KEY
+from backend.app.clients.hedged_client import HedgedLLMClient
+from backend.app.clients.router import RoutedLLMClient, RouteTarget
+from backend.core.config import (
+    get_api_provider,
+    get_llm_routes,
+    GEMINI_API_KEY,
+    OLLAMA_BASE_URL,
+    OLLAMA_API_KEY,
+    LLM_HEDGE_PROVIDER,
+    LLM_HEDGE_MODEL,
+    LLM_HEDGE_QUANTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_ROUTE_LATENCY_MAX_AGE_S,
+)
 
 # For type hinting, we can define a type that represents either client.
 # A Protocol could be used for stricter interface checking, but Union is simpler for now.
-LLMClient = Union[GeminiClient, OllamaClient]
+LLMClient = Union[GeminiClient, OllamaClient, HedgedLLMClient, RoutedLLMClient]
 # Alternatively, using a TypeVar if we were to define a common base class or protocol later:
 # LLMClientType = TypeVar("LLMClientType", bound="BaseLLMClient")
 
 
-def get_llm_client() -> LLMClient:
+def _create_client(provider: str) -> Union[GeminiClient, OllamaClient]:
     """
-    Factory function to get an instance of an LLM client based on the API_PROVIDER setting.
-
-    Reads the API_PROVIDER from environment variables via `get_api_provider()`.
-    Initializes and returns either a GeminiClient or an OllamaClient configured
-    with settings from `backend.core.config`.
+    Creates a plain client for the given provider name ("gemini" or "ollama").
 
     Raises:
-        ValueError: If the API_PROVIDER is "gemini" and GEMINI_API_KEY is not set.
-        ValueError: If the API_PROVIDER is unknown (though `get_api_provider` has a default).
-
-    Returns:
-        LLMClient: An instance of GeminiClient or OllamaClient.
+        ValueError: If the provider is "gemini" and GEMINI_API_KEY is not set.
+        ValueError: If the provider is unknown.
     """
-    provider = get_api_provider()
-
     if provider == "gemini":
         if not GEMINI_API_KEY:
             raise ValueError(
@@ -44,6 +48,71 @@ def get_llm_client() -> LLMClient:
         # This case should ideally not be reached if get_api_provider() has a default.
         raise ValueError(f"Unknown API_PROVIDER: {provider}. Supported values are 'gemini' or 'ollama'.")
 
+
+def _create_routed_client(routes: Dict[str, List[Dict[str, Any]]]) -> RoutedLLMClient:
+    """
+    Builds a RoutedLLMClient from the routing table returned by `get_llm_routes()`.
+    One client is created per provider and shared by all stages that use it.
+    """
+    clients: Dict[str, Union[GeminiClient, OllamaClient]] = {}
+    stage_targets: Dict[str, List[RouteTarget]] = {}
+    for stage, targets in routes.items():
+        stage_targets[stage] = []
+        for target in targets:
+            provider = target["provider"]
+            if provider not in clients:
+                clients[provider] = _create_client(provider)
+            stage_targets[stage].append(RouteTarget(
+                provider=provider,
+                client=clients[provider],
+                model=target.get("model"),
+                slo_ms=target.get("slo_ms"),
+                latency_max_age_s=LLM_ROUTE_LATENCY_MAX_AGE_S,
+            ))
+    return RoutedLLMClient(stage_targets)
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Factory function to get an instance of an LLM client based on the API_PROVIDER setting.
+
+    Reads the API_PROVIDER from environment variables via `get_api_provider()`.
+    Initializes and returns either a GeminiClient or an OllamaClient configured
+    with settings from `backend.core.config`. When LLM_HEDGE_PROVIDER or LLM_HEDGE_MODEL
+    is configured, the client is wrapped in a HedgedLLMClient.
+
+    If a per-stage routing table is configured (LLM_ROUTES), a RoutedLLMClient is returned
+    instead and the hedging settings are ignored; the routing table's fallback chains take
+    over that role.
+
+    Raises:
+        ValueError: If the API_PROVIDER is "gemini" and GEMINI_API_KEY is not set.
+        ValueError: If the API_PROVIDER is unknown (though `get_api_provider` has a default).
+        ValueError: If LLM_ROUTES is invalid.
+
+    Returns:
+        LLMClient: An instance of GeminiClient, OllamaClient, HedgedLLMClient or RoutedLLMClient.
+    """
+    routes = get_llm_routes()
+    if routes is not None:
+        return _create_routed_client(routes)
+
+    provider = get_api_provider()
+    client = _create_client(provider)
+
+    if not (LLM_HEDGE_PROVIDER or LLM_HEDGE_MODEL):
+        return client
+
+    hedge_provider = LLM_HEDGE_PROVIDER.lower() if LLM_HEDGE_PROVIDER else provider
+    hedge_client = client if hedge_provider == provider else _create_client(hedge_provider)
+    return HedgedLLMClient(
+        primary=client,
+        hedge=hedge_client,
+        hedge_model=LLM_HEDGE_MODEL,
+        quantile=LLM_HEDGE_QUANTILE,
+        min_samples=LLM_HEDGE_MIN_SAMPLES,
+    )
+
 if __name__ == '__main__':
     # Example of how to use the factory.
     # This requires environment variables to be set appropriately.
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import io
+import sys
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Tuple
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: without it, only NDJSON exports are available.
+    pyarrow = None
+
+from backend.core.config import EXPORT_BATCH_SIZE
+from backend.core.database import SessionLocal, create_db_and_tables, engine
+from backend.core.metrics import counter
+from backend.crud import papers as papers_crud
+from backend.crud import research_jobs as jobs_crud
+from backend.crud import saved_trees as trees_crud
+
+ExportDataset = Literal["papers", "trees", "scores"]
+ExportFormat = Literal["ndjson", "parquet"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+# Columns holding arbitrary JSON, which Parquet stores as JSON strings.
+_JSON_COLUMNS = {"trees": ("request",)}
+
+Batch = List[Dict[str, Any]]
+
+
+def available_formats() -> Tuple[str, ...]:
+    return ("ndjson", "parquet") if pyarrow is not None else ("ndjson",)
+
+
+def check_format(name: str) -> None:
+    if name not in ("ndjson", "parquet"):
+        raise ValueError(f"Unknown export format '{name}'. Supported: ndjson, parquet.")
+    if name not in available_formats():
+        raise ValueError("Parquet exports need the 'pyarrow' package.")
+
+
+async def _papers(db: AsyncSession, batch_size: int) -> AsyncIterator[Batch]:
+    async for batch in papers_crud.stream_papers(db, batch_size):
+        yield batch
+
+
+async def _trees(db: AsyncSession, batch_size: int) -> AsyncIterator[Batch]:
+    # Saved trees first, then research jobs (whose trees may be incomplete, see status).
+    async for partition in trees_crud.stream_trees(db, batch_size):
+        yield [
+            {
+                "tree_id": tree_id, "source": "saved_tree", "status": None,
+                "natural_language_query": request.get("natural_language_query"), "research_goal": research_goal,
+                "request": request, "refresh_count": refresh_count, "created_at": created_at, "updated_at": updated_at,
+            }
+            for tree_id, request, research_goal, refresh_count, created_at, updated_at in partition
+        ]
+    async for partition in jobs_crud.stream_jobs(db, batch_size):
+        yield [
+            {
+                "tree_id": job_id, "source": "research_job", "status": status,
+                "natural_language_query": request.get("natural_language_query"), "research_goal": research_goal,
+                "request": request, "refresh_count": None, "created_at": created_at, "updated_at": finished_at,
+            }
+            for job_id, status, request, research_goal, created_at, finished_at in partition
+        ]
+
+
+def _score_rows(source: str, partition) -> Batch:
+    return [
+        {
+            "tree_id": tree_id, "source": source, "node_position": position, "query": query, "rank": rank,
+            "arxiv_id": paper["arxiv_id"], "title": paper["title"],
+            "relevance_score": paper["relevance_score"], "relevance_explanation": paper["relevance_explanation"],
+            "scored": paper.get("scored", True), "duplicate_of": paper.get("duplicate_of"),
+        }
+        for tree_id, position, query, papers in partition
+        for rank, paper in enumerate(papers, start=1)
+    ]
+
+
+async def _scores(db: AsyncSession, batch_size: int) -> AsyncIterator[Batch]:
+    # Nodes hold a few dozen papers each, so fewer of them are fetched at a time.
+    node_batch_size = max(1, batch_size // 20)
+    async for partition in trees_crud.stream_nodes(db, node_batch_size):
+        yield _score_rows("saved_tree", partition)
+    async for partition in jobs_crud.stream_nodes(db, node_batch_size):
+        yield _score_rows("research_job", partition)
+
+
+_DATASETS: Dict[str, Callable[[AsyncSession, int], AsyncIterator[Batch]]] = {
+    "papers": _papers,
+    "trees": _trees,
+    "scores": _scores,
+}
+
+
+def _arrow_schema(dataset: str):
+    string, timestamp = pyarrow.string(), pyarrow.timestamp("us")
+    columns = {
+        "papers": [
+            ("arxiv_id", string), ("title", string), ("authors", pyarrow.list_(string)), ("abstract", string),
+            ("published_date", timestamp), ("updated_date", timestamp), ("url", string),
+            ("categories", pyarrow.list_(string)), ("primary_category", string),
+        ],
+        "trees": [
+            ("tree_id", string), ("source", string), ("status", string), ("natural_language_query", string),
+            ("research_goal", string), ("request", string), ("refresh_count", pyarrow.int64()),
+            ("created_at", timestamp), ("updated_at", timestamp),
+        ],
+        "scores": [
+            ("tree_id", string), ("source", string), ("node_position", pyarrow.int64()), ("query", string),
+            ("rank", pyarrow.int64()), ("arxiv_id", string), ("title", string), ("relevance_score", pyarrow.float64()),
+            ("relevance_explanation", string), ("scored", pyarrow.bool_()), ("duplicate_of", string),
+        ],
+    }
+    return pyarrow.schema(columns[dataset])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file for ParquetWriter whose bytes are taken out after every row group."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _ndjson(dataset: str, batches: AsyncIterator[Batch]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        if batch:
+            yield b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in batch)
+
+
+async def _parquet(dataset: str, batches: AsyncIterator[Batch]) -> AsyncIterator[bytes]:
+    schema = _arrow_schema(dataset)
+    json_columns = _JSON_COLUMNS.get(dataset, ())
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    try:
+        async for batch in batches:
+            if not batch:
+                continue
+            for row in batch:
+                for column in json_columns:
+                    row[column] = orjson.dumps(row[column]).decode()
+            # One row group per batch, so the bytes written so far can be sent right away.
+            writer.write_batch(pyarrow.RecordBatch.from_pylist(batch, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+async def export(
+    dataset: str,
+    file_format: str = "ndjson",
+    session_factory: Callable[[], AsyncSession] = SessionLocal,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Streams a dataset as NDJSON lines or as a Parquet file, in chunks of bytes:
+
+    - "papers": the paper cache (one row per paper)
+    - "trees": the saved research trees and the research jobs (one row per tree)
+    - "scores": the scored papers of their query nodes (one row per paper and node)
+
+    Rows are read with server-side cursors `batch_size` at a time and encoded batch by
+    batch, so memory use does not grow with the size of the export. Abstracts are read
+    with the loaded compression dictionaries.
+    """
+    check_format(file_format)
+    encode = _parquet if file_format == "parquet" else _ndjson
+    async with session_factory() as db:
+        async for chunk in encode(dataset, _DATASETS[dataset](db, batch_size)):
+            yield chunk
+    counter(f"exports.{dataset}.{file_format}").increment()
+
+
+async def _export_to(path: str, dataset: str, file_format: str, batch_size: int) -> None:
+    # Same startup as the server: databases of earlier versions are migrated first.
+    await create_db_and_tables()
+    async with SessionLocal() as db:
+        await papers_crud.load_compression_dictionaries(db)
+    output = sys.stdout.buffer if path == "-" else open(path, "wb")
+    try:
+        async for chunk in export(dataset, file_format, batch_size=batch_size):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export the paper cache, stored research trees or their scores as NDJSON or Parquet. "
+                    "Run from the directory of tre_cache.db, e.g. python -m backend.app.exports scores -f parquet -o scores.parquet"
+    )
+    parser.add_argument("dataset", choices=list(_DATASETS))
+    parser.add_argument("-f", "--format", choices=["ndjson", "parquet"], default="ndjson")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: standard output)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    try:
+        check_format(args.format)
+    except ValueError as e:
+        parser.error(str(e))
+    asyncio.run(_export_to(args.output, args.dataset, args.format, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
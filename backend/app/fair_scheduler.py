@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import itertools
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional, Set
+
+from backend.core.config import LLM_MAX_CONCURRENCY, LLM_MAX_IN_FLIGHT_PER_REQUEST
+
+# Relative share of LLM capacity per priority class when flows compete.
+PRIORITY_WEIGHTS: Dict[str, float] = {
+    "interactive": 4.0,
+    "background": 1.0,
+}
+
+
+class Flow:
+    """The LLM work of one pipeline run (usually one HTTP request or background job)."""
+
+    _sequence = itertools.count()
+
+    def __init__(self, flow_id: Optional[str] = None, priority: str = "interactive"):
+        if priority not in PRIORITY_WEIGHTS:
+            raise ValueError(f"Unknown priority class '{priority}'. Supported: {', '.join(PRIORITY_WEIGHTS)}.")
+        self.flow_id = flow_id or uuid.uuid4().hex
+        self.priority = priority
+        self.weight = PRIORITY_WEIGHTS[priority]
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.order = next(self._sequence)
+
+    def __repr__(self):
+        return f"<Flow(id={self.flow_id[:8]}, priority={self.priority}, in_flight={self.in_flight}, waiting={len(self.waiters)})>"
+
+
+_current_flow: contextvars.ContextVar[Optional[Flow]] = contextvars.ContextVar("llm_flow", default=None)
+
+
+@contextmanager
+def use_flow(flow: Optional[Flow]) -> Iterator[Optional[Flow]]:
+    """Attributes LLM calls in the enclosed block to an existing flow."""
+    token = _current_flow.set(flow)
+    try:
+        yield flow
+    finally:
+        _current_flow.reset(token)
+
+
+@contextmanager
+def flow_scope(priority: str = "interactive", flow_id: Optional[str] = None) -> Iterator[Flow]:
+    """Starts a new flow for the enclosed block, e.g. one research tree request."""
+    with use_flow(Flow(flow_id=flow_id, priority=priority)) as flow:
+        yield flow
+
+
+def current_flow() -> Optional[Flow]:
+    return _current_flow.get()
+
+
+class FairScheduler:
+    """
+    Weighted-fair gate in front of the LLM clients.
+
+    At most `max_concurrency` LLM calls run at once, and at most `max_in_flight_per_flow`
+    of them belong to the same flow. When calls have to wait, the next free slot goes
+    to the waiting flow with the smallest virtual start time (start-time fair queueing):
+    every granted call advances its flow's virtual time by 1/weight, so flows get slots
+    in proportion to their priority weight no matter how much work they have queued.
+    A request with 1000 queued scoring calls therefore cannot delay a small interactive
+    request by more than a few calls.
+    """
+
+    def __init__(self, max_concurrency: int, max_in_flight_per_flow: int):
+        self.max_concurrency = max_concurrency
+        self.max_in_flight_per_flow = max_in_flight_per_flow
+        self._in_flight = 0
+        self._virtual_clock = 0.0
+        self._backlogged: Set[Flow] = set()
+        self._default_flow = Flow(flow_id="default")
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Waits for an LLM slot for the current flow and holds it for the enclosed block."""
+        flow = _current_flow.get() or self._default_flow
+        await self._acquire(flow)
+        try:
+            yield
+        finally:
+            self._release(flow)
+
+    def stats(self) -> Dict[str, int]:
+        waiting: Dict[str, int] = {priority: 0 for priority in PRIORITY_WEIGHTS}
+        for flow in self._backlogged:
+            waiting[flow.priority] += len(flow.waiters)
+        return {
+            "in_flight": self._in_flight,
+            "backlogged_flows": len(self._backlogged),
+            **{f"waiting_{priority}": count for priority, count in waiting.items()},
+        }
+
+    def _has_capacity(self, flow: Flow) -> bool:
+        return self._in_flight < self.max_concurrency and flow.in_flight < self.max_in_flight_per_flow
+
+    def _grant(self, flow: Flow) -> None:
+        start = max(flow.virtual_time, self._virtual_clock)
+        self._virtual_clock = start
+        flow.virtual_time = start + 1.0 / flow.weight
+        flow.in_flight += 1
+        self._in_flight += 1
+
+    async def _acquire(self, flow: Flow) -> None:
+        if not self._backlogged and self._has_capacity(flow):
+            self._grant(flow)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        flow.waiters.append(waiter)
+        self._backlogged.add(flow)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just before the cancellation arrived; give it back.
+                self._release(flow)
+            else:
+                self._discard_waiter(flow, waiter)
+            raise
+
+    def _discard_waiter(self, flow: Flow, waiter: asyncio.Future) -> None:
+        try:
+            flow.waiters.remove(waiter)
+        except ValueError:
+            pass
+        if not flow.waiters:
+            self._backlogged.discard(flow)
+
+    def _release(self, flow: Flow) -> None:
+        flow.in_flight -= 1
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self.max_concurrency:
+            eligible = [flow for flow in self._backlogged if flow.in_flight < self.max_in_flight_per_flow]
+            if not eligible:
+                return
+            flow = min(eligible, key=lambda f: (max(f.virtual_time, self._virtual_clock), f.order))
+            waiter = flow.waiters.popleft()
+            if not flow.waiters:
+                self._backlogged.discard(flow)
+            if waiter.done():
+                continue
+            self._grant(flow)
+            waiter.set_result(None)
+
+
+fair_scheduler = FairScheduler(
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    max_in_flight_per_flow=LLM_MAX_IN_FLIGHT_PER_REQUEST,
+)
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api.arxiv_client import ArxivAPIClient
+from backend.api.endpoints import research_tree
+from backend.app.dependencies import get_llm_client
+from backend.app.fair_scheduler import flow_scope
+from backend.core import deadline
+from backend.core.config import RESEARCH_JOB_MAX_ATTEMPTS, RESEARCH_JOB_MAX_CONCURRENCY, RESEARCH_JOB_RETRY_DELAY_S
+from backend.core.database import SessionLocal
+from backend.crud import research_jobs as crud
+
+logger = logging.getLogger(__name__)
+
+
+class QueryNodesFailed(Exception):
+    """Some query nodes of a job could not be built; they were not persisted and can be retried."""
+
+
+class ResearchJobRunner:
+    """
+    Local worker pool that executes research jobs in the background.
+
+    `max_concurrent_jobs` worker tasks take job IDs from a queue and run the research tree
+    pipeline for them under the "background" priority class. The query plan and every
+    completed query node are persisted as soon as they are available. Jobs interrupted by
+    a restart are still "queued" or "running" in the database. `start()` picks them up again,
+    and they resume with the nodes that had not completed yet. Nodes whose arXiv search failed
+    are not persisted either: the job retries them up to `max_attempts` times in total before
+    it is marked "failed".
+    """
+
+    def __init__(
+        self,
+        max_concurrent_jobs: int,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+        llm_client_factory: Callable[[], Any] = get_llm_client,
+        arxiv_client_factory: Callable[[], ArxivAPIClient] = ArxivAPIClient,
+        max_attempts: int = RESEARCH_JOB_MAX_ATTEMPTS,
+        retry_delay_s: float = RESEARCH_JOB_RETRY_DELAY_S,
+    ):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_attempts = max_attempts
+        self.retry_delay_s = retry_delay_s
+        self._session_factory = session_factory
+        self._llm_client_factory = llm_client_factory
+        self._arxiv_client_factory = arxiv_client_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+        self._running: Set[str] = set()
+
+    async def start(self) -> None:
+        """Starts the workers and re-queues jobs left unfinished by a previous process."""
+        self._ensure_workers()
+        for job_id in await self._db(crud.list_unfinished_job_ids):
+            self.submit(job_id)
+
+    async def stop(self) -> None:
+        """Cancels the workers. Interrupted jobs stay "running" and resume on the next start."""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queue = None
+        self._pending.clear()
+        self._running.clear()
+
+    def submit(self, job_id: str) -> None:
+        self._ensure_workers()
+        if job_id in self._pending or job_id in self._running:
+            return
+        self._pending.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {"running": len(self._running), "queued": len(self._pending), "workers": len(self._workers)}
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._work()) for _ in range(self.max_concurrent_jobs)]
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            self._running.add(job_id)
+            try:
+                await self.run_job(job_id)
+            except Exception as e:
+                logger.error(f"Research job {job_id} crashed the worker: {e}")
+            finally:
+                self._running.discard(job_id)
+
+    async def _db(self, operation: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Runs `await operation(db, *args)` in a fresh session."""
+        async with self._session_factory() as db:
+            return await operation(db, *args)
+
+    async def run_job(self, job_id: str) -> None:
+        """Runs (or resumes) one job to completion and records its final status."""
+        job = await self._db(crud.get_job, job_id)
+        if job is None or job.status not in crud.UNFINISHED_STATUSES:
+            return
+        await self._db(crud.mark_running, job_id)
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    # The plan saved by an earlier attempt is reused, and completed nodes are skipped.
+                    job = await self._db(crud.get_job, job_id)
+                    await self._execute(job_id, job.request, job.research_goal, job.query_plan)
+                    break
+                except QueryNodesFailed as e:
+                    if attempt == self.max_attempts:
+                        raise
+                    logger.warning(f"Research job {job_id}: {e}; retrying (attempt {attempt + 1}/{self.max_attempts})")
+                    await asyncio.sleep(self.retry_delay_s * attempt)
+        except Exception as e:
+            logger.error(f"Research job {job_id} failed: {e}")
+            await self._db(crud.finish_job, job_id, "failed", str(e))
+            return
+        await self._db(crud.finish_job, job_id, "completed")
+        logger.info(f"Research job {job_id} completed")
+
+    async def _execute(
+        self,
+        job_id: str,
+        request_data: Dict[str, Any],
+        research_goal: Optional[str],
+        query_plan: Optional[List[Dict[str, str]]],
+    ) -> None:
+        request = research_tree.ResearchTreeRequest(**request_data)
+        llm_client = self._llm_client_factory()
+        arxiv_client = self._arxiv_client_factory()
+
+        with deadline.deadline_scope(request.time_budget_ms), flow_scope("background", flow_id=job_id):
+            if query_plan is None:
+                research_goal, plans = await research_tree._generate_research_plan(
+                    request.natural_language_query,
+                    llm_client,
+                    request.max_queries
+                )
+                query_plan = [{"query": query, "description": description} for query, description in plans]
+                await self._db(crud.save_plan, job_id, research_goal, query_plan)
+
+            completed = set(await self._db(crud.completed_positions, job_id))
+            if completed:
+                logger.info(f"Resuming research job {job_id}: {len(completed)}/{len(query_plan)} nodes already done")
+
+            dispatcher = research_tree._ScoringDispatcher(request, llm_client)
+
+            async def build(position: int, entry: Dict[str, str]) -> None:
+                node = await research_tree._build_query_node(
+                    entry["query"], entry["description"], request, llm_client, arxiv_client,
+                    dispatcher=dispatcher, node_index=position, raise_errors=True
+                )
+                await self._db(crud.save_node, job_id, position, node.model_dump(mode="json"))
+
+            pending = [(position, entry) for position, entry in enumerate(query_plan) if position not in completed]
+            results = await asyncio.gather(*(build(position, entry) for position, entry in pending), return_exceptions=True)
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                raise QueryNodesFailed(f"{len(errors)} of {len(query_plan)} query nodes failed: {errors[0]}")
+
+
+research_job_runner = ResearchJobRunner(max_concurrent_jobs=RESEARCH_JOB_MAX_CONCURRENCY)
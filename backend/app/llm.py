@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any
+
+from backend.app.clients.hedged_client import HedgedLLMClient
+from backend.app.clients.ollama_client import OllamaClient
+from backend.app.clients.router import RoutedLLMClient
+from backend.app.fair_scheduler import fair_scheduler
+from backend.app.pipeline_hub import pipeline_key
+from backend.app.tiered_cache import llm_response_cache
+from backend.core import deadline
+from backend.core.config import LLM_REQUEST_TIMEOUT_S
+from backend.core.metrics import counter
+
+
+async def generate_text(client: Any, prompt: str, stage: str) -> str:
+    """
+    Runs a blocking LLM call in a worker thread once the fair scheduler grants the
+    current flow an LLM slot.
+
+    Waiting for the slot counts against the request deadline. The call timeout is the
+    smaller of LLM_REQUEST_TIMEOUT_S and the time left on the request deadline.
+    `stage` ("plan", "score", "batch-score", ...) selects the provider and model when
+    the client is a RoutedLLMClient and is ignored otherwise.
+
+    Cancellation while waiting for a slot means the call is never sent
+    (counted as llm.calls_saved); once sent, the provider call cannot be interrupted
+    and its answer is dropped (llm.calls_abandoned).
+
+    Answers are cached per (stage, client configuration, prompt) in llm_response_cache;
+    a cached answer is returned without waiting for a slot. Identical calls running at
+    the same time, in this or another worker process, share a single provider call.
+
+    Raises:
+        TimeoutError: If the call does not finish in time (DeadlineExceeded if the
+            deadline had already passed).
+    """
+    kwargs = {"stage": stage} if isinstance(client, RoutedLLMClient) else {}
+
+    async def call() -> str:
+        sent = False
+        try:
+            async with asyncio.timeout(deadline.call_timeout()):
+                async with fair_scheduler.slot():
+                    timeout = deadline.call_timeout(LLM_REQUEST_TIMEOUT_S)
+                    sent = True
+                    return await deadline.run_in_thread(
+                        lambda: client.generate_text(prompt=prompt, timeout=timeout, **kwargs),
+                        timeout=timeout,
+                    )
+        except asyncio.CancelledError:
+            counter("llm.calls_abandoned" if sent else "llm.calls_saved").increment()
+            raise
+
+    return await llm_response_cache.get_or_compute(
+        pipeline_key("llm", stage, client_fingerprint(client), prompt),
+        call,
+        # the clients signal errors with an empty answer
+        cacheable=lambda response: bool(response) and isinstance(response, str),
+    )
+
+def client_fingerprint(client: Any) -> Any:
+    """
+    JSON-serialisable description of the providers and models behind `client`, used to
+    keep cached LLM-derived results apart when the LLM configuration changes, and to
+    batch only requests whose clients are configured alike. It holds no credentials.
+    """
+    if isinstance(client, RoutedLLMClient):
+        return {stage: [target.name for target in targets] for stage, targets in client.routes.items()}
+    if isinstance(client, HedgedLLMClient):
+        return {"primary": type(client.primary).__name__, "hedge": type(client.hedge).__name__, "hedge_model": client.hedge_model}
+    if isinstance(client, OllamaClient):
+        # Clients of different Ollama servers may serve different models under one name.
+        base_url = getattr(getattr(client, "client", None), "base_url", None)
+        if base_url is not None:
+            return {"OllamaClient": str(base_url)}
+    return type(client).__name__
@@ -1,20 +1,51 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.core.database import engine, Base, create_db_and_tables # Updated import
+from backend.core.database import SessionLocal, create_db_and_tables, engine
+from backend.crud import papers as papers_crud
 from backend.api.endpoints import arxiv as arxiv_router  # Import the arxiv router
 from backend.api.endpoints import research_tree as research_tree_router # Import the research tree router
+from backend.api.endpoints import metrics as metrics_router
+from backend.api.endpoints import research_jobs as research_jobs_router
+from backend.api.endpoints import saved_trees as saved_trees_router
+from backend.api.endpoints import exports as exports_router
+from backend.app.cache_coherence import cache_coherence
+from backend.app.cache_janitor import cache_janitor
+from backend.app.job_runner import research_job_runner
+from backend.app.paper_index import paper_index
+from backend.core.config import PAPER_INDEX_PRELOAD
 
 # If Paper model is needed in main.py for some reason, import it like:
 # from backend.models.paper import Paper
 
-# Create database tables on startup
-# This is a simple way for prototypes. For production, you might use Alembic migrations.
-create_db_and_tables()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables on startup and migrate tables created by earlier versions
+    # (see backend/core/migrations.py)
+    await create_db_and_tables()
+    # Cached abstracts compressed with a shared dictionary can only be read once it is loaded
+    async with SessionLocal() as db:
+        await papers_crud.load_compression_dictionaries(db)
+    # Build the local search indexes now instead of on the first local search
+    if PAPER_INDEX_PRELOAD:
+        await paper_index.load()
+    # Start the background job workers and resume jobs interrupted by a restart
+    await research_job_runner.start()
+    # Keep the cache tables within their size budgets and the database file compact
+    cache_janitor.start()
+    # Drop cache entries written by other worker processes from this worker's memory tier
+    await cache_coherence.start()
+    yield
+    await cache_coherence.stop()
+    await cache_janitor.stop()
+    await research_job_runner.stop()
+    await engine.dispose()
 
 app = FastAPI(
     title="Transparent Research Explorer API",
     description="API for searching arXiv and processing research papers.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -29,13 +60,10 @@ app.add_middleware(
 # Include routers
 app.include_router(arxiv_router.router, prefix="/api/arxiv", tags=["arXiv"])
 app.include_router(research_tree_router.router, prefix="/api", tags=["Research Tree"])
-
-# Example of how to ensure tables are created using an event handler
-# This is often preferred over calling create_db_and_tables() directly at the module level,
-# especially in more complex applications or when using app factories.
-# @app.on_event("startup")
-# async def startup_event():
-#     create_db_and_tables()
+app.include_router(research_jobs_router.router, prefix="/api", tags=["Research Jobs"])
+app.include_router(saved_trees_router.router, prefix="/api", tags=["Saved Research Trees"])
+app.include_router(metrics_router.router, prefix="/api/metrics", tags=["Metrics"])
+app.include_router(exports_router.router, prefix="/api/exports", tags=["Exports"])
 
 @app.get("/")
 async def root():
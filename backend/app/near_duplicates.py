@@ -0,0 +1,130 @@
+import random
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy
+except ImportError:  # Optional: without it, MinHash signatures are computed in pure Python.
+    numpy = None
+
+from backend.core.config import NEAR_DUPLICATE_BANDS, NEAR_DUPLICATE_NUM_PERM, NEAR_DUPLICATE_THRESHOLD
+
+# Words per shingle of the title and abstract.
+SHINGLE_SIZE = 3
+
+# Universal hashing (a * x + b) mod p over 64-bit integers (the product wraps around, as
+# it does in NumPy's uint64), truncated to 32 bits. Both code paths give the same signatures.
+_MERSENNE_PRIME = (1 << 61) - 1
+_UINT64_MASK = (1 << 64) - 1
+_MAX_HASH = (1 << 32) - 1
+_SEED = 1
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def paper_text(title: str, abstract: Optional[str]) -> str:
+    return f"{title} {abstract or ''}"
+
+
+def shingles(text: str) -> Set[int]:
+    """32-bit hashes of the word shingles of `text` (case-insensitive, punctuation ignored)."""
+    words = _WORD_PATTERN.findall(text.casefold())
+    if len(words) < SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+    return {
+        zlib.crc32(" ".join(words[start:start + SHINGLE_SIZE]).encode())
+        for start in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm: int) -> Tuple[List[int], List[int]]:
+    generator = random.Random(_SEED)
+    a = [generator.randrange(1, _MERSENNE_PRIME) for _ in range(num_perm)]
+    b = [generator.randrange(0, _MERSENNE_PRIME) for _ in range(num_perm)]
+    return a, b
+
+
+@lru_cache(maxsize=None)
+def _numpy_permutations(num_perm: int):
+    a, b = _permutations(num_perm)
+    return numpy.array(a, dtype=numpy.uint64), numpy.array(b, dtype=numpy.uint64)
+
+
+def minhash(hashes: Set[int], num_perm: int = NEAR_DUPLICATE_NUM_PERM) -> Tuple[int, ...]:
+    """MinHash signature of a set of shingle hashes: the minimum of each of `num_perm` hash functions."""
+    if not hashes:
+        return (_MAX_HASH,) * num_perm
+    if numpy is not None:
+        a, b = _numpy_permutations(num_perm)
+        values = numpy.fromiter(hashes, dtype=numpy.uint64, count=len(hashes))
+        # One row per shingle, one column per hash function.
+        with numpy.errstate(over="ignore"):
+            hashed = (values[:, None] * a + b) % numpy.uint64(_MERSENNE_PRIME)
+        return tuple((hashed & numpy.uint64(_MAX_HASH)).min(axis=0).tolist())
+    a, b = _permutations(num_perm)
+    return tuple(
+        min((((a_i * value + b_i) & _UINT64_MASK) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+        for a_i, b_i in zip(a, b)
+    )
+
+
+def estimated_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Jaccard similarity of two shingle sets estimated from their MinHash signatures."""
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive hashing index of MinHash signatures, for finding documents whose
+    word shingles overlap by at least `threshold` (Jaccard similarity).
+
+    Each signature is split into `bands` bands; documents sharing any band are candidates
+    and are confirmed by comparing their full signatures.
+    """
+
+    def __init__(
+        self,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+        num_perm: int = NEAR_DUPLICATE_NUM_PERM,
+        bands: int = NEAR_DUPLICATE_BANDS,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self._rows = num_perm // bands
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _bands(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, signature[band * self._rows:(band + 1) * self._rows]) for band in range(self.bands)]
+
+    def add(self, key: str, text: str) -> Optional[str]:
+        """
+        Returns the key of an indexed document that `text` nearly duplicates. Otherwise
+        indexes `text` under `key` and returns None. Empty texts are never duplicates.
+        """
+        hashes = shingles(text)
+        if not hashes:
+            return None
+        signature = minhash(hashes, self.num_perm)
+        bands = self._bands(signature)
+        best: Optional[Tuple[float, str]] = None
+        for band in bands:
+            for candidate in self._buckets.get(band, ()):
+                similarity = estimated_similarity(signature, self._signatures[candidate])
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, candidate)
+        if best is not None:
+            return best[1]
+        self._signatures[key] = signature
+        for band in bands:
+            self._buckets.setdefault(band, []).append(key)
+        return None
@@ -0,0 +1,315 @@
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left, insort
+from datetime import date, datetime, time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.database import SessionLocal
+from backend.core.metrics import counter
+from backend.crud import papers as crud
+from backend.models.paper import Paper
+
+logger = logging.getLogger(__name__)
+
+# Papers fetched per query while a keyword filter scans the candidates.
+SCAN_BATCH_SIZE = 200
+
+# (authors, categories, year) a paper is indexed under
+_Fields = Tuple[Tuple[str, ...], Tuple[str, ...], Optional[int]]
+
+
+def normalize_author(name: str) -> str:
+    """Index key of an author name: case-insensitive, whitespace collapsed."""
+    return " ".join(name.split()).casefold()
+
+
+def _intersect(a: array, b: array) -> array:
+    # Walks the shorter array and binary-searches the longer one from the last match on.
+    if len(a) > len(b):
+        a, b = b, a
+    result = array("q")
+    lo = 0
+    for value in a:
+        lo = bisect_left(b, value, lo)
+        if lo == len(b):
+            break
+        if b[lo] == value:
+            result.append(value)
+    return result
+
+
+def _union(arrays: List[array]) -> array:
+    if len(arrays) == 1:
+        return arrays[0]
+    return array("q", sorted(set().union(*arrays)))
+
+
+class PaperIndex:
+    """
+    In-memory inverted indexes over the paper cache: author, category and publication
+    year to the ids of the cached papers, each posting list a sorted array of integers.
+
+    The indexes are built from papers_cache on first use (or at startup with `load`) and
+    kept up to date by every upsert_papers call of this process; papers written by other
+    workers are applied with `refresh` (see CacheCoherence). Papers evicted from the cache
+    are dropped from the indexes when a lookup finds them missing.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = SessionLocal):
+        self._session_factory = session_factory
+        self._authors: Dict[str, array] = {}
+        self._categories: Dict[str, array] = {}
+        self._years: Dict[int, array] = {}
+        self._fields: Dict[int, _Fields] = {}
+        self._published: Dict[int, datetime] = {}
+        self._updated: Dict[int, datetime] = {}
+        self._loaded = False
+        self._loading: Optional[asyncio.Future] = None
+        self._pending: Optional[List[Tuple[int, Dict[str, Any]]]] = None
+        crud.add_upsert_hook(self._on_upsert)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    async def load(self) -> None:
+        """Builds the indexes from the paper cache unless they are built already."""
+        if self._loaded:
+            return
+        if self._loading is not None:
+            await asyncio.shield(self._loading)
+            return
+        self._loading = asyncio.get_running_loop().create_future()
+        # Upserts committed while the cache is read are applied afterwards.
+        self._pending = []
+        try:
+            async with self._session_factory() as db:
+                # In id order, so appending keeps every posting list sorted.
+                async for paper_id, authors, published_date, updated_date, categories in crud.stream_index_fields(db):
+                    self._index(paper_id, authors, categories, published_date, updated_date, sort=False)
+            pending, self._pending = self._pending, None
+            self._loaded = True
+            self._on_upsert(pending)
+            counter("paper_index.builds").increment()
+            logger.info(f"Indexed {len(self._fields)} cached papers")
+            self._loading.set_result(None)
+        except Exception as e:
+            self._loading.set_exception(e)
+            self._loading.exception()  # retrieved here so that unawaited loads do not log it
+            raise
+        finally:
+            if not self._loaded:
+                self._pending = None
+                self.clear()
+            if not self._loading.done():  # cancelled
+                self._loading.cancel()
+            self._loading = None
+
+    async def refresh(self, arxiv_ids: Iterable[str]) -> int:
+        """Re-reads the given papers from the cache into loaded indexes; returns how many were indexed."""
+        if not self._loaded:
+            return 0  # indexed from the cache when they are loaded
+        async with self._session_factory() as db:
+            fields = await crud.get_index_fields(db, arxiv_ids)
+        for paper_id, authors, published_date, updated_date, categories in fields:
+            self._index(paper_id, authors, categories, published_date, updated_date, sort=True)
+        counter("paper_index.remote_updates").increment(len(fields))
+        return len(fields)
+
+    def clear(self) -> None:
+        for postings in (self._authors, self._categories, self._years, self._fields, self._published, self._updated):
+            postings.clear()
+        self._loaded = False
+
+    def _on_upsert(self, rows: List[Tuple[int, Dict[str, Any]]]) -> None:
+        if self._pending is not None:
+            self._pending.extend(rows)
+        elif self._loaded:
+            for paper_id, row in rows:
+                categories = (row["categories"] or []) if "categories" in row else None
+                self._index(
+                    paper_id, row.get("authors") or [], categories, row.get("published_date"), row.get("updated_date"),
+                    sort=True,
+                )
+
+    def _index(
+        self,
+        paper_id: int,
+        authors: Iterable[str],
+        categories: Optional[Iterable[str]],
+        published_date: Optional[datetime],
+        updated_date: Optional[datetime],
+        sort: bool,
+    ) -> None:
+        previous = self._fields.get(paper_id)
+        if categories is None:  # upserted without categories: they are left unchanged
+            categories = previous[1] if previous is not None else ()
+        fields = (
+            tuple(dict.fromkeys(normalize_author(name) for name in authors)),
+            tuple(dict.fromkeys(categories)),
+            published_date.year if published_date is not None else None,
+        )
+        if updated_date is not None:
+            self._updated[paper_id] = updated_date
+        if previous == fields:
+            if published_date is not None:
+                self._published[paper_id] = published_date
+            return
+        if previous is not None:
+            self.remove([paper_id])
+        self._fields[paper_id] = fields
+        if published_date is not None:
+            self._published[paper_id] = published_date
+        author_keys, category_keys, year = fields
+        for postings, keys in (
+            (self._authors, author_keys),
+            (self._categories, category_keys),
+            (self._years, (year,) if year is not None else ()),
+        ):
+            for key in keys:
+                ids = postings.setdefault(key, array("q"))
+                if sort:
+                    insort(ids, paper_id)
+                else:
+                    ids.append(paper_id)
+
+    def remove(self, paper_ids: Iterable[int]) -> None:
+        """Drops papers (e.g. evicted from the cache) from the indexes."""
+        for paper_id in paper_ids:
+            fields = self._fields.pop(paper_id, None)
+            self._published.pop(paper_id, None)
+            self._updated.pop(paper_id, None)
+            if fields is None:
+                continue
+            author_keys, category_keys, year = fields
+            for postings, keys in (
+                (self._authors, author_keys),
+                (self._categories, category_keys),
+                (self._years, (year,) if year is not None else ()),
+            ):
+                for key in keys:
+                    ids = postings[key]
+                    del ids[bisect_left(ids, paper_id)]
+                    if not ids:
+                        del postings[key]
+
+    def lookup(
+        self,
+        authors: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> array:
+        """
+        Sorted ids of the cached papers by any of `authors`, in any of `categories` and
+        published between `date_from` and `date_to` (inclusive). Omitted filters match
+        every paper. The indexes must be loaded.
+        """
+        selections: List[array] = []
+        if authors:
+            selections.append(_union([self._authors.get(normalize_author(name), array("q")) for name in authors]))
+        if categories:
+            selections.append(_union([self._categories.get(category, array("q")) for category in categories]))
+        dated = date_from is not None or date_to is not None
+        if dated:
+            years = [
+                ids for year, ids in self._years.items()
+                if (date_from is None or year >= date_from.year) and (date_to is None or year <= date_to.year)
+            ]
+            selections.append(_union(years) if years else array("q"))
+        if not selections:
+            return array("q", sorted(self._fields))
+        selections.sort(key=len)
+        result = selections[0]
+        for ids in selections[1:]:
+            result = _intersect(result, ids)
+        if dated:
+            # The year index is exact except in the first and last year of the range.
+            start = datetime.combine(date_from or date.min, time.min)
+            end = datetime.combine(date_to or date.max, time.max)
+            result = array("q", (paper_id for paper_id in result if start <= self._published[paper_id] <= end))
+        return result
+
+    async def search(
+        self,
+        keyword: Optional[str] = None,
+        authors: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        sort: str = "submitted",
+        exclude: Iterable[int] = (),
+        limit: int = 10,
+    ) -> List[Paper]:
+        """
+        Cached papers matching the filters (see `lookup`), newest first: by last update
+        with sort "updated", otherwise by first submission (there is no relevance ranking
+        locally). With `keyword`, only papers whose title or abstract contains every word
+        of it are returned; the candidates are then scanned in batches until `limit`
+        papers are found.
+        """
+        await self.load()
+        excluded = set(exclude)
+        candidates = [
+            paper_id for paper_id in self.lookup(authors, categories, date_from, date_to) if paper_id not in excluded
+        ]
+        if sort == "updated":
+            order = lambda paper_id: self._updated.get(paper_id) or self._published.get(paper_id, datetime.min)
+        else:
+            order = lambda paper_id: self._published.get(paper_id, datetime.min)
+        candidates.sort(key=order, reverse=True)
+        terms = keyword.casefold().split() if keyword else []
+        results: List[Paper] = []
+        batch_size = SCAN_BATCH_SIZE if terms else limit
+        for start in range(0, len(candidates), batch_size):
+            if len(results) >= limit:
+                break
+            batch = candidates[start:start + batch_size]
+            async with self._session_factory() as db:
+                papers = await crud.get_papers_by_id(db, batch)
+            self.remove(paper_id for paper_id in batch if paper_id not in papers)
+            for paper_id in batch:
+                paper = papers.get(paper_id)
+                if paper is None:
+                    continue
+                if terms:
+                    text = f"{paper.title} {paper.abstract or ''}".casefold()
+                    if not all(term in text for term in terms):
+                        continue
+                results.append(paper)
+                if len(results) >= limit:
+                    break
+        counter("paper_index.searches").increment()
+        return results
+
+    async def more_from_authors(self, arxiv_id: str, limit: int = 10) -> Optional[List[Paper]]:
+        """
+        Other cached papers by any author of the cached paper `arxiv_id`, newest first, or
+        None if that paper is not cached.
+        """
+        await self.load()
+        async with self._session_factory() as db:
+            paper = await crud.get_paper(db, arxiv_id)
+        if paper is None:
+            return None
+        if not paper.authors:
+            return []
+        return await self.search(authors=paper.authors, exclude=[paper.id], limit=limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._loaded,
+            "papers": len(self._fields),
+            "authors": len(self._authors),
+            "categories": len(self._categories),
+            "years": len(self._years),
+        }
+
+
+paper_index = PaperIndex()
@@ -0,0 +1,315 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from backend.app.stream_log import StreamEventLog
+from backend.core.config import (
+    SSE_HEARTBEAT_INTERVAL_S,
+    STREAM_LOG_IDLE_TIMEOUT_S,
+    STREAM_LOG_POLL_INTERVAL_S,
+    STREAM_RESUME_GRACE_S,
+)
+from backend.core.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+
+def pipeline_key(*parts: Any) -> str:
+    """Canonical hash of JSON-serialisable pipeline parameters (dict key order is ignored)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def parse_event_id(event_id: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Splits an SSE event id of the form "<session_id>:<seq>"; returns None if malformed."""
+    if not event_id:
+        return None
+    session_id, _, seq = event_id.strip().rpartition(":")
+    if not session_id or not seq.isdigit():
+        return None
+    return session_id, int(seq)
+
+
+class PipelineBroadcast:
+    """
+    A single running producer whose events are recorded and fanned out to any number
+    of subscribers. Subscribers that join late first receive a replay of every event
+    emitted so far.
+
+    Events are numbered 1, 2, 3, ... within the broadcast's session. SSE comments
+    (heartbeats, lines starting with ":") are not recorded: only the latest one is kept
+    and passed to the subscribers connected at the time. With an event log,
+    numbered events are also persisted so the session can be replayed after the
+    broadcast is gone.
+    """
+
+    def __init__(self, key: str, producer: AsyncIterator[str], event_log: Optional[StreamEventLog] = None):
+        self.key = key
+        self.session_id = uuid.uuid4().hex
+        self.events: List[Tuple[int, str]] = []
+        self.last_seq = 0
+        # Number of SSE comments emitted so far and the latest of them
+        self._comments = 0
+        self._last_comment: Optional[str] = None
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.subscribers = 0
+        self.cancelled = False
+        self._changed = asyncio.Condition()
+        self._producer = producer
+        self._event_log = event_log
+        self._unlogged: List[Tuple[int, str]] = []
+        self._log_flush: Optional[asyncio.Task] = None
+        self._abandon_timer: Optional[asyncio.TimerHandle] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def cancel(self) -> None:
+        """Stops the producer; its in-flight work is cancelled with it."""
+        if self.done or self.cancelled:
+            return
+        self.cancelled = True
+        counter("pipeline.cancelled").increment()
+        logger.info(f"Pipeline {self.key[:12]} cancelled: no subscribers left")
+        if self.task is not None:
+            self.task.cancel()
+
+    def abandon(self, grace_s: float) -> None:
+        """Cancels the producer unless a subscriber (re)attaches within `grace_s` seconds."""
+        if grace_s <= 0:
+            self.cancel()
+            return
+        self._abandon_timer = asyncio.get_running_loop().call_later(grace_s, self._cancel_if_unwatched)
+
+    def attach(self) -> None:
+        self.subscribers += 1
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+
+    def _cancel_if_unwatched(self) -> None:
+        self._abandon_timer = None
+        if self.subscribers == 0:
+            self.cancel()
+
+    def _record(self, event: str) -> None:
+        if event.startswith(":"):
+            self._comments += 1
+            self._last_comment = event
+            return
+        self.last_seq += 1
+        self.events.append((self.last_seq, event))
+        if self._event_log is not None:
+            self._unlogged.append((self.last_seq, event))
+            if self._log_flush is None or self._log_flush.done():
+                self._log_flush = asyncio.get_running_loop().create_task(self._flush_log())
+
+    async def _flush_log(self) -> None:
+        # Writes accumulated events in batches so a slow disk never holds up the stream.
+        while self._unlogged:
+            batch, self._unlogged = self._unlogged, []
+            try:
+                await self._event_log.append(self.session_id, batch)
+            except Exception as e:
+                logger.warning(f"Failed to log {len(batch)} events of stream session {self.session_id}: {e}")
+
+    async def _log_call(self, call: Callable[[], Any]) -> None:
+        if self._event_log is None:
+            return
+        try:
+            await call()
+        except Exception as e:
+            logger.warning(f"Stream event log unavailable for session {self.session_id}: {e}")
+
+    async def _run(self) -> None:
+        status = "completed"
+        await self._log_call(lambda: self._event_log.open_session(self.session_id, self.key))
+        try:
+            async for event in self._producer:
+                self._record(event)
+                async with self._changed:
+                    self._changed.notify_all()
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status = "failed"
+            self.error = e
+            logger.error(f"Pipeline {self.key[:12]} failed: {e}")
+        finally:
+            if self._log_flush is not None:
+                await asyncio.shield(self._log_flush)
+            await self._log_call(lambda: self._event_log.close_session(self.session_id, status))
+            self.done = True
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def stream(self, after_seq: Optional[int] = None) -> AsyncIterator[Tuple[Optional[int], str]]:
+        """
+        Yields (seq, event) for all past events after `after_seq` (all of them if None), then
+        live events until the producer finishes. Comments emitted while subscribed have seq
+        None; when several arrive before the subscriber catches up, only the latest is sent.
+        """
+        index = 0
+        comments = self._comments
+        while True:
+            while index < len(self.events):
+                seq, event = self.events[index]
+                index += 1
+                if after_seq is None or seq > after_seq:
+                    yield seq, event
+            if comments != self._comments:
+                comments = self._comments
+                yield None, self._last_comment
+                continue
+            if self.done:
+                break
+            async with self._changed:
+                if index == len(self.events) and comments == self._comments and not self.done:
+                    await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+
+
+class PipelineHub:
+    """
+    Coalesces identical in-flight pipelines.
+
+    The first subscriber for a key starts the producer; concurrent subscribers with the
+    same key attach to it instead of running the pipeline again. The broadcast is
+    forgotten once the producer finishes, so later requests start a fresh run.
+
+    When the last subscriber goes away before the producer has finished (e.g. the
+    browser closed the stream), the producer is cancelled after `resume_grace_s` seconds
+    unless a subscriber reattaches, so that abandoned pipelines stop consuming LLM and
+    arXiv capacity.
+
+    With `event_ids`, every event is sent with an SSE "id: <session_id>:<seq>" line.
+    Subscribing with such an id as `last_event_id` resumes that session: missed events
+    are replayed and the subscriber reattaches to the live producer. A session that is
+    not live in this process is read from the event log instead: a completed one is
+    replayed, one still running in another worker is followed (polling every
+    `log_poll_interval_s`) until it ends, and one that was cancelled, failed or logged
+    nothing new for `log_idle_timeout_s` is started over with a new producer.
+    """
+
+    def __init__(
+        self,
+        event_log: Optional[StreamEventLog] = None,
+        resume_grace_s: float = 0.0,
+        event_ids: bool = False,
+        log_poll_interval_s: float = STREAM_LOG_POLL_INTERVAL_S,
+        log_idle_timeout_s: float = STREAM_LOG_IDLE_TIMEOUT_S,
+        heartbeat_interval_s: float = SSE_HEARTBEAT_INTERVAL_S,
+    ):
+        self._inflight: Dict[str, PipelineBroadcast] = {}
+        self._sessions: Dict[str, PipelineBroadcast] = {}
+        self._event_log = event_log
+        self.resume_grace_s = resume_grace_s
+        self.event_ids = event_ids
+        self.log_poll_interval_s = log_poll_interval_s
+        self.log_idle_timeout_s = log_idle_timeout_s
+        self.heartbeat_interval_s = heartbeat_interval_s
+
+    def get(self, key: str) -> Optional[PipelineBroadcast]:
+        return self._inflight.get(key)
+
+    def join(self, key: str, producer_factory: Callable[[], AsyncIterator[str]]) -> PipelineBroadcast:
+        """Returns the in-flight broadcast for `key`, starting a new producer if there is none."""
+        broadcast = self._inflight.get(key)
+        if broadcast is None or broadcast.cancelled:
+            broadcast = PipelineBroadcast(key, producer_factory(), event_log=self._event_log)
+            self._inflight[key] = broadcast
+            self._sessions[broadcast.session_id] = broadcast
+            broadcast.start()
+            broadcast.task.add_done_callback(lambda _: self._forget(broadcast))
+        return broadcast
+
+    def _format(self, session_id: str, seq: Optional[int], event: str) -> str:
+        if not self.event_ids or seq is None:
+            return event
+        return f"id: {session_id}:{seq}\n{event}"
+
+    async def subscribe(
+        self,
+        key: str,
+        producer_factory: Callable[[], AsyncIterator[str]],
+        last_event_id: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Joins (or starts) the pipeline for `key` and yields its events. With a
+        `last_event_id` from an earlier subscription to the same key, only the events
+        after it are sent.
+        """
+        broadcast: Optional[PipelineBroadcast] = None
+        after_seq: Optional[int] = None
+        resume = parse_event_id(last_event_id)
+        if resume is not None:
+            session_id, after_seq = resume
+            broadcast = self._sessions.get(session_id)
+            if broadcast is not None and broadcast.key != key:
+                broadcast = None
+            if broadcast is not None and broadcast.cancelled:
+                broadcast = None  # Cancelled here, so its log ends early: start over.
+            elif broadcast is None and self._event_log is not None:
+                status = None
+                last_seq, last_activity, last_heartbeat = after_seq, time.monotonic(), time.monotonic()
+                while True:
+                    replay = await self._event_log.replay(session_id, key, last_seq)
+                    if replay is None:
+                        break
+                    status, events = replay
+                    if status in ("cancelled", "failed"):
+                        break  # its log ends early
+                    for seq, event in events:
+                        yield self._format(session_id, seq, event)
+                        last_seq = seq
+                    now = time.monotonic()
+                    if events:
+                        last_activity = last_heartbeat = now
+                    if status != "running" or now - last_activity >= self.log_idle_timeout_s:
+                        break
+                    # Still running in another worker: keep following its log.
+                    if now - last_heartbeat >= self.heartbeat_interval_s:
+                        last_heartbeat = now
+                        yield ": heartbeat\n\n"
+                    await asyncio.sleep(self.log_poll_interval_s)
+                if status == "completed":
+                    counter("pipeline.resumed_from_log").increment()
+                    return
+                if status is not None:
+                    counter("pipeline.restarted_after_resume").increment()
+                    logger.info(f"Stream session {session_id} ended as '{status}'; starting the pipeline again")
+            if broadcast is not None:
+                counter("pipeline.resumed_live").increment()
+            else:
+                after_seq = None  # Unknown or unfinished session: start over as a new subscriber.
+
+        if broadcast is None:
+            broadcast = self.join(key, producer_factory)
+        broadcast.attach()
+        finished = False
+        try:
+            async for seq, event in broadcast.stream(after_seq):
+                yield self._format(broadcast.session_id, seq, event)
+            finished = True
+        finally:
+            broadcast.subscribers -= 1
+            if not finished and not broadcast.done:
+                counter("pipeline.subscriber_disconnects").increment()
+                if broadcast.subscribers == 0:
+                    broadcast.abandon(self.resume_grace_s)
+
+    def _forget(self, broadcast: PipelineBroadcast) -> None:
+        if self._inflight.get(broadcast.key) is broadcast:
+            del self._inflight[broadcast.key]
+        self._sessions.pop(broadcast.session_id, None)
+
+
+pipeline_hub = PipelineHub(event_log=StreamEventLog(), resume_grace_s=STREAM_RESUME_GRACE_S, event_ids=True)
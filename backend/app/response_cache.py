@@ -0,0 +1,60 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import RESEARCH_TREE_CACHE_TTL_S
+from backend.core.database import SessionLocal
+from backend.crud import response_cache as crud
+
+
+def make_etag(body: str) -> str:
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluates an If-None-Match header (weak comparison, "*" and lists supported)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate == "*" or candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of complete serialized responses with a fixed TTL.
+
+    Entries are stored with a content-derived ETag so that clients can revalidate with
+    If-None-Match without transferring the body again.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = SessionLocal, ttl_s: float = RESEARCH_TREE_CACHE_TTL_S):
+        self._session_factory = session_factory
+        self.ttl_s = ttl_s
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0
+
+    async def _db(self, operation: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        async with self._session_factory() as db:
+            return await operation(db, *args)
+
+    async def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """Returns (etag, body) of the live entry for `key`, or None."""
+        async def load(db: AsyncSession) -> Optional[Tuple[str, str]]:
+            entry = await crud.get_entry(db, key)
+            return (entry.etag, entry.body) if entry is not None else None
+        return await self._db(load)
+
+    async def put(self, key: str, body: str) -> str:
+        """Stores `body` under `key` and returns its ETag."""
+        etag = make_etag(body)
+        async def store(db: AsyncSession) -> None:
+            await crud.delete_expired(db)
+            await crud.put_entry(db, key, etag, body, self.ttl_s)
+        await self._db(store)
+        return etag
+
+
+research_tree_cache = ResponseCache()
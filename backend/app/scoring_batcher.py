@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.app import llm
+from backend.app.fair_scheduler import Flow, current_flow, use_flow
+from backend.app.pipeline_hub import pipeline_key
+from backend.core import deadline
+from backend.core.config import SCORING_BATCH_MAX_SIZE, SCORING_BATCH_MAX_TOKENS, SCORING_BATCH_WINDOW_MS
+from backend.core.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+# (title, authors, abstract, original_query, client) -> (score, explanation)
+SingleScorer = Callable[..., Awaitable[Tuple[float, str]]]
+
+_BATCH_LINE_PATTERN = re.compile(
+    r"^\s*\[(\d+)\]\s*Score:\s*(\d+\.?\d*)\s*\|\s*Explanation:\s*(.+?)\s*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+
+@dataclass
+class ScoringJob:
+    """A pending (paper, query) relevance scoring request waiting to be batched."""
+    title: str
+    authors: List[str]
+    abstract: str
+    original_query: str
+    client: Any
+    single_scorer: SingleScorer
+    future: asyncio.Future
+    deadline: Optional[float] = None
+    flow: Optional[Flow] = None
+    prompt_chunk: str = field(default="", init=False)
+
+    def __post_init__(self):
+        self.prompt_chunk = (
+            f"Research Question: {self.original_query}\n"
+            f"Paper Title: {self.title}\n"
+            f"Authors: {', '.join(self.authors)}\n"
+            f"Abstract (first 500 chars): {self.abstract[:500]}...\n"
+        )
+
+    @property
+    def estimated_tokens(self) -> int:
+        # Rough 4-characters-per-token estimate; only used to cap the batch size.
+        return len(self.prompt_chunk) // 4 + 1
+
+    async def score_individually(self) -> Tuple[float, str]:
+        return await self.single_scorer(
+            title=self.title,
+            authors=self.authors,
+            abstract=self.abstract,
+            original_query=self.original_query,
+            client=self.client,
+        )
+
+
+def build_batch_prompt(jobs: List[ScoringJob]) -> str:
+    """Builds one prompt that asks the LLM to score all jobs, numbered from 1."""
+    items = "\n".join(f"[{index}]\n{job.prompt_chunk}" for index, job in enumerate(jobs, start=1))
+    return (
+        f"Rate the relevance of each research paper below to its research question on a scale of 0.0 to 1.0 "
+        f"(0.0 = not relevant, 1.0 = highly relevant). Provide a brief explanation for each rating.\n\n"
+        f"{items}\n"
+        f"Format your response EXACTLY as one line per paper, in the same order, using the paper's number:\n"
+        f"[1] Score: [score as a float between 0.0 and 1.0] | Explanation: [your brief reason here]\n"
+        f"[2] Score: ... | Explanation: ...\n"
+    )
+
+
+def parse_batch_response(response: str, batch_size: int) -> Dict[int, Tuple[float, str]]:
+    """
+    Parses a batched scoring response.
+
+    Returns:
+        A mapping from 0-based job index to (score, explanation). Items the LLM skipped
+        or numbered out of range are missing from the mapping.
+    """
+    results: Dict[int, Tuple[float, str]] = {}
+    if not isinstance(response, str):
+        return results
+    for number, score_text, explanation in _BATCH_LINE_PATTERN.findall(response):
+        index = int(number) - 1
+        if 0 <= index < batch_size and index not in results:
+            score = max(0.0, min(1.0, float(score_text)))
+            results[index] = (score, explanation.strip())
+    return results
+
+
+class ScoringBatcher:
+    """
+    Process-wide micro-batching queue for relevance scoring.
+
+    Jobs submitted by all concurrent requests are collected for up to `window_ms`, or
+    until `max_batch_size` jobs or `max_batch_tokens` estimated prompt tokens are queued,
+    and are then scored with a single batched prompt. Results are routed back to each
+    waiting caller. Jobs the LLM did not answer in the batch, and batches of one, are
+    scored with the caller's single-paper scorer instead.
+
+    Jobs are grouped by llm.client_fingerprint, so only clients with the same providers and
+    models share a batch, which is sent with the client of its first job.
+
+    A caller that is cancelled while waiting withdraws its job: queued jobs are dropped
+    from the next batch, and a batch or single-paper call whose callers have all gone
+    away is cancelled before it reaches the LLM.
+    """
+
+    def __init__(self, window_ms: float, max_batch_size: int, max_batch_tokens: int):
+        self.window_s = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._pending: Dict[str, List[ScoringJob]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    async def score(
+        self,
+        title: str,
+        authors: List[str],
+        abstract: str,
+        original_query: str,
+        client: Any,
+        single_scorer: SingleScorer,
+    ) -> Tuple[float, str]:
+        """Queues one paper for scoring and waits for its (score, explanation)."""
+        loop = asyncio.get_running_loop()
+        job = ScoringJob(
+            title=title,
+            authors=authors,
+            abstract=abstract,
+            original_query=original_query,
+            client=client,
+            single_scorer=single_scorer,
+            future=loop.create_future(),
+            deadline=deadline.get_deadline(),
+            flow=current_flow(),
+        )
+        if self.max_batch_size <= 1:
+            return await job.score_individually()
+
+        key = pipeline_key(llm.client_fingerprint(client))
+        queue = self._pending.setdefault(key, [])
+        queue.append(job)
+        if len(queue) >= self.max_batch_size or sum(j.estimated_tokens for j in queue) >= self.max_batch_tokens:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window_s, self._flush, key)
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            counter("scoring.jobs_cancelled").increment()
+            self._withdraw(key, job)
+            raise
+
+    def _withdraw(self, key: str, job: ScoringJob) -> None:
+        """Removes a cancelled job that is still waiting for its batch to be flushed."""
+        queue = self._pending.get(key)
+        if not queue:
+            return
+        remaining = [queued for queued in queue if queued is not job]
+        if len(remaining) == len(queue):
+            return
+        if remaining:
+            self._pending[key] = remaining
+        else:
+            del self._pending[key]
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+
+    def _flush(self, key: str) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        jobs = self._pending.pop(key, [])
+        if not jobs:
+            return
+        task = asyncio.get_running_loop().create_task(self._run_batch(jobs))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, jobs: List[ScoringJob]) -> None:
+        # Callers that gave up (e.g. a cancelled request) no longer need a score.
+        jobs = [job for job in jobs if not job.future.done()]
+        if not jobs:
+            counter("scoring.batches_skipped").increment()
+            return
+
+        results: Dict[int, Tuple[float, str]] = {}
+        if len(jobs) > 1:
+            deadlines = [job.deadline for job in jobs if job.deadline is not None]
+            # The batch may not outlive the most urgent request in it, and competes for
+            # LLM capacity with the priority of its highest-priority job.
+            flows = [job.flow for job in jobs if job.flow is not None]
+            batch_flow = max(flows, key=lambda flow: flow.weight) if flows else None
+            with deadline.deadline_at(min(deadlines) if deadlines else None), use_flow(batch_flow):
+                batch_call = asyncio.ensure_future(
+                    llm.generate_text(jobs[0].client, build_batch_prompt(jobs), stage="batch-score")
+                )
+            self._cancel_when_abandoned(batch_call, jobs)
+            try:
+                response = await batch_call
+                results = parse_batch_response(response, len(jobs))
+            except asyncio.CancelledError:
+                if not batch_call.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return  # Every caller of this batch went away.
+            except Exception as e:
+                logger.warning(f"Batched scoring of {len(jobs)} papers failed, scoring individually: {e}")
+            if len(results) < len(jobs):
+                logger.info(f"Batched scoring answered {len(results)}/{len(jobs)} papers")
+
+        unanswered = [job for index, job in enumerate(jobs) if index not in results and not job.future.done()]
+        for index, job in enumerate(jobs):
+            if index in results and not job.future.done():
+                job.future.set_result(results[index])
+        if unanswered:
+            await asyncio.gather(*(self._score_individually(job) for job in unanswered))
+
+    @staticmethod
+    def _cancel_when_abandoned(call: asyncio.Future, jobs: List[ScoringJob]) -> None:
+        """Cancels `call` as soon as the futures of all `jobs` have been cancelled."""
+        def on_job_done(_: asyncio.Future) -> None:
+            if not call.done() and all(job.future.cancelled() for job in jobs):
+                call.cancel()
+        for job in jobs:
+            job.future.add_done_callback(on_job_done)
+
+    async def _score_individually(self, job: ScoringJob) -> None:
+        with deadline.deadline_at(job.deadline), use_flow(job.flow):
+            call = asyncio.ensure_future(job.score_individually())
+        self._cancel_when_abandoned(call, [job])
+        try:
+            result = await call
+        except asyncio.CancelledError:
+            if not call.cancelled() or asyncio.current_task().cancelling():
+                raise
+            return
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+            return
+        if not job.future.done():
+            job.future.set_result(result)
+
+
+scoring_batcher = ScoringBatcher(
+    window_ms=SCORING_BATCH_WINDOW_MS,
+    max_batch_size=SCORING_BATCH_MAX_SIZE,
+    max_batch_tokens=SCORING_BATCH_MAX_TOKENS,
+)
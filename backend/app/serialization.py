@@ -0,0 +1,29 @@
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+def _default(obj: Any) -> Any:
+    # Pydantic models are unpacked one level; orjson serializes the field values
+    # (dataclasses, datetimes, nested models via this hook) natively.
+    if isinstance(obj, BaseModel):
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializes `obj` to UTF-8 JSON with orjson; accepts pydantic models and dataclasses."""
+    return orjson.dumps(obj, default=_default)
+
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson. Bytes content is sent as-is (e.g. already serialized or compressed)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
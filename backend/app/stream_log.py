@@ -0,0 +1,51 @@
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import STREAM_EVENT_LOG_RETENTION_S
+from backend.core.database import SessionLocal
+from backend.crud import stream_events as crud
+
+logger = logging.getLogger(__name__)
+
+
+class StreamEventLog:
+    """
+    Persists the events of stream sessions to SQLite so that a client can resume a stream
+    with Last-Event-ID even after the in-memory broadcast is gone.
+
+    Sessions older than `retention_s` are purged whenever a new session is opened.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = SessionLocal, retention_s: float = STREAM_EVENT_LOG_RETENTION_S):
+        self._session_factory = session_factory
+        self.retention_s = retention_s
+
+    async def _db(self, operation: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        async with self._session_factory() as db:
+            return await operation(db, *args)
+
+    async def open_session(self, session_id: str, key: str) -> None:
+        await self._db(crud.purge_sessions_older_than, self.retention_s)
+        await self._db(crud.create_session, session_id, key)
+
+    async def append(self, session_id: str, events: List[Tuple[int, str]]) -> None:
+        await self._db(crud.append_events, session_id, events)
+
+    async def close_session(self, session_id: str, status: str) -> None:
+        await self._db(crud.set_session_status, session_id, status)
+
+    async def replay(self, session_id: str, key: str, after_seq: int) -> Optional[Tuple[str, List[Tuple[int, str]]]]:
+        """
+        Returns the status of the session (running / completed / failed / cancelled) and its
+        logged events after `after_seq`, or None if the session is unknown or belongs to a
+        different pipeline key. The status is read first, so a session that is no longer
+        running has all of its events in the result.
+        """
+        async def load(db: AsyncSession) -> Optional[Tuple[str, List[Tuple[int, str]]]]:
+            session = await crud.get_session(db, session_id)
+            if session is None or session.key != key:
+                return None
+            return session.status, await crud.events_after(db, session_id, after_seq)
+        return await self._db(load)
@@ -0,0 +1,439 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.serialization import dumps
+from backend.core.config import (
+    ARXIV_SEARCH_CACHE_MEMORY_ENTRIES,
+    ARXIV_SEARCH_CACHE_TTL_S,
+    CACHE_LEASE_POLL_INTERVAL_S,
+    CACHE_LEASE_TTL_S,
+    LLM_RESPONSE_CACHE_MEMORY_BYTES,
+    LLM_RESPONSE_CACHE_TTL_S,
+    SCORE_CACHE_MEMORY_ENTRIES,
+    SCORE_CACHE_TTL_S,
+)
+from backend.core import deadline
+from backend.core.database import SessionLocal
+from backend.core.metrics import counter
+from backend.crud import cache_entries as crud
+from backend.crud import cache_leases
+from backend.crud import papers as papers_crud
+from backend.schemas.arxiv_schema import ArxivPaper
+
+logger = logging.getLogger(__name__)
+
+# Hits served from memory are written back to SQLite (for its LRU/LFU eviction) in batches.
+MEMORY_HIT_FLUSH_BATCH = 100
+
+_MISSING = object()
+# Result of an in-process computation that concurrent callers must not reuse.
+_NOT_SHARED = object()
+
+# Identifies this process in cache leases and in the invalidation log.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# (namespace, key or None for the whole namespace)
+InvalidationHook = Callable[[str, Optional[str]], None]
+
+
+class LRUCache:
+    """
+    Bounded in-process LRU map. Bounded by entry count and/or total size in bytes
+    (0 = no limit); every entry also expires after its own time to live.
+    """
+
+    def __init__(self, max_entries: int = 0, max_bytes: int = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """Returns the value for `key`, or _MISSING."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.pop(key)
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any, size: int, ttl_s: float) -> None:
+        self.pop(key)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        self._entries[key] = (value, size, time.monotonic() + ttl_s)
+        self.bytes += size
+        while (self.max_entries and len(self._entries) > self.max_entries) or (self.max_bytes and self.bytes > self.max_bytes):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+
+class JSONStore:
+    """SQLite tier storing each value as an orjson document in cache_entries."""
+
+    def __init__(self, decode: Callable[[Any], Any] = lambda value: value):
+        self._decode = decode
+
+    async def load(self, db: AsyncSession, namespace: str, key: str) -> Optional[Tuple[Any, int, float]]:
+        """Returns (value, size in bytes, seconds left), or None on a miss."""
+        entry = await crud.get_entry(db, namespace, key)
+        if entry is None:
+            return None
+        return self._decode(orjson.loads(entry.value)), len(entry.value), crud.seconds_left(entry)
+
+    async def save(self, db: AsyncSession, namespace: str, key: str, value: Any, ttl_s: float) -> int:
+        """Stores `value` in the caller's transaction and returns its size in bytes."""
+        data = dumps(value)
+        await crud.put_value(db, namespace, key, data, ttl_s, commit=False)
+        return len(data)
+
+
+class ArxivSearchStore:
+    """
+    SQLite tier of arXiv search results: the result's arXiv IDs are stored in
+    cache_entries and the papers themselves in the paper cache, so a paper returned by
+    several searches is stored once. A result is a miss once any of its papers has been
+    evicted from the paper cache.
+    """
+
+    async def load(self, db: AsyncSession, namespace: str, key: str) -> Optional[Tuple[Any, int, float]]:
+        entry = await crud.get_entry(db, namespace, key)
+        if entry is None:
+            return None
+        arxiv_ids = orjson.loads(entry.value)
+        papers = await papers_crud.get_papers(db, arxiv_ids)
+        if len(papers) < len(set(arxiv_ids)):
+            return None
+        results = [papers[arxiv_id].to_arxiv() for arxiv_id in arxiv_ids]
+        return results, len(dumps(results)), crud.seconds_left(entry)
+
+    async def save(self, db: AsyncSession, namespace: str, key: str, value: List[ArxivPaper], ttl_s: float) -> int:
+        rows = [papers_crud.paper_row(paper) for paper in value]
+        await papers_crud.upsert_papers(db, rows, origin=WORKER_ID)
+        await crud.put_value(db, namespace, key, dumps([row["arxiv_id"] for row in rows]), ttl_s, commit=False)
+        return len(dumps(value))
+
+
+class TieredCache:
+    """
+    Two-tier cache: a bounded in-process LRU in front of SQLite.
+
+    Lookups are served from memory without I/O or ORM objects when possible, and otherwise
+    from SQLite, which then refills the memory tier. Writes go through to both tiers.
+    `invalidate` drops keys (or the whole namespace) from both tiers and notifies the
+    registered invalidation hooks; `invalidate_local` only drops them from memory, e.g.
+    when another process has changed the SQLite tier.
+
+    `get_or_compute` computes a missing value once per process: concurrent callers await
+    the same computation. With `lease_computations`, meant for computations that are
+    expensive next to a few SQLite writes (LLM calls, arXiv requests), it also computes it
+    once across all workers sharing the SQLite file: other processes wait on its lease
+    (see CacheLease) and read the value from SQLite. Every write is logged so that other
+    processes drop the key from their memory tier (see CacheCoherence); a value is
+    stored, logged and its lease released in one transaction.
+
+    SQLite errors never fail the caller: a failed lookup is a miss, a failed write only
+    updates the memory tier and a failed lease is computed without one.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_s: float,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        store: Any = None,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+        lease_computations: bool = False,
+        lease_ttl_s: float = CACHE_LEASE_TTL_S,
+        lease_poll_interval_s: float = CACHE_LEASE_POLL_INTERVAL_S,
+        worker_id: str = WORKER_ID,
+    ):
+        self.namespace = namespace
+        self.ttl_s = ttl_s
+        self.lease_computations = lease_computations
+        self.lease_ttl_s = lease_ttl_s
+        self.lease_poll_interval_s = lease_poll_interval_s
+        self.worker_id = worker_id
+        self.memory = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._store = store or JSONStore()
+        self._session_factory = session_factory
+        self._hooks: List[InvalidationHook] = []
+        self._memory_hits: Dict[str, int] = {}
+        self._hit_flush: Optional[asyncio.Task] = None
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0
+
+    async def _db(self, operation: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        async with self._session_factory() as db:
+            return await operation(db, *args)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value for `key`, or None."""
+        if not self.enabled:
+            return None
+        value = self.memory.get(key)
+        if value is not _MISSING:
+            counter(f"cache.{self.namespace}.memory_hits").increment()
+            self._record_memory_hit(key)
+            return value
+        value = await self._load(key)
+        counter(f"cache.{self.namespace}.{'misses' if value is None else 'db_hits'}").increment()
+        return value
+
+    async def _load(self, key: str) -> Optional[Any]:
+        # Reads the SQLite tier and refills the memory tier on a hit.
+        try:
+            loaded = await self._db(self._store.load, self.namespace, key)
+        except Exception as e:
+            logger.warning(f"Cache {self.namespace} lookup failed: {e}")
+            return None
+        if loaded is None:
+            return None
+        value, size, ttl_s = loaded
+        self.memory.put(key, value, size, min(ttl_s, self.ttl_s))
+        return value
+
+    async def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        await self._put(key, value, release_lease=False)
+
+    async def _put(self, key: str, value: Any, release_lease: bool) -> None:
+        # Stores the value, logs the write and releases our lease on `key` in one transaction.
+        async def save(db: AsyncSession) -> int:
+            size = await self._store.save(db, self.namespace, key, value, self.ttl_s)
+            await cache_leases.log_invalidation(db, self.namespace, key, self.worker_id, commit=False)
+            if release_lease:
+                await cache_leases.release(db, self.namespace, key, self.worker_id, commit=False)
+            await db.commit()
+            return size
+        try:
+            size = await self._db(save)
+        except Exception as e:
+            logger.warning(f"Cache {self.namespace} write failed: {e}")
+            size = len(dumps(value))
+            if release_lease:
+                await self._release(key)
+        self.memory.put(key, value, size, self.ttl_s)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        Returns the cached value for `key`, computing and caching it on a miss. The value
+        is computed at most once at a time per key across all workers; values for which
+        `cacheable` is False (e.g. failures) are returned but not stored. Only cacheable
+        values are shared with concurrent callers: after a failure or an exception (e.g. a
+        timeout under the computing caller's deadline), the waiting callers compute the
+        value again themselves, under their own deadlines. A caller never waits on another
+        caller's computation past its own deadline: once that is spent it calls `compute`
+        itself, which fails fast in whatever way `compute` reports an exhausted budget.
+        """
+        if not self.enabled:
+            return await compute()
+        value = await self.get(key)
+        if value is not None:
+            return value
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                break
+            try:
+                async with asyncio.timeout(deadline.remaining()):
+                    value = await asyncio.shield(flight)
+            except TimeoutError:
+                return await self._give_up_waiting(key, compute, cacheable)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                continue  # the computing caller was cancelled; the next waiter takes over
+            if value is not _NOT_SHARED:
+                counter(f"cache.{self.namespace}.shared_in_process").increment()
+                return value
+            # Not shareable (a failure or an exception of the computing caller): the next waiter computes it again.
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            if self.lease_computations:
+                value = await self._compute_once(key, compute, cacheable)
+            else:
+                value = await self._compute(key, compute, cacheable)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception:
+            flight.set_result(_NOT_SHARED)
+            raise
+        else:
+            flight.set_result(value if value is not None and cacheable(value) else _NOT_SHARED)
+            return value
+        finally:
+            del self._flights[key]
+
+    async def _compute_once(self, key: str, compute: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool]) -> Any:
+        # Waits while another worker holds the lease on `key`, then returns the value it
+        # stored; computes the value itself once it gets the lease (the previous holder
+        # finished without a cacheable value, or crashed and its lease expired).
+        waited = False
+        while True:
+            try:
+                # While another worker holds the lease, poll with reads rather than write attempts.
+                held = waited and await self._db(cache_leases.is_held, self.namespace, key)
+                leased = not held and await self._db(
+                    cache_leases.try_acquire, self.namespace, key, self.worker_id, self.lease_ttl_s
+                )
+            except Exception as e:
+                logger.warning(f"Cache {self.namespace} lease failed, computing without one: {e}")
+                return await self._compute(key, compute, cacheable)
+            if leased:
+                if waited:
+                    # The value may have been stored between our last lookup and the lease.
+                    value = await self._load(key)
+                    if value is not None:
+                        await self._release(key)
+                        return value
+                break
+            waited = True
+            left = deadline.remaining()
+            if left is not None and left <= 0:
+                return await self._give_up_waiting(key, compute, cacheable)
+            await asyncio.sleep(self.lease_poll_interval_s if left is None else min(self.lease_poll_interval_s, left))
+            value = await self._load(key)
+            if value is not None:
+                counter(f"cache.{self.namespace}.shared_across_workers").increment()
+                return value
+        renewal = asyncio.get_running_loop().create_task(self._renew(key))
+        try:
+            return await self._compute(key, compute, cacheable, leased=True)
+        finally:
+            renewal.cancel()
+
+    async def _compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool], leased: bool = False
+    ) -> Any:
+        counter(f"cache.{self.namespace}.computed").increment()
+        try:
+            value = await compute()
+        except BaseException:
+            if leased:
+                await asyncio.shield(self._release(key))
+            raise
+        if value is not None and cacheable(value):
+            await asyncio.shield(self._put(key, value, release_lease=leased))
+        elif leased:
+            await asyncio.shield(self._release(key))
+        return value
+
+    async def _give_up_waiting(self, key: str, compute: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool]) -> Any:
+        # The caller's deadline ran out while another caller or worker was computing `key`.
+        counter(f"cache.{self.namespace}.wait_timeouts").increment()
+        return await self._compute(key, compute, cacheable)
+
+    async def _renew(self, key: str) -> None:
+        # Keeps the lease alive while a long computation (e.g. waiting for an LLM slot) runs.
+        while True:
+            await asyncio.sleep(self.lease_ttl_s / 3)
+            try:
+                await self._db(cache_leases.renew, self.namespace, key, self.worker_id, self.lease_ttl_s)
+            except Exception as e:
+                logger.warning(f"Cache {self.namespace} could not renew a lease: {e}")
+
+    async def _release(self, key: str) -> None:
+        try:
+            await self._db(cache_leases.release, self.namespace, key, self.worker_id)
+        except Exception as e:
+            logger.warning(f"Cache {self.namespace} could not release a lease: {e}")
+
+    async def invalidate(self, key: Optional[str] = None) -> None:
+        """Drops `key` (every key if None) from both tiers, in every worker."""
+        self.invalidate_local(key)
+        async def delete(db: AsyncSession) -> None:
+            await crud.delete_values(db, self.namespace, None if key is None else [key])
+            await cache_leases.log_invalidation(db, self.namespace, key, self.worker_id)
+        await self._db(delete)
+        for hook in self._hooks:
+            hook(self.namespace, key)
+
+    def invalidate_local(self, key: Optional[str] = None) -> None:
+        """Drops `key` (every key if None) from the memory tier only, e.g. after another worker wrote it."""
+        if key is None:
+            self.memory.clear()
+        else:
+            self.memory.pop(key)
+
+    def add_invalidation_hook(self, hook: InvalidationHook) -> None:
+        self._hooks.append(hook)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.bytes,
+            "memory_evictions": self.memory.evictions,
+            "computing": len(self._flights),
+            "ttl_s": self.ttl_s,
+        }
+
+    def _record_memory_hit(self, key: str) -> None:
+        self._memory_hits[key] = self._memory_hits.get(key, 0) + 1
+        if len(self._memory_hits) >= MEMORY_HIT_FLUSH_BATCH and (self._hit_flush is None or self._hit_flush.done()):
+            self._hit_flush = asyncio.get_running_loop().create_task(self.flush_memory_hits())
+
+    async def flush_memory_hits(self) -> None:
+        """Writes the hits served from memory back to the SQLite access statistics."""
+        hits, self._memory_hits = self._memory_hits, {}
+        if not hits:
+            return
+        try:
+            await self._db(crud.record_hits, self.namespace, hits)
+        except Exception as e:
+            logger.warning(f"Cache {self.namespace} could not record {len(hits)} memory hits: {e}")
+
+
+arxiv_search_cache = TieredCache(
+    "arxiv_searches",
+    ttl_s=ARXIV_SEARCH_CACHE_TTL_S,
+    max_entries=ARXIV_SEARCH_CACHE_MEMORY_ENTRIES,
+    store=ArxivSearchStore(),
+    lease_computations=True,
+)
+# Scores are not leased: a score is computed by LLM calls that llm_response_cache already
+# leases, so a score miss does not pay for a second lease.
+score_cache = TieredCache(
+    "scores", ttl_s=SCORE_CACHE_TTL_S, max_entries=SCORE_CACHE_MEMORY_ENTRIES, store=JSONStore(decode=tuple)
+)
+llm_response_cache = TieredCache(
+    "llm_responses", ttl_s=LLM_RESPONSE_CACHE_TTL_S, max_bytes=LLM_RESPONSE_CACHE_MEMORY_BYTES, lease_computations=True
+)
@@ -0,0 +1,93 @@
+"""
+Storage cost of cached paper abstracts with each available codec.
+
+Generates ABSTRACTS synthetic abstracts with the vocabulary and phrasing typical of arXiv
+abstracts, trains a shared dictionary on a sample of them, and reports bytes per abstract,
+the compression ratio, decode time, and the projected size of a million-paper corpus for
+raw UTF-8, each codec on its own, and each codec with the trained dictionary.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_abstract_storage [--abstracts 20000] [--sample 5000]
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from backend.core.abstract_codec import AbstractCodec, available_codecs
+from backend.core.config import PAPER_ABSTRACT_DICTIONARY_BYTES
+
+_OPENINGS = [
+    "In this paper, we propose", "We present", "This work introduces", "We study", "Recent advances in {topic} have led to",
+    "We investigate", "Despite the success of {topic},", "Motivated by", "We introduce a novel", "This paper addresses",
+]
+_TOPICS = [
+    "large language models", "graph neural networks", "retrieval augmented generation", "reinforcement learning",
+    "diffusion models", "federated learning", "contrastive learning", "vision transformers", "quantum error correction",
+    "neural machine translation", "causal inference", "semi-supervised learning", "speech recognition",
+]
+_CLAIMS = [
+    "a simple yet effective method for {topic}", "a framework that improves {topic} on standard benchmarks",
+    "a theoretical analysis of {topic}", "an efficient algorithm for {topic} with provable guarantees",
+    "a new dataset for evaluating {topic}", "a scalable approach to {topic} under limited supervision",
+]
+_RESULTS = [
+    "Experiments on {n} benchmark datasets demonstrate that our approach outperforms state-of-the-art baselines.",
+    "Extensive experiments show that the proposed method achieves significant improvements over existing methods.",
+    "Our results suggest that {topic} can be improved substantially with {m}x less compute.",
+    "We further provide an ablation study and release our code and models to facilitate future research.",
+    "Empirical results on real-world data confirm the effectiveness and robustness of the proposed approach.",
+]
+
+
+def synthetic_abstracts(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    abstracts = []
+    for _ in range(count):
+        topic, other = rng.sample(_TOPICS, 2)
+        sentences = [
+            f"{rng.choice(_OPENINGS).format(topic=other)} {rng.choice(_CLAIMS).format(topic=topic)}.",
+            f"Unlike prior work on {other}, our method leverages {rng.choice(_TOPICS)} to capture "
+            f"{rng.choice(['long-range dependencies', 'structural information', 'uncertainty', 'domain shift'])}.",
+        ]
+        sentences += [rng.choice(_RESULTS).format(topic=topic, n=rng.randint(2, 12), m=rng.randint(2, 50)) for _ in range(rng.randint(2, 4))]
+        abstracts.append(" ".join(sentences))
+    return abstracts
+
+
+def _measure(codec: AbstractCodec, abstracts: List[str]) -> Dict[str, float]:
+    encoded = [codec.compress(text) for text in abstracts]
+    started = time.perf_counter()
+    for data, tag in encoded:
+        codec.decompress(data, tag)
+    decode_s = time.perf_counter() - started
+    stored = sum(len(data) for data, _ in encoded)
+    return {"bytes_per_abstract": stored / len(abstracts), "decode_us": decode_s / len(abstracts) * 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--abstracts", type=int, default=20000)
+    parser.add_argument("--sample", type=int, default=5000)
+    parser.add_argument("--dictionary-bytes", type=int, default=PAPER_ABSTRACT_DICTIONARY_BYTES)
+    args = parser.parse_args()
+
+    abstracts = synthetic_abstracts(args.abstracts)
+    raw = sum(len(text.encode("utf-8")) for text in abstracts) / len(abstracts)
+    print(f"{args.abstracts} abstracts, {raw:.0f} bytes each on average")
+    print(f"{'codec':<12} {'B/abstract':>11} {'ratio':>7} {'decode us':>10} {'1M papers MiB':>14}")
+    print(f"{'raw':<12} {raw:>11.0f} {1.0:>7.2f} {0.0:>10.1f} {raw * 1e6 / 2**20:>14.0f}")
+    for name in available_codecs():
+        codec = AbstractCodec(name)
+        for label in (name, f"{name}+dict"):
+            if label.endswith("+dict"):
+                dictionary = codec.train_dictionary(abstracts[:args.sample], args.dictionary_bytes)
+                codec.register_dictionary(1, name, dictionary, activate=True)
+            stats = _measure(codec, abstracts)
+            size = stats["bytes_per_abstract"]
+            print(f"{label:<12} {size:>11.0f} {raw / size:>7.2f} {stats['decode_us']:>10.1f} {size * 1e6 / 2**20:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Micro-benchmark of the per-paper work in the research tree pipeline.
+
+Compares the previous representation (ArxivPaper -> metadata dict -> pydantic ScoredPaper ->
+model_dump -> json.dumps) with the ScoredPaper dataclass record serialized by orjson, on a
+tree of NODES x PAPERS_PER_NODE papers. Both the stream path (one "papers" event per node)
+and the non-streaming response body are measured.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_paper_pipeline [--nodes 10] [--papers-per-node 1000]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from backend.api.endpoints.research_tree import QueryNode, ScoredPaper, SearchTreeResponse, _sse
+from backend.app.serialization import dumps
+from backend.schemas.arxiv_schema import ArxivAuthor, ArxivPaper
+
+
+class LegacyScoredPaper(BaseModel):
+    """The pydantic ScoredPaper model the pipeline used before the dataclass record."""
+    title: str
+    authors: List[str]
+    abstract: str
+    published_date: datetime
+    url: str
+    categories: List[str]
+    arxiv_id: str
+    relevance_score: float
+    relevance_explanation: str
+    scored: bool = True
+    provisional_rank: Optional[int] = None
+
+
+class LegacyQueryNode(BaseModel):
+    query: str
+    description: str
+    papers: List[LegacyScoredPaper]
+    paper_count: int
+
+
+class LegacySearchTreeResponse(BaseModel):
+    original_query: str
+    research_goal: str
+    query_nodes: List[LegacyQueryNode]
+    total_papers: int
+    total_unique_papers: int
+
+
+def _arxiv_results(nodes: int, papers_per_node: int) -> List[List[ArxivPaper]]:
+    published = datetime(2024, 1, 1)
+    return [
+        [
+            ArxivPaper(
+                entry_id=f"http://arxiv.org/abs/2401.{node:02d}{index:04d}v1",
+                title=f"Paper {node}-{index} on retrieval augmented generation",
+                authors=[ArxivAuthor(name=f"Author {n}") for n in range(4)],
+                summary="We study the relevance of retrieved passages. " * 20,
+                published=published + timedelta(minutes=index),
+                updated=published + timedelta(minutes=index),
+                pdf_url=f"http://arxiv.org/pdf/2401.{node:02d}{index:04d}v1",
+                categories=["cs.CL", "cs.IR"],
+            )
+            for index in range(papers_per_node)
+        ]
+        for node in range(nodes)
+    ]
+
+
+def _legacy_metadata(result: ArxivPaper) -> Dict[str, Any]:
+    return {
+        'title': result.title,
+        'authors': [author.name for author in result.authors],
+        'abstract': result.summary or "",
+        'published_date': result.published,
+        'url': result.pdf_url,
+        'categories': result.categories,
+        'arxiv_id': result.entry_id.split('/')[-1],
+    }
+
+
+def legacy_pipeline(results: List[List[ArxivPaper]]) -> int:
+    size = 0
+    nodes = []
+    for index, node_results in enumerate(results):
+        metadata = [_legacy_metadata(result) for result in node_results]
+        papers = [LegacyScoredPaper(**paper, relevance_score=0.5, relevance_explanation="ok") for paper in metadata]
+        event = {'type': 'papers', 'query': f"q{index}", 'papers': [p.model_dump(mode="json") for p in papers]}
+        size += len(f"data: {json.dumps(event, default=str)}\n\n")
+        nodes.append(LegacyQueryNode(query=f"q{index}", description="d", papers=papers, paper_count=len(papers)))
+    response = LegacySearchTreeResponse(
+        original_query="q", research_goal="g", query_nodes=nodes,
+        total_papers=sum(node.paper_count for node in nodes), total_unique_papers=0
+    )
+    return size + len(response.model_dump_json())
+
+
+def record_pipeline(results: List[List[ArxivPaper]]) -> int:
+    size = 0
+    nodes = []
+    for index, node_results in enumerate(results):
+        papers = [ScoredPaper.from_arxiv(result) for result in node_results]
+        for paper in papers:
+            paper.relevance_score, paper.relevance_explanation, paper.scored = 0.5, "ok", True
+        size += len(_sse({'type': 'papers', 'query': f"q{index}", 'papers': papers}))
+        nodes.append(QueryNode(query=f"q{index}", description="d", papers=papers, paper_count=len(papers)))
+    response = SearchTreeResponse(
+        original_query="q", research_goal="g", query_nodes=nodes,
+        total_papers=sum(node.paper_count for node in nodes), total_unique_papers=0
+    )
+    return size + len(dumps(response))
+
+
+def _measure(run: Callable[[List[List[ArxivPaper]]], int], results: List[List[ArxivPaper]], repeat: int) -> Dict[str, float]:
+    papers = sum(len(node) for node in results)
+    run(results)  # warm-up
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        run(results)
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    run(results)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "us_per_paper": min(timings) / papers * 1e6,
+        "peak_kib": peak / 1024,
+        "peak_bytes_per_paper": peak / papers,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=10)
+    parser.add_argument("--papers-per-node", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = _arxiv_results(args.nodes, args.papers_per_node)
+    print(f"{args.nodes * args.papers_per_node} papers in {args.nodes} nodes, best of {args.repeat}")
+    print(f"{'path':<10} {'us/paper':>10} {'peak KiB':>12} {'peak B/paper':>14}")
+    for name, run in (("legacy", legacy_pipeline), ("record", record_pipeline)):
+        stats = _measure(run, results, args.repeat)
+        print(f"{name:<10} {stats['us_per_paper']:>10.1f} {stats['peak_kib']:>12.0f} {stats['peak_bytes_per_paper']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
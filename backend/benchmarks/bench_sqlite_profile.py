@@ -0,0 +1,167 @@
+"""
+Benchmark of the SQLite paper cache with the default and the tuned connection profile.
+
+Each profile gets a fresh database file. Measured:
+
+- write throughput of caching papers one ORM flush and commit at a time (the previous
+  pattern) versus crud.papers.upsert_papers (multi-row INSERT ... ON CONFLICT in one
+  transaction), on new papers and again on papers that are already cached;
+- read throughput and worst read latency of READERS concurrent lookups while a writer
+  upserts small batches in a loop (rollback journal readers wait on the writer's lock,
+  WAL readers do not).
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_sqlite_profile [--papers 5000] [--readers 8] [--seconds 3]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from backend.core.database import Base, configure_sqlite
+from backend.crud.papers import get_papers, upsert_papers
+from backend.models.paper import Paper
+
+# Busy timeout used for the default profile too, so that its readers wait instead of failing.
+DEFAULT_PROFILE_BUSY_TIMEOUT_S = 30
+
+
+def _rows(count: int, revision: int = 0) -> List[Dict[str, Any]]:
+    published = datetime(2024, 1, 1)
+    return [
+        {
+            "arxiv_id": f"2401.{index:05d}",
+            "title": f"Paper {index} on retrieval augmented generation (rev {revision})",
+            "authors": [f"Author {n}" for n in range(4)],
+            "abstract": "We study the relevance of retrieved passages. " * 20,
+            "published_date": published + timedelta(minutes=index),
+            "url": f"http://arxiv.org/pdf/2401.{index:05d}v1",
+        }
+        for index in range(count)
+    ]
+
+
+async def _engine(path: str, tuned: bool) -> AsyncEngine:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", connect_args={"timeout": DEFAULT_PROFILE_BUSY_TIMEOUT_S}
+    )
+    if tuned:
+        configure_sqlite(engine, wal=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def _per_row_writes(session_factory: async_sessionmaker, rows: List[Dict[str, Any]]) -> None:
+    async with session_factory() as db:
+        for row in rows:
+            paper = await db.scalar(select(Paper).where(Paper.arxiv_id == row["arxiv_id"]))
+            if paper is None:
+                db.add(Paper(**row))
+            else:
+                for column, value in row.items():
+                    setattr(paper, column, value)
+            await db.commit()
+
+
+async def _bulk_writes(session_factory: async_sessionmaker, rows: List[Dict[str, Any]]) -> None:
+    async with session_factory() as db:
+        await upsert_papers(db, rows)
+
+
+async def _writes(path: str, tuned: bool, papers: int) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for name, write in (("per_row", _per_row_writes), ("bulk", _bulk_writes)):
+        if os.path.exists(path):
+            os.remove(path)
+        engine = await _engine(path, tuned)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        for phase, revision in (("insert", 0), ("update", 1)):
+            rows = _rows(papers, revision)
+            started = time.perf_counter()
+            await write(session_factory, rows)
+            results[f"{name}_{phase}"] = papers / (time.perf_counter() - started)
+        await engine.dispose()
+    return results
+
+
+async def _mixed(path: str, tuned: bool, papers: int, readers: int, seconds: float) -> Dict[str, float]:
+    if os.path.exists(path):
+        os.remove(path)
+    engine = await _engine(path, tuned)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    await _bulk_writes(session_factory, _rows(papers))
+    ids = [row["arxiv_id"] for row in _rows(papers)]
+    stop_at = time.perf_counter() + seconds
+    reads: List[float] = []
+    writes = 0
+
+    async def reader(offset: int) -> None:
+        index = offset
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            async with session_factory() as db:
+                await get_papers(db, ids[index % papers:index % papers + 20])
+            reads.append(time.perf_counter() - started)
+            index += 97
+
+    async def writer() -> None:
+        nonlocal writes
+        revision = 0
+        while time.perf_counter() < stop_at:
+            revision += 1
+            start = (revision * 50) % papers
+            async with session_factory() as db:
+                await upsert_papers(db, _rows(papers, revision)[start:start + 50])
+            writes += 1
+
+    await asyncio.gather(writer(), *(reader(n * 13) for n in range(readers)))
+    await engine.dispose()
+    reads.sort()
+    return {
+        "reads_per_s": len(reads) / seconds,
+        "read_p99_ms": reads[int(len(reads) * 0.99) - 1] * 1000 if reads else 0.0,
+        "read_max_ms": reads[-1] * 1000 if reads else 0.0,
+        "write_batches_per_s": writes / seconds,
+    }
+
+
+async def run(papers: int, readers: int, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"writes: {papers} papers, papers/s")
+        print(f"{'profile':<9} {'per-row ins':>12} {'per-row upd':>12} {'bulk ins':>10} {'bulk upd':>10}")
+        for profile, tuned in (("default", False), ("tuned", True)):
+            stats = await _writes(os.path.join(directory, f"{profile}-writes.db"), tuned, papers)
+            print(
+                f"{profile:<9} {stats['per_row_insert']:>12.0f} {stats['per_row_update']:>12.0f}"
+                f" {stats['bulk_insert']:>10.0f} {stats['bulk_update']:>10.0f}"
+            )
+
+        print(f"\nmixed: {readers} readers + 1 writer (50-paper upserts) for {seconds:.0f}s")
+        print(f"{'profile':<9} {'reads/s':>10} {'read p99 ms':>12} {'read max ms':>12} {'writes/s':>10}")
+        for profile, tuned in (("default", False), ("tuned", True)):
+            stats = await _mixed(os.path.join(directory, f"{profile}-mixed.db"), tuned, papers, readers, seconds)
+            print(
+                f"{profile:<9} {stats['reads_per_s']:>10.0f} {stats['read_p99_ms']:>12.1f}"
+                f" {stats['read_max_ms']:>12.1f} {stats['write_batches_per_s']:>10.0f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.papers, args.readers, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
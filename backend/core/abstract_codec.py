@@ -0,0 +1,170 @@
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Optional: without it, abstracts are compressed with zlib.
+    zstandard = None
+
+from backend.core.config import PAPER_ABSTRACT_CODEC, PAPER_ABSTRACT_COMPRESSION_LEVEL
+
+# zlib only looks back 32 KiB, so a larger preset dictionary would be partly unused.
+ZLIB_MAX_DICTIONARY_BYTES = 32 * 1024
+
+_WORD_PATTERN = re.compile(r"\S+\s*")
+
+
+def available_codecs() -> Tuple[str, ...]:
+    """Codecs this process can write, in order of preference."""
+    return ("zstd", "zlib") if zstandard is not None else ("zlib",)
+
+
+def resolve_codec(name: str) -> str:
+    """Maps a configured codec name ("auto", "zstd", "zlib") to one that is available."""
+    if name == "auto":
+        return available_codecs()[0]
+    if name not in ("zstd", "zlib"):
+        raise ValueError(f"Unknown abstract codec '{name}'. Supported: auto, zstd, zlib.")
+    if name not in available_codecs():
+        raise ValueError("The zstd abstract codec needs the 'zstandard' package.")
+    return name
+
+
+def _zlib_dictionary(samples: List[str], size: int) -> bytes:
+    # zlib has no dictionary trainer: keep the word sequences that cover the most bytes
+    # across samples. The most valuable ones go last, where back-references are cheapest.
+    size = min(size, ZLIB_MAX_DICTIONARY_BYTES)
+    counts: Counter = Counter()
+    for sample in samples:
+        words = _WORD_PATTERN.findall(sample)
+        for length in (1, 2, 3, 4):
+            for start in range(len(words) - length + 1):
+                counts["".join(words[start:start + length])] += 1
+    chosen: List[bytes] = []
+    used = 0
+    for phrase, count in sorted(counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True):
+        if count < 2:
+            break
+        encoded = phrase.encode("utf-8")
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+class AbstractCodec:
+    """
+    Compresses paper abstracts for storage in the paper cache.
+
+    Every compressed value is stored together with a codec tag: "raw" (stored as UTF-8
+    because compression did not help), "zlib", "zstd", or "<codec>:<dictionary id>" when a
+    shared dictionary trained from cached abstracts was used. Short texts such as
+    abstracts compress much better with a shared dictionary. Dictionaries must be
+    registered before values tagged with them can be decompressed.
+    """
+
+    def __init__(self, codec: str = "auto", level: int = PAPER_ABSTRACT_COMPRESSION_LEVEL):
+        self.codec = resolve_codec(codec)
+        self.level = level
+        self.active_dictionary: Optional[int] = None
+        self._dictionaries: Dict[int, Tuple[str, bytes]] = {}
+        self._lock = threading.Lock()
+        # zstd (de)compressors are not thread-safe, so each thread gets its own per dictionary.
+        self._zstd_compressors: Dict[Tuple[int, Optional[int]], Any] = {}
+        self._zstd_decompressors: Dict[Tuple[int, Optional[int]], Any] = {}
+
+    def register_dictionary(self, dictionary_id: int, codec: str, data: bytes, activate: bool = False) -> None:
+        """Makes a stored dictionary usable; `activate` uses it for new values of its codec."""
+        with self._lock:
+            self._dictionaries[dictionary_id] = (codec, data)
+            for cache in (self._zstd_compressors, self._zstd_decompressors):
+                for key in [key for key in cache if key[1] == dictionary_id]:
+                    del cache[key]
+            if activate and codec == self.codec:
+                self.active_dictionary = dictionary_id
+
+    @property
+    def current_tag(self) -> str:
+        """Tag of values compressed with the current codec and active dictionary."""
+        return self.codec if self.active_dictionary is None else f"{self.codec}:{self.active_dictionary}"
+
+    def train_dictionary(self, samples: Iterable[str], size: int) -> bytes:
+        """Builds a shared dictionary for the current codec from sample abstracts."""
+        texts = [sample for sample in samples if sample]
+        if not texts:
+            raise ValueError("At least one non-empty sample is needed to train a dictionary.")
+        if self.codec == "zstd":
+            return zstandard.train_dictionary(size, [text.encode("utf-8") for text in texts]).as_bytes()
+        return _zlib_dictionary(texts, size)
+
+    def compress(self, text: Optional[str]) -> Tuple[Optional[bytes], Optional[str]]:
+        """Returns (data, codec tag) for `text`; (None, None) if there is no text."""
+        if text is None:
+            return None, None
+        raw = text.encode("utf-8")
+        dictionary_id, tag = self.active_dictionary, self.current_tag
+        if self.codec == "zstd":
+            data = self._zstd_compressor(dictionary_id).compress(raw)
+        else:
+            compressor = (
+                zlib.compressobj(self.level, zdict=self._dictionary(dictionary_id))
+                if dictionary_id is not None else zlib.compressobj(self.level)
+            )
+            data = compressor.compress(raw) + compressor.flush()
+        if len(data) >= len(raw):
+            return raw, "raw"
+        return data, tag
+
+    def decompress(self, data: Optional[bytes], tag: Optional[str]) -> Optional[str]:
+        if data is None:
+            return None
+        codec, _, dictionary = (tag or "raw").partition(":")
+        dictionary_id = int(dictionary) if dictionary else None
+        if codec == "raw":
+            raw = data
+        elif codec == "zlib":
+            decompressor = (
+                zlib.decompressobj(zdict=self._dictionary(dictionary_id))
+                if dictionary_id is not None else zlib.decompressobj()
+            )
+            raw = decompressor.decompress(data) + decompressor.flush()
+        elif codec == "zstd":
+            if zstandard is None:
+                raise ValueError("Reading zstd-compressed abstracts needs the 'zstandard' package.")
+            raw = self._zstd_decompressor(dictionary_id).decompress(data)
+        else:
+            raise ValueError(f"Unknown abstract codec tag '{tag}'.")
+        return raw.decode("utf-8")
+
+    def _dictionary(self, dictionary_id: int) -> bytes:
+        try:
+            return self._dictionaries[dictionary_id][1]
+        except KeyError:
+            raise LookupError(f"Compression dictionary {dictionary_id} is not loaded.") from None
+
+    def _zstd_compressor(self, dictionary_id: Optional[int]):
+        with self._lock:
+            key = (threading.get_ident(), dictionary_id)
+            compressor = self._zstd_compressors.get(key)
+            if compressor is None:
+                dict_data = None if dictionary_id is None else zstandard.ZstdCompressionDict(self._dictionary(dictionary_id))
+                compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data)
+                self._zstd_compressors[key] = compressor
+            return compressor
+
+    def _zstd_decompressor(self, dictionary_id: Optional[int]):
+        with self._lock:
+            key = (threading.get_ident(), dictionary_id)
+            decompressor = self._zstd_decompressors.get(key)
+            if decompressor is None:
+                dict_data = None if dictionary_id is None else zstandard.ZstdCompressionDict(self._dictionary(dictionary_id))
+                decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+                self._zstd_decompressors[key] = decompressor
+            return decompressor
+
+
+abstract_codec = AbstractCodec(PAPER_ABSTRACT_CODEC)
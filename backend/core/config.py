@@ -1,4 +1,6 @@
 import os
+import json
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -18,11 +20,213 @@ def get_api_provider() -> str:
         return "ollama"
     return "gemini"
 
+# Per-stage LLM routing
+# Pipeline stages that can be routed to their own provider/model.
+LLM_STAGES = ("plan", "score", "batch-score", "explain")
+
+def get_llm_routes() -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Reads the per-stage LLM routing table from the LLM_ROUTES environment variable.
+
+    LLM_ROUTES is a JSON object mapping a pipeline stage ("plan", "score",
+    "batch-score", "explain") to an ordered fallback chain of targets, e.g.::
+
+        {"plan": [{"provider": "gemini", "model": "gemini-2.5-pro"}],
+         "score": [{"provider": "ollama", "model": "llama3.2:1b", "slo_ms": 1500},
+                   {"provider": "gemini", "model": "gemini-2.5-flash"}]}
+
+    "model" and "slo_ms" are optional. Stages that are not listed use the "plan" chain,
+    which defaults to API_PROVIDER with its default model.
+
+    Returns:
+        The routing table, or None if LLM_ROUTES is not set.
+
+    Raises:
+        ValueError: If LLM_ROUTES is not valid JSON or names an unknown stage or provider.
+    """
+    raw = os.getenv("LLM_ROUTES")
+    if not raw:
+        return None
+    try:
+        routes = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"LLM_ROUTES is not valid JSON: {e}")
+    if not isinstance(routes, dict):
+        raise ValueError("LLM_ROUTES must be a JSON object mapping stages to target lists.")
+
+    for stage, targets in routes.items():
+        if stage not in LLM_STAGES:
+            raise ValueError(f"Unknown stage '{stage}' in LLM_ROUTES. Supported stages: {', '.join(LLM_STAGES)}.")
+        if not isinstance(targets, list) or not targets:
+            raise ValueError(f"LLM_ROUTES['{stage}'] must be a non-empty list of targets.")
+        for target in targets:
+            if not isinstance(target, dict) or str(target.get("provider", "")).lower() not in ("gemini", "ollama"):
+                raise ValueError(f"Each LLM_ROUTES['{stage}'] target needs a 'provider' of 'gemini' or 'ollama'.")
+            target["provider"] = target["provider"].lower()
+    routes.setdefault("plan", [{"provider": get_api_provider()}])
+    return routes
+
 # API Keys and Base URLs (can be imported by respective clients)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
 OLLAMA_API_KEY = os.getenv("OLLAMA_API_KEY", "ollama")
 
+# Timeouts (seconds) for a single downstream call. A request's own time budget
+# (ResearchTreeRequest.time_budget_ms) can only shorten these.
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("LLM_REQUEST_TIMEOUT_S", "60"))
+ARXIV_REQUEST_TIMEOUT_S = float(os.getenv("ARXIV_REQUEST_TIMEOUT_S", "30"))
+
+# Hedged LLM requests: when the primary call is slower than the observed
+# LLM_HEDGE_QUANTILE latency, a duplicate is sent to LLM_HEDGE_PROVIDER
+# (defaults to the primary provider) using LLM_HEDGE_MODEL.
+# Hedging is disabled unless at least one of the two is set.
+LLM_HEDGE_PROVIDER = os.getenv("LLM_HEDGE_PROVIDER")
+LLM_HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL")
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Per-stage LLM routing: latencies older than this many seconds no longer count towards a
+# target's p95, so a target demoted for exceeding its SLO is tried in order again once
+# its slow samples have aged out.
+LLM_ROUTE_LATENCY_MAX_AGE_S = float(os.getenv("LLM_ROUTE_LATENCY_MAX_AGE_S", "300"))
+
+# Cross-request micro-batching of relevance scoring. Pending (paper, query) jobs are
+# collected for up to SCORING_BATCH_WINDOW_MS, or until SCORING_BATCH_MAX_SIZE jobs or
+# SCORING_BATCH_MAX_TOKENS estimated prompt tokens are queued, and then scored in one
+# prompt. SCORING_BATCH_MAX_SIZE=1 disables batching.
+SCORING_BATCH_WINDOW_MS = float(os.getenv("SCORING_BATCH_WINDOW_MS", "10"))
+SCORING_BATCH_MAX_SIZE = int(os.getenv("SCORING_BATCH_MAX_SIZE", "8"))
+SCORING_BATCH_MAX_TOKENS = int(os.getenv("SCORING_BATCH_MAX_TOKENS", "6000"))
+
+# Research tree streaming: idle connections get an SSE comment every
+# SSE_HEARTBEAT_INTERVAL_S seconds, and the live global top-k snapshot is sent at most
+# every TOP_K_SNAPSHOT_INTERVAL_S seconds while it keeps changing.
+SSE_HEARTBEAT_INTERVAL_S = float(os.getenv("SSE_HEARTBEAT_INTERVAL_S", "15"))
+TOP_K_SNAPSHOT_INTERVAL_S = float(os.getenv("TOP_K_SNAPSHOT_INTERVAL_S", "0.5"))
+
+# Resumable streams: events of every stream session are logged to SQLite for
+# STREAM_EVENT_LOG_RETENTION_S seconds so a client can reconnect with Last-Event-ID. A
+# pipeline whose last client disconnected keeps running for STREAM_RESUME_GRACE_S seconds
+# to give the client time to reconnect, and is cancelled after that.
+STREAM_EVENT_LOG_RETENTION_S = float(os.getenv("STREAM_EVENT_LOG_RETENTION_S", "86400"))
+STREAM_RESUME_GRACE_S = float(os.getenv("STREAM_RESUME_GRACE_S", "30"))
+
+# Resumable streams: a session that is still running in another worker process is
+# followed by polling its event log every STREAM_LOG_POLL_INTERVAL_S seconds. If no new
+# event is logged for STREAM_LOG_IDLE_TIMEOUT_S seconds (e.g. the worker crashed), the
+# pipeline is started again.
+STREAM_LOG_POLL_INTERVAL_S = float(os.getenv("STREAM_LOG_POLL_INTERVAL_S", "0.5"))
+STREAM_LOG_IDLE_TIMEOUT_S = float(os.getenv("STREAM_LOG_IDLE_TIMEOUT_S", "120"))
+
+# Whole-response cache for /api/research-tree: seconds a computed SearchTreeResponse is
+# served from the cache (0 disables the cache).
+RESEARCH_TREE_CACHE_TTL_S = float(os.getenv("RESEARCH_TREE_CACHE_TTL_S", "86400"))
+
+# Saved research trees: an incremental refresh fetches papers submitted since the last
+# run minus this overlap, to catch papers that appear on arXiv with a delay. Papers
+# that were already scored are skipped, so the overlap only costs arXiv requests.
+SAVED_TREE_REFRESH_OVERLAP_S = float(os.getenv("SAVED_TREE_REFRESH_OVERLAP_S", "259200"))
+
+# Fair scheduling of LLM work: at most LLM_MAX_CONCURRENCY calls run at once across all
+# requests, and at most LLM_MAX_IN_FLIGHT_PER_REQUEST of them for a single request.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_IN_FLIGHT_PER_REQUEST = int(os.getenv("LLM_MAX_IN_FLIGHT_PER_REQUEST", "4"))
+
+# Admission control for research tree pipelines: at most PIPELINE_MAX_CONCURRENCY run at
+# once, up to PIPELINE_MAX_QUEUE more wait for a slot, and a request that cannot start
+# within PIPELINE_QUEUE_TIMEOUT_MS is rejected with 429 like one that finds the queue full.
+PIPELINE_MAX_CONCURRENCY = int(os.getenv("PIPELINE_MAX_CONCURRENCY", "8"))
+PIPELINE_MAX_QUEUE = int(os.getenv("PIPELINE_MAX_QUEUE", "32"))
+PIPELINE_QUEUE_TIMEOUT_MS = float(os.getenv("PIPELINE_QUEUE_TIMEOUT_MS", "10000"))
+
+# Early termination of scoring (requests with a time budget or a high-relevance target):
+# at most EARLY_STOP_SCORING_WINDOW papers are being scored at once, in priority order,
+# and no new scoring is started with less than EARLY_STOP_MIN_REMAINING_MS left on the
+# time budget. The default window keeps every per-request LLM slot busy with full batches.
+EARLY_STOP_SCORING_WINDOW = int(os.getenv(
+    "EARLY_STOP_SCORING_WINDOW", str(max(1, LLM_MAX_IN_FLIGHT_PER_REQUEST) * max(1, SCORING_BATCH_MAX_SIZE))
+))
+EARLY_STOP_MIN_REMAINING_MS = float(os.getenv("EARLY_STOP_MIN_REMAINING_MS", "1500"))
+
+# Background research jobs: number of jobs the local worker pool runs at the same time.
+RESEARCH_JOB_MAX_CONCURRENCY = int(os.getenv("RESEARCH_JOB_MAX_CONCURRENCY", "2"))
+
+# Background research jobs: query nodes whose arXiv search failed are not persisted and the
+# job retries them, up to this many attempts in total, waiting attempt * delay in between.
+RESEARCH_JOB_MAX_ATTEMPTS = int(os.getenv("RESEARCH_JOB_MAX_ATTEMPTS", "3"))
+RESEARCH_JOB_RETRY_DELAY_S = float(os.getenv("RESEARCH_JOB_RETRY_DELAY_S", "5.0"))
+
+# SQLite tuning applied to every connection: WAL lets readers proceed while a write is in
+# progress, synchronous=NORMAL only syncs at checkpoints (safe with WAL), and the page
+# cache, memory map and lock wait are sized by the values below.
+SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() == "true"
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "65536"))
+SQLITE_MMAP_SIZE_BYTES = int(os.getenv("SQLITE_MMAP_SIZE_BYTES", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Cached paper abstracts are stored compressed. "zstd" needs the optional zstandard package;
+# "auto" picks it when installed and falls back to zlib otherwise.
+PAPER_ABSTRACT_CODEC = os.getenv("PAPER_ABSTRACT_CODEC", "auto")
+PAPER_ABSTRACT_COMPRESSION_LEVEL = int(os.getenv("PAPER_ABSTRACT_COMPRESSION_LEVEL", "9"))
+# Size of a shared compression dictionary trained from cached abstracts (zlib uses at most 32 KiB).
+PAPER_ABSTRACT_DICTIONARY_BYTES = int(os.getenv("PAPER_ABSTRACT_DICTIONARY_BYTES", str(64 * 1024)))
+
+# Size budgets of the SQLite cache tables, enforced by the cache janitor. Rows beyond a
+# budget are evicted least recently used first ("lru") or least frequently used first
+# ("lfu"). Bytes are payload bytes of the cached values; 0 disables a limit.
+PAPER_CACHE_MAX_ROWS = int(os.getenv("PAPER_CACHE_MAX_ROWS", "200000"))
+PAPER_CACHE_MAX_BYTES = int(os.getenv("PAPER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+PAPER_CACHE_EVICTION = os.getenv("PAPER_CACHE_EVICTION", "lfu")
+RESEARCH_TREE_CACHE_MAX_ROWS = int(os.getenv("RESEARCH_TREE_CACHE_MAX_ROWS", "10000"))
+RESEARCH_TREE_CACHE_MAX_BYTES = int(os.getenv("RESEARCH_TREE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESEARCH_TREE_CACHE_EVICTION = os.getenv("RESEARCH_TREE_CACHE_EVICTION", "lru")
+# How often the janitor enforces the budgets and returns free pages to the file system
+# (at most CACHE_VACUUM_MAX_PAGES per run, 0 = all), and how often it refreshes the
+# query planner statistics with ANALYZE.
+CACHE_JANITOR_INTERVAL_S = float(os.getenv("CACHE_JANITOR_INTERVAL_S", "300"))
+CACHE_VACUUM_MAX_PAGES = int(os.getenv("CACHE_VACUUM_MAX_PAGES", "2000"))
+CACHE_ANALYZE_INTERVAL_S = float(os.getenv("CACHE_ANALYZE_INTERVAL_S", "3600"))
+
+# Two-tier caches of arXiv searches, relevance scores and LLM responses: a bounded
+# in-process LRU in front of the SQLite cache. A TTL of 0 disables a cache; the SQLite
+# tier of each is also bounded by the janitor like the cache tables above.
+ARXIV_SEARCH_CACHE_TTL_S = float(os.getenv("ARXIV_SEARCH_CACHE_TTL_S", "3600"))
+ARXIV_SEARCH_CACHE_MEMORY_ENTRIES = int(os.getenv("ARXIV_SEARCH_CACHE_MEMORY_ENTRIES", "1000"))
+ARXIV_SEARCH_CACHE_MAX_ROWS = int(os.getenv("ARXIV_SEARCH_CACHE_MAX_ROWS", "50000"))
+SCORE_CACHE_TTL_S = float(os.getenv("SCORE_CACHE_TTL_S", str(7 * 86400)))
+SCORE_CACHE_MEMORY_ENTRIES = int(os.getenv("SCORE_CACHE_MEMORY_ENTRIES", "100000"))
+SCORE_CACHE_MAX_ROWS = int(os.getenv("SCORE_CACHE_MAX_ROWS", "1000000"))
+LLM_RESPONSE_CACHE_TTL_S = float(os.getenv("LLM_RESPONSE_CACHE_TTL_S", "86400"))
+LLM_RESPONSE_CACHE_MEMORY_BYTES = int(os.getenv("LLM_RESPONSE_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+LLM_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("LLM_RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Coherence of the tiered caches across uvicorn worker processes sharing the SQLite tier.
+# A worker running an arXiv search or an LLM call holds a lease on its cache key (renewed
+# while it computes; a crashed worker's lease expires after CACHE_LEASE_TTL_S) and other
+# workers poll for its value instead of computing it again. Writes are logged so other workers drop the key from
+# their memory tier; they check the log every CACHE_COHERENCE_INTERVAL_S seconds.
+CACHE_LEASE_TTL_S = float(os.getenv("CACHE_LEASE_TTL_S", "30"))
+CACHE_LEASE_POLL_INTERVAL_S = float(os.getenv("CACHE_LEASE_POLL_INTERVAL_S", "0.2"))
+CACHE_COHERENCE_INTERVAL_S = float(os.getenv("CACHE_COHERENCE_INTERVAL_S", "1"))
+CACHE_INVALIDATION_RETENTION_S = float(os.getenv("CACHE_INVALIDATION_RETENTION_S", "600"))
+
+# In-memory author/category/year indexes over the paper cache (local search on
+# /api/arxiv/search). They are built on first use, or at startup if enabled here.
+PAPER_INDEX_PRELOAD = os.getenv("PAPER_INDEX_PRELOAD", "false").lower() == "true"
+
+# Near-duplicate papers (re-posted or cross-listed under another ID) within a research
+# tree are scored once. Papers whose title and abstract word shingles overlap by at least
+# NEAR_DUPLICATE_THRESHOLD (Jaccard similarity, estimated with NEAR_DUPLICATE_NUM_PERM
+# MinHash functions in NEAR_DUPLICATE_BANDS LSH bands) are duplicates. Set the threshold
+# above 1 to disable the detection.
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+NEAR_DUPLICATE_NUM_PERM = int(os.getenv("NEAR_DUPLICATE_NUM_PERM", "64"))
+NEAR_DUPLICATE_BANDS = int(os.getenv("NEAR_DUPLICATE_BANDS", "16"))
+
+# Rows read per server-side cursor fetch (and Parquet row group) by the NDJSON/Parquet
+# exports of /api/exports and `python -m backend.app.exports`.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
 if __name__ == '__main__':
     # Example usage and testing
     print(f"GEMINI_API_KEY: {GEMINI_API_KEY}") # Might be None if not set
@@ -46,3 +250,4 @@ if __name__ == '__main__':
 
     del os.environ["API_PROVIDER"] # Unset for next test
     print(f"API Provider (unset): {get_api_provider()}")
+
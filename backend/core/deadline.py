@@ -0,0 +1,92 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Absolute deadline (time.monotonic() seconds) of the request currently being served.
+# A context variable is used so that the deadline follows the request through
+# asyncio tasks and worker threads (asyncio.to_thread copies the context).
+_request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a downstream call is attempted after the request deadline has passed."""
+
+
+@contextmanager
+def deadline_at(deadline: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Sets an absolute deadline (time.monotonic() seconds, or None) for the enclosed block.
+
+    Used to restore a request's deadline in code that runs outside the request's own
+    context, such as shared background schedulers.
+    """
+    token = _request_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _request_deadline.reset(token)
+
+
+@contextmanager
+def deadline_scope(budget_ms: Optional[int]) -> Iterator[Optional[float]]:
+    """
+    Sets the request deadline to `budget_ms` milliseconds from now for the enclosed block.
+
+    Args:
+        budget_ms: Time budget in milliseconds. None means no deadline.
+
+    Yields:
+        The absolute deadline in time.monotonic() seconds, or None.
+    """
+    deadline = time.monotonic() + budget_ms / 1000.0 if budget_ms is not None else None
+    with deadline_at(deadline):
+        yield deadline
+
+
+def get_deadline() -> Optional[float]:
+    """Returns the absolute deadline of the current request, or None if unbounded."""
+    return _request_deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Returns the seconds left until the current deadline (may be negative), or None."""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def call_timeout(default: Optional[float] = None) -> Optional[float]:
+    """
+    Computes the timeout for a single downstream call.
+
+    The result is the smaller of `default` and the time left on the request deadline.
+
+    Raises:
+        DeadlineExceeded: If the request deadline has already passed.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return left if default is None else min(default, left)
+
+
+async def run_in_thread(call: Callable[[], T], timeout: Optional[float] = None) -> T:
+    """
+    Runs a blocking zero-argument callable in a worker thread and waits at most
+    `timeout` seconds for it.
+
+    The thread itself cannot be interrupted; on timeout its result is simply discarded.
+
+    Raises:
+        TimeoutError: If the call does not finish within `timeout`.
+    """
+    return await asyncio.wait_for(asyncio.to_thread(call), timeout)
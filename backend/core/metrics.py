@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class LatencyTracker:
+    """
+    Keeps a sliding window of recent latencies (in seconds) and answers percentile queries.
+    With `max_age_s`, samples older than that are dropped as well, so the statistics
+    recover once a slow period has passed even if no new samples arrive.
+
+    Thread-safe, because LLM calls are observed from worker threads.
+    """
+
+    def __init__(self, window: int = 200, max_age_s: Optional[float] = None):
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._max_age_s = max_age_s
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds))
+
+    def _expire(self) -> None:
+        if self._max_age_s is None:
+            return
+        cutoff = time.monotonic() - self._max_age_s
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Returns the q-quantile (0.0-1.0) of the observed latencies, or None without samples.
+        """
+        with self._lock:
+            self._expire()
+            if not self._samples:
+                return None
+            ordered = sorted(seconds for _, seconds in self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+_latency_trackers: Dict[str, LatencyTracker] = {}
+_registry_lock = threading.Lock()
+
+
+def latency_tracker(name: str, max_age_s: Optional[float] = None) -> LatencyTracker:
+    """
+    Returns the process-wide LatencyTracker registered under `name`, creating it (with
+    `max_age_s`) if needed.
+
+    Clients are created per request, so latency statistics have to live here to survive
+    across requests.
+    """
+    with _registry_lock:
+        tracker = _latency_trackers.get(name)
+        if tracker is None:
+            tracker = LatencyTracker(max_age_s=max_age_s)
+            _latency_trackers[name] = tracker
+        return tracker
+
+
+class Counter:
+    """Monotonically increasing, thread-safe event counter."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        with self._lock:
+            return self._value
+
+
+_counters: Dict[str, Counter] = {}
+
+
+def counter(name: str) -> Counter:
+    """Returns the process-wide Counter registered under `name`, creating it if needed."""
+    with _registry_lock:
+        instance = _counters.get(name)
+        if instance is None:
+            instance = Counter()
+            _counters[name] = instance
+        return instance
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Current value of every registered counter, and count/p50/p95 of every latency tracker."""
+    with _registry_lock:
+        counters = dict(_counters)
+        trackers = dict(_latency_trackers)
+    return {
+        "counters": {name: instance.value for name, instance in sorted(counters.items())},
+        "latency_s": {
+            name: {"count": tracker.count, "p50": tracker.percentile(0.5), "p95": tracker.percentile(0.95)}
+            for name, tracker in sorted(trackers.items())
+        },
+    }
@@ -0,0 +1,131 @@
+"""
+In-place schema migrations for existing databases.
+
+Tables that do not exist yet are created from the models by `upgrade`. Changes to tables
+that already exist are applied by the migrations below, in order. The number of applied
+migrations is kept in SQLite's `PRAGMA user_version`. Migrations check the current schema
+before changing it, so they are safe on databases created by any earlier version.
+"""
+import logging
+from typing import Callable, List
+
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from backend.core.abstract_codec import AbstractCodec
+from backend.core.config import PAPER_ABSTRACT_CODEC
+from backend.schemas.arxiv_schema import canonical_arxiv_id
+
+logger = logging.getLogger(__name__)
+
+# Rows read and rewritten per batch while backfilling (the same as crud.papers.UPSERT_CHUNK_SIZE).
+_BACKFILL_BATCH_SIZE = 500
+
+
+def _paper_cache_v2(connection: Connection) -> None:
+    """papers_cache: compressed abstracts, last revision date and primary category."""
+    inspector = inspect(connection)
+    if "papers_cache" not in inspector.get_table_names():
+        return
+    columns = {column["name"] for column in inspector.get_columns("papers_cache")}
+    for name, ddl in (
+        ("abstract_z", "BLOB"),
+        ("abstract_codec", "VARCHAR"),
+        ("updated_date", "DATETIME"),
+        ("primary_category", "VARCHAR"),
+    ):
+        if name not in columns:
+            connection.exec_driver_sql(f"ALTER TABLE papers_cache ADD COLUMN {name} {ddl}")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_papers_cache_primary_category ON papers_cache (primary_category)"
+    )
+    if "abstract" not in columns:
+        return
+
+    # No shared dictionary exists yet, so the plain codec is used for the backfill.
+    codec = AbstractCodec(PAPER_ABSTRACT_CODEC)
+    # Keyset pagination over the primary key, so only one batch of abstracts is in memory.
+    migrated, last_id = 0, -1
+    while True:
+        rows = connection.exec_driver_sql(
+            "SELECT id, abstract FROM papers_cache WHERE id > ? AND abstract IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, _BACKFILL_BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        batch = []
+        for paper_id, abstract in rows:
+            data, tag = codec.compress(abstract)
+            batch.append((data, tag, paper_id))
+        connection.exec_driver_sql("UPDATE papers_cache SET abstract_z = ?, abstract_codec = ? WHERE id = ?", batch)
+        migrated += len(rows)
+        last_id = rows[-1][0]
+    try:
+        connection.exec_driver_sql("ALTER TABLE papers_cache DROP COLUMN abstract")
+    except OperationalError:
+        # SQLite before 3.35 cannot drop columns; the unused column just keeps no data.
+        connection.exec_driver_sql("UPDATE papers_cache SET abstract = NULL")
+    logger.info(f"Migrated {migrated} cached abstracts to compressed storage")
+
+
+def _cache_access_statistics(connection: Connection) -> None:
+    """Cache tables: last access time and hit count for eviction."""
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    for table in ("papers_cache", "research_tree_cache"):
+        if table not in tables:
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if "last_accessed_at" not in columns:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN last_accessed_at DATETIME")
+        if "hit_count" not in columns:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN hit_count INTEGER NOT NULL DEFAULT 0")
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_last_accessed_at ON {table} (last_accessed_at)"
+        )
+
+
+def _canonical_paper_ids(connection: Connection) -> None:
+    """papers_cache: version-less arXiv IDs, keeping the latest revision of each paper."""
+    tables = set(inspect(connection).get_table_names())
+    if "papers_cache" not in tables:
+        return
+    rows = connection.exec_driver_sql(
+        "SELECT id, arxiv_id FROM papers_cache ORDER BY COALESCE(updated_date, published_date), id"
+    ).fetchall()
+    latest = {}
+    for paper_id, arxiv_id in rows:  # oldest first, so the latest revision wins
+        latest[canonical_arxiv_id(arxiv_id)] = (paper_id, arxiv_id)
+    kept = {paper_id for paper_id, _ in latest.values()}
+    superseded = [(paper_id,) for paper_id, _ in rows if paper_id not in kept]
+    if superseded:
+        if "paper_categories" in tables:
+            connection.exec_driver_sql("DELETE FROM paper_categories WHERE paper_id = ?", superseded)
+        connection.exec_driver_sql("DELETE FROM papers_cache WHERE id = ?", superseded)
+    renamed = [(canonical, paper_id) for canonical, (paper_id, arxiv_id) in latest.items() if canonical != arxiv_id]
+    if renamed:
+        connection.exec_driver_sql("UPDATE papers_cache SET arxiv_id = ? WHERE id = ?", renamed)
+    if superseded or renamed:
+        logger.info(f"Canonicalized {len(renamed)} cached paper IDs, dropped {len(superseded)} older revisions")
+
+
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    _paper_cache_v2,
+    _cache_access_statistics,
+    _canonical_paper_ids,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def upgrade(connection: Connection, metadata: MetaData) -> int:
+    """Applies pending migrations and creates missing tables; returns the number applied."""
+    version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    pending = MIGRATIONS[version:]
+    for migration in pending:
+        logger.info(f"Applying schema migration: {migration.__doc__}")
+        migration(connection)
+    metadata.create_all(connection)
+    connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return len(pending)
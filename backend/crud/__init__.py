@@ -0,0 +1 @@
+# This file makes 'crud' a Python package.
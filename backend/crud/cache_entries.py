@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.cache_entry import CacheEntry
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def get_entry(db: AsyncSession, namespace: str, key: str) -> Optional[CacheEntry]:
+    """Returns the entry for `key` unless it is missing or expired, and records the hit."""
+    entry = await db.get(CacheEntry, (namespace, key))
+    if entry is None or entry.expires_at <= _utcnow():
+        return None
+    await record_hits(db, namespace, {key: 1})
+    return entry
+
+
+def seconds_left(entry: CacheEntry) -> float:
+    return (entry.expires_at - _utcnow()).total_seconds()
+
+
+async def put_value(db: AsyncSession, namespace: str, key: str, value: bytes, ttl_s: float, commit: bool = True) -> None:
+    """Stores `value` under `key`; with commit=False it is left to the caller's transaction."""
+    now = _utcnow()
+    statement = insert(CacheEntry).values(
+        namespace=namespace, key=key, value=value, expires_at=now + timedelta(seconds=ttl_s), last_accessed_at=now, hit_count=0
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[CacheEntry.namespace, CacheEntry.key],
+        set_={"value": statement.excluded.value, "expires_at": statement.excluded.expires_at, "last_accessed_at": now},
+    )
+    await db.execute(statement)
+    if commit:
+        await db.commit()
+
+
+async def record_hits(db: AsyncSession, namespace: str, hits: Dict[str, int]) -> None:
+    """Adds hit counts (e.g. of hits served from memory) and marks the keys as just used."""
+    now = _utcnow()
+    for count in set(hits.values()):
+        keys = [key for key, key_count in hits.items() if key_count == count]
+        await db.execute(
+            update(CacheEntry)
+            .where(CacheEntry.namespace == namespace, CacheEntry.key.in_(keys))
+            .values(last_accessed_at=now, hit_count=CacheEntry.hit_count + count)
+        )
+    await db.commit()
+
+
+async def delete_values(db: AsyncSession, namespace: str, keys: Optional[Iterable[str]] = None) -> int:
+    """Deletes the given keys of `namespace`, or the whole namespace if `keys` is None."""
+    statement = delete(CacheEntry).where(CacheEntry.namespace == namespace)
+    if keys is not None:
+        statement = statement.where(CacheEntry.key.in_(list(keys)))
+    result = await db.execute(statement)
+    await db.commit()
+    return result.rowcount
+
+
+async def delete_expired(db: AsyncSession, namespace: str) -> int:
+    result = await db.execute(
+        delete(CacheEntry).where(CacheEntry.namespace == namespace, CacheEntry.expires_at <= _utcnow())
+    )
+    await db.commit()
+    return result.rowcount
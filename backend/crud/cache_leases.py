@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.cache_entry import CacheInvalidation, CacheLease
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def try_acquire(db: AsyncSession, namespace: str, key: str, owner: str, ttl_s: float) -> bool:
+    """
+    Takes the lease on `key` for `owner` unless another owner holds a live one. The check
+    and the write are one statement, so two workers can never both get the lease.
+    """
+    now = _utcnow()
+    statement = insert(CacheLease).values(namespace=namespace, key=key, owner=owner, expires_at=now + timedelta(seconds=ttl_s))
+    statement = statement.on_conflict_do_update(
+        index_elements=[CacheLease.namespace, CacheLease.key],
+        set_={"owner": statement.excluded.owner, "expires_at": statement.excluded.expires_at},
+        where=or_(CacheLease.expires_at <= now, CacheLease.owner == owner),
+    )
+    result = await db.execute(statement)
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def renew(db: AsyncSession, namespace: str, key: str, owner: str, ttl_s: float) -> bool:
+    """Extends a lease held by `owner`; False if it has expired and been taken over."""
+    result = await db.execute(
+        update(CacheLease)
+        .where(CacheLease.namespace == namespace, CacheLease.key == key, CacheLease.owner == owner)
+        .values(expires_at=_utcnow() + timedelta(seconds=ttl_s))
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def is_held(db: AsyncSession, namespace: str, key: str) -> bool:
+    """Whether anyone holds a live lease on `key`; a read, unlike try_acquire."""
+    expires_at = await db.scalar(
+        select(CacheLease.expires_at).where(CacheLease.namespace == namespace, CacheLease.key == key)
+    )
+    return expires_at is not None and expires_at > _utcnow()
+
+
+async def release(db: AsyncSession, namespace: str, key: str, owner: str, commit: bool = True) -> None:
+    await db.execute(
+        delete(CacheLease).where(CacheLease.namespace == namespace, CacheLease.key == key, CacheLease.owner == owner)
+    )
+    if commit:
+        await db.commit()
+
+
+async def delete_expired_leases(db: AsyncSession) -> int:
+    result = await db.execute(delete(CacheLease).where(CacheLease.expires_at <= _utcnow()))
+    await db.commit()
+    return result.rowcount
+
+
+async def log_invalidation(db: AsyncSession, namespace: str, key: Optional[str], origin: str, commit: bool = True) -> None:
+    """Records that `key` (None = every key) of `namespace` was written or deleted by `origin`."""
+    db.add(CacheInvalidation(namespace=namespace, key=key, origin=origin, created_at=_utcnow()))
+    if commit:
+        await db.commit()
+
+
+async def last_invalidation_id(db: AsyncSession) -> int:
+    return (await db.scalar(select(func.max(CacheInvalidation.id)))) or 0
+
+
+async def invalidations_since(db: AsyncSession, after_id: int, limit: int = 1000) -> List[Tuple[int, str, Optional[str], str]]:
+    """(id, namespace, key, origin) of the invalidations logged after `after_id`, oldest first."""
+    rows = await db.execute(
+        select(CacheInvalidation.id, CacheInvalidation.namespace, CacheInvalidation.key, CacheInvalidation.origin)
+        .where(CacheInvalidation.id > after_id)
+        .order_by(CacheInvalidation.id)
+        .limit(limit)
+    )
+    return [tuple(row) for row in rows.all()]
+
+
+async def delete_invalidations_before(db: AsyncSession, retention_s: float) -> int:
+    result = await db.execute(
+        delete(CacheInvalidation).where(CacheInvalidation.created_at <= _utcnow() - timedelta(seconds=retention_s))
+    )
+    await db.commit()
+    return result.rowcount
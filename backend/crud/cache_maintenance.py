@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import LargeBinary, cast, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from backend.crud import cache_entries
+from backend.crud.response_cache import delete_expired
+from backend.models.cache_entry import CacheEntry
+from backend.models.paper import Paper, PaperCategory
+from backend.models.response_cache import ResearchTreeCacheEntry
+
+# Rows deleted per statement while evicting.
+EVICTION_BATCH_SIZE = 500
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+def _bytes(column: Any) -> ColumnElement:
+    # length() of TEXT counts characters; casting to BLOB counts the stored bytes.
+    return func.coalesce(func.length(cast(column, LargeBinary)), 0)
+
+
+@dataclass
+class CacheTable:
+    """
+    Size budget and eviction policy of one cache table.
+
+    `size` is an SQL expression for the payload bytes of a row. The table must have
+    `last_accessed_at` and `hit_count` columns. "lru" evicts the least recently used rows
+    first; "lfu" the least often hit ones, least recently used first among equal counts.
+    `purge` removes rows that are dead anyway (e.g. expired) before the budget is checked,
+    and `delete_dependents` removes rows of other tables that refer to evicted keys.
+    `where` restricts the budget to part of a table shared by several caches.
+    """
+    name: str
+    model: Any
+    key: Any
+    size: ColumnElement
+    max_rows: int = 0
+    max_bytes: int = 0
+    policy: str = "lru"
+    purge: Optional[Callable[[AsyncSession], Awaitable[int]]] = None
+    delete_dependents: Optional[Callable[[AsyncSession, List[Any]], Awaitable[None]]] = None
+    where: Optional[ColumnElement] = None
+
+    def __post_init__(self):
+        if self.policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{self.policy}' for {self.name}. Supported: {', '.join(EVICTION_POLICIES)}.")
+
+    @property
+    def eviction_order(self) -> List[Any]:
+        # Rows never accessed since last_accessed_at was introduced (NULL) sort first.
+        if self.policy == "lfu":
+            return [self.model.hit_count.asc(), self.model.last_accessed_at.asc(), self.key]
+        return [self.model.last_accessed_at.asc(), self.key]
+
+    def select(self, *columns: Any):
+        statement = select(*columns).select_from(self.model)
+        return statement if self.where is None else statement.where(self.where)
+
+    def delete(self, keys: List[Any]):
+        statement = delete(self.model).where(self.key.in_(keys))
+        return statement if self.where is None else statement.where(self.where)
+
+
+@dataclass
+class EvictionResult:
+    purged: int = 0
+    evicted: int = 0
+    evicted_bytes: int = 0
+    rows: int = 0
+    bytes: int = 0
+
+
+async def usage(db: AsyncSession, table: CacheTable) -> Tuple[int, int]:
+    """Returns (rows, payload bytes) currently stored in `table`."""
+    rows, size = (await db.execute(table.select(func.count(), func.coalesce(func.sum(table.size), 0)))).one()
+    return rows, size
+
+
+async def enforce_budget(db: AsyncSession, table: CacheTable) -> EvictionResult:
+    """Purges dead rows, then evicts rows in policy order until `table` is within its budget."""
+    result = EvictionResult()
+    if table.purge is not None:
+        result.purged = await table.purge(db)
+    rows, size = await usage(db, table)
+    excess_rows = rows - table.max_rows if table.max_rows > 0 else 0
+    excess_bytes = size - table.max_bytes if table.max_bytes > 0 else 0
+    while excess_rows > 0 or excess_bytes > 0:
+        candidates = (await db.execute(
+            table.select(table.key, table.size).order_by(*table.eviction_order).limit(EVICTION_BATCH_SIZE)
+        )).all()
+        if not candidates:
+            break
+        victims = []
+        for key, entry_size in candidates:
+            if excess_rows <= 0 and excess_bytes <= 0:
+                break
+            victims.append(key)
+            excess_rows -= 1
+            excess_bytes -= entry_size
+            result.evicted_bytes += entry_size
+        if table.delete_dependents is not None:
+            await table.delete_dependents(db, victims)
+        await db.execute(table.delete(victims))
+        await db.commit()
+        result.evicted += len(victims)
+    result.rows = rows - result.evicted
+    result.bytes = size - result.evicted_bytes
+    return result
+
+
+async def _delete_paper_categories(db: AsyncSession, paper_ids: List[Any]) -> None:
+    await db.execute(delete(PaperCategory).where(PaperCategory.paper_id.in_(paper_ids)))
+
+
+def paper_cache_table(max_rows: int, max_bytes: int, policy: str) -> CacheTable:
+    return CacheTable(
+        name="papers",
+        model=Paper,
+        key=Paper.id,
+        size=_bytes(Paper.abstract_data) + _bytes(Paper.title) + _bytes(Paper.authors) + _bytes(Paper.url),
+        max_rows=max_rows,
+        max_bytes=max_bytes,
+        policy=policy,
+        delete_dependents=_delete_paper_categories,
+    )
+
+
+def research_tree_cache_table(max_rows: int, max_bytes: int, policy: str) -> CacheTable:
+    return CacheTable(
+        name="research_trees",
+        model=ResearchTreeCacheEntry,
+        key=ResearchTreeCacheEntry.key,
+        size=_bytes(ResearchTreeCacheEntry.body) + _bytes(ResearchTreeCacheEntry.key) + _bytes(ResearchTreeCacheEntry.etag),
+        max_rows=max_rows,
+        max_bytes=max_bytes,
+        policy=policy,
+        purge=delete_expired,
+    )
+
+
+def tiered_cache_table(namespace: str, max_rows: int, max_bytes: int, policy: str = "lru") -> CacheTable:
+    """Budget of the SQLite tier of a TieredCache namespace."""
+    async def purge(db: AsyncSession) -> int:
+        return await cache_entries.delete_expired(db, namespace)
+    return CacheTable(
+        name=namespace,
+        model=CacheEntry,
+        key=CacheEntry.key,
+        size=_bytes(CacheEntry.value) + _bytes(CacheEntry.key),
+        max_rows=max_rows,
+        max_bytes=max_bytes,
+        policy=policy,
+        purge=purge,
+        where=CacheEntry.namespace == namespace,
+    )
+
+
+async def database_stats(conn: AsyncConnection) -> Dict[str, int]:
+    """File-level statistics of the SQLite database behind `conn`."""
+    async def pragma(name: str) -> int:
+        return (await conn.exec_driver_sql(f"PRAGMA {name}")).scalar()
+    page_size = await pragma("page_size")
+    return {
+        "file_bytes": await pragma("page_count") * page_size,
+        "free_bytes": await pragma("freelist_count") * page_size,
+        "auto_vacuum": await pragma("auto_vacuum"),  # 0 = none, 1 = full, 2 = incremental
+    }
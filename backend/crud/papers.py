@@ -0,0 +1,319 @@
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.abstract_codec import abstract_codec
+from backend.core.config import PAPER_ABSTRACT_DICTIONARY_BYTES
+from backend.models.cache_entry import CacheInvalidation
+from backend.models.paper import CompressionDictionary, Paper, PaperCategory
+from backend.schemas.arxiv_schema import ArxivPaper
+
+# Rows per INSERT statement, which keeps the bound parameters well below SQLite's limit.
+UPSERT_CHUNK_SIZE = 500
+
+# Columns overwritten when a cached paper is upserted again (everything but the identity
+# and the hit count).
+_UPDATABLE_COLUMNS = (
+    "title", "authors", "abstract_z", "abstract_codec", "published_date", "updated_date", "url", "primary_category",
+    "last_accessed_at",
+)
+
+# Namespace of the cache_invalidations entries (keyed by arxiv_id) that upsert_papers logs
+# for the papers it writes when given an origin, so other workers can update their indexes.
+PAPERS_NAMESPACE = "papers_cache"
+
+# Called with the (id, row) pairs of every committed upsert_papers call, e.g. to keep
+# in-memory indexes of the paper cache up to date.
+UpsertHook = Callable[[List[Tuple[int, Dict[str, Any]]]], None]
+_upsert_hooks: List[UpsertHook] = []
+
+
+def add_upsert_hook(hook: UpsertHook) -> None:
+    _upsert_hooks.append(hook)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def paper_row(paper: ArxivPaper) -> Dict[str, Any]:
+    """The upsert_papers row for an arXiv search result, keyed by its version-less arXiv ID."""
+    return {
+        "arxiv_id": paper.arxiv_id,
+        "title": paper.title,
+        "authors": [author.name for author in paper.authors],
+        "abstract": paper.summary,
+        "published_date": paper.published,
+        "updated_date": paper.updated,
+        "url": paper.pdf_url,
+        "categories": paper.categories,
+        "primary_category": paper.primary_category,
+    }
+
+
+def _column_values(row: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    abstract_z, codec = abstract_codec.compress(row.get("abstract"))
+    return {
+        "arxiv_id": row["arxiv_id"],
+        "title": row["title"],
+        "authors": row.get("authors"),
+        "abstract_z": abstract_z,
+        "abstract_codec": codec,
+        "published_date": row.get("published_date"),
+        "updated_date": row.get("updated_date"),
+        "url": row.get("url"),
+        "primary_category": row.get("primary_category"),
+        "last_accessed_at": now,
+    }
+
+
+async def upsert_papers(db: AsyncSession, papers: Iterable[Dict[str, Any]], origin: Optional[str] = None) -> int:
+    """
+    Inserts or updates cached papers by arxiv_id in a single transaction.
+
+    Each element is a paper_row()-style dict and must contain "arxiv_id" and "title".
+    The abstract is stored compressed; "categories", if given, replaces the paper's
+    categories. Uses multi-row INSERT ... ON CONFLICT(arxiv_id) DO UPDATE statements
+    instead of one ORM flush per row. With `origin` (the writing worker), every written
+    paper is also logged under PAPERS_NAMESPACE. Returns the number of papers written.
+    """
+    rows = list(papers)
+    now = _utcnow()
+    written: List[Tuple[int, Dict[str, Any]]] = []
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+        statement = insert(Paper).values([_column_values(row, now) for row in chunk])
+        statement = statement.on_conflict_do_update(
+            index_elements=[Paper.arxiv_id],
+            set_={
+                **{column: statement.excluded[column] for column in _UPDATABLE_COLUMNS},
+                "updated_at": func.now(),
+            },
+        ).returning(Paper.arxiv_id, Paper.id)
+        ids = dict((await db.execute(statement)).all())
+        await _replace_categories(db, ids, [row for row in chunk if "categories" in row])
+        written.extend((ids[row["arxiv_id"]], row) for row in chunk)
+    if origin is not None and written:
+        await db.execute(insert(CacheInvalidation), [
+            {"namespace": PAPERS_NAMESPACE, "key": row["arxiv_id"], "origin": origin, "created_at": now}
+            for _, row in written
+        ])
+    await db.commit()
+    for hook in _upsert_hooks:
+        hook(written)
+    return len(rows)
+
+
+async def _replace_categories(db: AsyncSession, ids: Dict[str, int], rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    await db.execute(delete(PaperCategory).where(PaperCategory.paper_id.in_([ids[row["arxiv_id"]] for row in rows])))
+    links = [
+        {"paper_id": ids[row["arxiv_id"]], "category": category, "position": position}
+        for row in rows
+        for position, category in enumerate(dict.fromkeys(row["categories"] or []))
+    ]
+    if links:
+        await db.execute(insert(PaperCategory).values(links))
+
+
+async def _record_hits(db: AsyncSession, paper_ids: List[int]) -> None:
+    if not paper_ids:
+        return
+    await db.execute(
+        update(Paper).where(Paper.id.in_(paper_ids)).values(last_accessed_at=_utcnow(), hit_count=Paper.hit_count + 1)
+    )
+    await db.commit()
+
+
+async def get_papers(db: AsyncSession, arxiv_ids: Iterable[str]) -> Dict[str, Paper]:
+    """Cached papers by arxiv_id; ids that are not cached are missing from the result."""
+    ids: List[str] = list(arxiv_ids)
+    papers = {paper.arxiv_id: paper for paper in await db.scalars(select(Paper).where(Paper.arxiv_id.in_(ids)))}
+    await _record_hits(db, [paper.id for paper in papers.values()])
+    return papers
+
+
+async def get_papers_by_id(db: AsyncSession, paper_ids: Iterable[int]) -> Dict[int, Paper]:
+    """Cached papers by primary key; ids that no longer exist are missing from the result."""
+    ids: List[int] = list(paper_ids)
+    papers = {paper.id: paper for paper in await db.scalars(select(Paper).where(Paper.id.in_(ids)))}
+    await _record_hits(db, list(papers))
+    return papers
+
+
+async def get_paper(db: AsyncSession, arxiv_id: str) -> Optional[Paper]:
+    return (await get_papers(db, [arxiv_id])).get(arxiv_id)
+
+
+async def get_papers_in_category(db: AsyncSession, category: str, limit: int = 100) -> List[Paper]:
+    """Cached papers listed in `category`, most recently published first."""
+    rows = await db.scalars(
+        select(Paper)
+        .join(PaperCategory, PaperCategory.paper_id == Paper.id)
+        .where(PaperCategory.category == category)
+        .order_by(Paper.published_date.desc())
+        .limit(limit)
+    )
+    return list(rows)
+
+
+async def stream_index_fields(
+    db: AsyncSession,
+) -> AsyncIterator[Tuple[int, List[str], Optional[datetime], Optional[datetime], List[str]]]:
+    """
+    Yields (id, authors, published_date, updated_date, categories) of every cached paper without loading
+    abstracts or ORM objects, reading both tables with server-side cursors in id order.
+    """
+    categories = await db.stream(
+        select(PaperCategory.paper_id, PaperCategory.category)
+        .order_by(PaperCategory.paper_id, PaperCategory.position)
+        .execution_options(yield_per=UPSERT_CHUNK_SIZE)
+    )
+    papers = await db.stream(
+        select(Paper.id, Paper.authors, Paper.published_date, Paper.updated_date)
+        .order_by(Paper.id)
+        .execution_options(yield_per=UPSERT_CHUNK_SIZE)
+    )
+    link = await anext(categories, None)
+    async for paper_id, authors, published_date, updated_date in papers:
+        paper_categories = []
+        while link is not None and link[0] <= paper_id:
+            if link[0] == paper_id:
+                paper_categories.append(link[1])
+            link = await anext(categories, None)
+        yield paper_id, authors or [], published_date, updated_date, paper_categories
+
+
+async def get_index_fields(
+    db: AsyncSession, arxiv_ids: Iterable[str],
+) -> List[Tuple[int, List[str], Optional[datetime], Optional[datetime], List[str]]]:
+    """The stream_index_fields tuples of the cached papers among `arxiv_ids`; others are skipped."""
+    ids = list(dict.fromkeys(arxiv_ids))
+    fields = []
+    for start in range(0, len(ids), UPSERT_CHUNK_SIZE):
+        chunk = ids[start:start + UPSERT_CHUNK_SIZE]
+        links = await db.execute(
+            select(PaperCategory.paper_id, PaperCategory.category)
+            .join(Paper, Paper.id == PaperCategory.paper_id)
+            .where(Paper.arxiv_id.in_(chunk))
+            .order_by(PaperCategory.paper_id, PaperCategory.position)
+        )
+        categories: Dict[int, List[str]] = {}
+        for paper_id, category in links:
+            categories.setdefault(paper_id, []).append(category)
+        papers = await db.execute(
+            select(Paper.id, Paper.authors, Paper.published_date, Paper.updated_date).where(Paper.arxiv_id.in_(chunk))
+        )
+        fields.extend(
+            (paper_id, authors or [], published_date, updated_date, categories.get(paper_id, []))
+            for paper_id, authors, published_date, updated_date in papers
+        )
+    return fields
+
+
+async def stream_papers(db: AsyncSession, batch_size: int = UPSERT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yields every cached paper as a paper_row()-style dict, in id order and in
+    lists of up to `batch_size`, reading both tables with server-side cursors. The
+    compression dictionaries must be loaded.
+    """
+    categories = await db.stream(
+        select(PaperCategory.paper_id, PaperCategory.category)
+        .order_by(PaperCategory.paper_id, PaperCategory.position)
+        .execution_options(yield_per=batch_size)
+    )
+    papers = await db.stream(
+        select(
+            Paper.id, Paper.arxiv_id, Paper.title, Paper.authors, Paper.abstract_data, Paper.abstract_codec,
+            Paper.published_date, Paper.updated_date, Paper.url, Paper.primary_category,
+        )
+        .order_by(Paper.id)
+        .execution_options(yield_per=batch_size)
+    )
+    link = await anext(categories, None)
+    async for partition in papers.partitions():
+        batch = []
+        for paper_id, arxiv_id, title, authors, abstract_data, codec, published_date, updated_date, url, primary_category in partition:
+            paper_categories = []
+            while link is not None and link[0] <= paper_id:
+                if link[0] == paper_id:
+                    paper_categories.append(link[1])
+                link = await anext(categories, None)
+            batch.append({
+                "arxiv_id": arxiv_id,
+                "title": title,
+                "authors": authors or [],
+                "abstract": abstract_codec.decompress(abstract_data, codec),
+                "published_date": published_date,
+                "updated_date": updated_date,
+                "url": url,
+                "categories": paper_categories,
+                "primary_category": primary_category,
+            })
+        yield batch
+
+
+async def load_compression_dictionaries(db: AsyncSession) -> int:
+    """
+    Registers all stored abstract dictionaries with the codec and activates the newest
+    one of the configured codec. Must run before cached abstracts are read.
+    """
+    dictionaries = list(await db.scalars(select(CompressionDictionary).order_by(CompressionDictionary.id)))
+    for dictionary in dictionaries:
+        abstract_codec.register_dictionary(dictionary.id, dictionary.codec, dictionary.data, activate=True)
+    return len(dictionaries)
+
+
+async def train_compression_dictionary(
+    db: AsyncSession,
+    sample_size: int = 5000,
+    dictionary_bytes: int = PAPER_ABSTRACT_DICTIONARY_BYTES,
+    recompress: bool = True,
+) -> Optional[CompressionDictionary]:
+    """
+    Trains a shared abstract dictionary from up to `sample_size` cached abstracts, stores
+    it and uses it for new abstracts. With `recompress`, abstracts already cached are
+    rewritten with it. Returns None if there are no cached abstracts to learn from.
+    """
+    papers = list(await db.scalars(
+        select(Paper).where(Paper.abstract_data.is_not(None)).order_by(func.random()).limit(sample_size)
+    ))
+    if not papers:
+        return None
+    data = abstract_codec.train_dictionary([paper.abstract for paper in papers], dictionary_bytes)
+    dictionary = CompressionDictionary(codec=abstract_codec.codec, data=data, sample_count=len(papers))
+    db.add(dictionary)
+    await db.commit()
+    abstract_codec.register_dictionary(dictionary.id, dictionary.codec, dictionary.data, activate=True)
+    if recompress:
+        await recompress_abstracts(db)
+    return dictionary
+
+
+async def recompress_abstracts(db: AsyncSession) -> int:
+    """Rewrites cached abstracts not yet stored with the active dictionary; returns how many."""
+    current = abstract_codec.current_tag
+    rewritten = 0
+    last_id = 0
+    while True:
+        rows = (await db.execute(
+            select(Paper.id, Paper.abstract_data, Paper.abstract_codec)
+            .where(Paper.id > last_id, Paper.abstract_data.is_not(None), Paper.abstract_codec != current)
+            .order_by(Paper.id)
+            .limit(UPSERT_CHUNK_SIZE)
+        )).all()
+        if not rows:
+            break
+        changes = []
+        for paper_id, data, codec in rows:
+            abstract_z, new_codec = abstract_codec.compress(abstract_codec.decompress(data, codec))
+            changes.append({"id": paper_id, "abstract_data": abstract_z, "abstract_codec": new_codec})
+        await db.execute(update(Paper), changes)  # bulk UPDATE by primary key
+        last_id = rows[-1][0]
+        rewritten += len(rows)
+        await db.commit()
+    return rewritten
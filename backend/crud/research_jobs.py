@@ -0,0 +1,100 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.research_job import ResearchJob, ResearchJobNode
+
+# Jobs in these states are picked up again when the worker pool starts.
+UNFINISHED_STATUSES = ("queued", "running")
+
+
+async def create_job(db: AsyncSession, request: Dict[str, Any]) -> ResearchJob:
+    job = ResearchJob(id=uuid.uuid4().hex, status="queued", request=request)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: str) -> Optional[ResearchJob]:
+    return await db.get(ResearchJob, job_id)
+
+
+async def list_unfinished_job_ids(db: AsyncSession) -> List[str]:
+    rows = await db.scalars(
+        select(ResearchJob.id)
+        .where(ResearchJob.status.in_(UNFINISHED_STATUSES))
+        .order_by(ResearchJob.created_at, ResearchJob.id)
+    )
+    return list(rows)
+
+
+async def count_jobs(db: AsyncSession, statuses: tuple) -> int:
+    return await db.scalar(select(func.count()).select_from(ResearchJob).where(ResearchJob.status.in_(statuses)))
+
+
+async def mark_running(db: AsyncSession, job_id: str) -> None:
+    await db.execute(update(ResearchJob).where(ResearchJob.id == job_id).values(status="running", error=None))
+    await db.commit()
+
+
+async def save_plan(db: AsyncSession, job_id: str, research_goal: str, query_plan: List[Dict[str, str]]) -> None:
+    await db.execute(
+        update(ResearchJob).where(ResearchJob.id == job_id).values(research_goal=research_goal, query_plan=query_plan)
+    )
+    await db.commit()
+
+
+async def save_node(db: AsyncSession, job_id: str, position: int, node: Dict[str, Any]) -> None:
+    """Persists one completed query node; `node` is a QueryNode dumped in JSON mode."""
+    db.add(ResearchJobNode(
+        job_id=job_id,
+        position=position,
+        query=node["query"],
+        description=node["description"],
+        papers=node["papers"],
+        paper_count=node["paper_count"],
+    ))
+    await db.commit()
+
+
+async def completed_positions(db: AsyncSession, job_id: str) -> List[int]:
+    rows = await db.scalars(select(ResearchJobNode.position).where(ResearchJobNode.job_id == job_id))
+    return list(rows)
+
+
+async def finish_job(db: AsyncSession, job_id: str, status: str, error: Optional[str] = None) -> None:
+    await db.execute(
+        update(ResearchJob)
+        .where(ResearchJob.id == job_id)
+        .values(status=status, error=error, finished_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+
+
+async def stream_jobs(db: AsyncSession, batch_size: int = 500) -> AsyncIterator[Sequence[Row]]:
+    """Yields (id, status, request, research_goal, created_at, finished_at) of every job, in batches."""
+    result = await db.stream(
+        select(
+            ResearchJob.id, ResearchJob.status, ResearchJob.request, ResearchJob.research_goal,
+            ResearchJob.created_at, ResearchJob.finished_at,
+        )
+        .order_by(ResearchJob.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+
+async def stream_nodes(db: AsyncSession, batch_size: int = 50) -> AsyncIterator[Sequence[Row]]:
+    """Yields (job_id, position, query, papers) of every completed node, in job and plan order, in batches."""
+    result = await db.stream(
+        select(ResearchJobNode.job_id, ResearchJobNode.position, ResearchJobNode.query, ResearchJobNode.papers)
+        .order_by(ResearchJobNode.job_id, ResearchJobNode.position)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.response_cache import ResearchTreeCacheEntry
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def get_entry(db: AsyncSession, key: str) -> Optional[ResearchTreeCacheEntry]:
+    """Returns the cached entry for `key` unless it is missing or expired."""
+    entry = await db.get(ResearchTreeCacheEntry, key)
+    if entry is None or entry.expires_at <= _utcnow():
+        return None
+    await db.execute(
+        update(ResearchTreeCacheEntry)
+        .where(ResearchTreeCacheEntry.key == key)
+        .values(last_accessed_at=_utcnow(), hit_count=ResearchTreeCacheEntry.hit_count + 1)
+    )
+    await db.commit()
+    return entry
+
+
+async def put_entry(db: AsyncSession, key: str, etag: str, body: str, ttl_s: float) -> None:
+    now = _utcnow()
+    await db.merge(ResearchTreeCacheEntry(
+        key=key, etag=etag, body=body, expires_at=now + timedelta(seconds=ttl_s), last_accessed_at=now, hit_count=0
+    ))
+    await db.commit()
+
+
+async def delete_expired(db: AsyncSession) -> int:
+    result = await db.execute(delete(ResearchTreeCacheEntry).where(ResearchTreeCacheEntry.expires_at <= _utcnow()))
+    await db.commit()
+    return result.rowcount
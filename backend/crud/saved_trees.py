@@ -0,0 +1,96 @@
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.saved_tree import SavedResearchTree, SavedResearchTreeNode
+
+
+async def create_tree(
+    db: AsyncSession,
+    request: Dict[str, Any],
+    research_goal: str,
+    nodes: List[Dict[str, Any]],
+    watermark: datetime,
+    is_settled: Callable[[Dict[str, Any]], bool] = lambda paper: True,
+) -> SavedResearchTree:
+    """
+    Stores a research tree; `nodes` are QueryNodes dumped in JSON mode, in plan order.
+    Papers for which `is_settled` is false are stored but left out of `arxiv_ids`, so the
+    next refresh scores them again.
+    """
+    tree = SavedResearchTree(id=uuid.uuid4().hex, request=request, research_goal=research_goal, watermark=watermark)
+    tree.nodes = [
+        SavedResearchTreeNode(
+            position=position,
+            query=node["query"],
+            description=node["description"],
+            papers=node["papers"],
+            arxiv_ids=sorted({paper["arxiv_id"] for paper in node["papers"] if is_settled(paper)}),
+        )
+        for position, node in enumerate(nodes)
+    ]
+    db.add(tree)
+    await db.commit()
+    await db.refresh(tree)
+    return tree
+
+
+async def get_tree(db: AsyncSession, tree_id: str) -> Optional[SavedResearchTree]:
+    return await db.get(SavedResearchTree, tree_id)
+
+
+async def merge_new_papers(
+    db: AsyncSession,
+    tree: SavedResearchTree,
+    new_papers: Dict[int, List[Dict[str, Any]]],
+    watermark: datetime,
+) -> SavedResearchTree:
+    """
+    Merges newly scored papers (by node position) into the stored ranking and advances the
+    watermark. A paper already stored in the node (one that was pending) is replaced.
+    """
+    for node in tree.nodes:
+        papers = new_papers.get(node.position)
+        if not papers:
+            continue
+        replaced = {paper["arxiv_id"] for paper in papers}
+        merged = [paper for paper in node.papers if paper["arxiv_id"] not in replaced] + papers
+        merged.sort(key=lambda paper: (not paper.get("scored", True), -paper["relevance_score"]))
+        node.papers = merged
+        node.arxiv_ids = sorted(set(node.arxiv_ids) | {paper["arxiv_id"] for paper in papers})
+    tree.watermark = watermark
+    tree.refresh_count += 1
+    await db.commit()
+    await db.refresh(tree)
+    return tree
+
+
+async def stream_trees(db: AsyncSession, batch_size: int = 500) -> AsyncIterator[Sequence[Row]]:
+    """Yields (id, request, research_goal, refresh_count, created_at, updated_at) of every stored tree, in batches."""
+    result = await db.stream(
+        select(
+            SavedResearchTree.id, SavedResearchTree.request, SavedResearchTree.research_goal,
+            SavedResearchTree.refresh_count, SavedResearchTree.created_at, SavedResearchTree.updated_at,
+        )
+        .order_by(SavedResearchTree.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+
+async def stream_nodes(db: AsyncSession, batch_size: int = 50) -> AsyncIterator[Sequence[Row]]:
+    """Yields (tree_id, position, query, papers) of every stored node, in tree and plan order, in batches."""
+    result = await db.stream(
+        select(
+            SavedResearchTreeNode.tree_id, SavedResearchTreeNode.position, SavedResearchTreeNode.query,
+            SavedResearchTreeNode.papers,
+        )
+        .order_by(SavedResearchTreeNode.tree_id, SavedResearchTreeNode.position)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
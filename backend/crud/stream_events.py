@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.stream_event import StreamEvent, StreamSession
+
+
+async def create_session(db: AsyncSession, session_id: str, key: str) -> None:
+    db.add(StreamSession(id=session_id, key=key, status="running"))
+    await db.commit()
+
+
+async def append_events(db: AsyncSession, session_id: str, events: List[Tuple[int, str]]) -> None:
+    db.add_all(StreamEvent(session_id=session_id, seq=seq, data=data) for seq, data in events)
+    await db.commit()
+
+
+async def set_session_status(db: AsyncSession, session_id: str, status: str) -> None:
+    await db.execute(update(StreamSession).where(StreamSession.id == session_id).values(status=status))
+    await db.commit()
+
+
+async def get_session(db: AsyncSession, session_id: str) -> Optional[StreamSession]:
+    return await db.get(StreamSession, session_id)
+
+
+async def events_after(db: AsyncSession, session_id: str, after_seq: int) -> List[Tuple[int, str]]:
+    rows = await db.execute(
+        select(StreamEvent.seq, StreamEvent.data)
+        .where(StreamEvent.session_id == session_id, StreamEvent.seq > after_seq)
+        .order_by(StreamEvent.seq)
+    )
+    return [(row.seq, row.data) for row in rows]
+
+
+async def purge_sessions_older_than(db: AsyncSession, max_age_s: float) -> int:
+    """Deletes sessions (and their events) created more than `max_age_s` seconds ago."""
+    # created_at is stored by SQLite as naive UTC
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=max_age_s)
+    expired = list(await db.scalars(select(StreamSession.id).where(StreamSession.created_at < cutoff)))
+    if expired:
+        await db.execute(delete(StreamEvent).where(StreamEvent.session_id.in_(expired)))
+        await db.execute(delete(StreamSession).where(StreamSession.id.in_(expired)))
+        await db.commit()
+    return len(expired)
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from backend.core.database import Base
+
+class CacheEntry(Base):
+    """A value of a TieredCache namespace (arXiv searches, relevance scores, LLM responses)."""
+    __tablename__ = "cache_entries"
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)  # pipeline_key of the cached call
+    value = Column(LargeBinary, nullable=False)  # orjson-serialized value
+    expires_at = Column(DateTime, nullable=False, index=True)  # naive UTC
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Access statistics for cache eviction (see backend/crud/cache_maintenance.py)
+    last_accessed_at = Column(DateTime, nullable=True, index=True)  # naive UTC
+    hit_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<CacheEntry(namespace='{self.namespace}', key='{self.key[:12]}')>"
+
+class CacheLease(Base):
+    """
+    A worker's claim to compute a TieredCache key. Other workers wait for the value
+    instead of computing it too; a lease that is not renewed (crashed worker) expires.
+    """
+    __tablename__ = "cache_leases"
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)  # WORKER_ID of the holder
+    expires_at = Column(DateTime, nullable=False, index=True)  # naive UTC
+
+    def __repr__(self):
+        return f"<CacheLease(namespace='{self.namespace}', key='{self.key[:12]}', owner='{self.owner}')>"
+
+class CacheInvalidation(Base):
+    """A write to the SQLite tier that other workers must drop from their memory tier."""
+    __tablename__ = "cache_invalidations"
+    __table_args__ = {"sqlite_autoincrement": True}  # ids are never reused after the log is trimmed
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    namespace = Column(String, nullable=False)
+    key = Column(String, nullable=True)  # None = the whole namespace
+    origin = Column(String, nullable=False)  # WORKER_ID of the writer
+    created_at = Column(DateTime, nullable=False, index=True)  # naive UTC
+
+    def __repr__(self):
+        return f"<CacheInvalidation(id={self.id}, namespace='{self.namespace}')>"
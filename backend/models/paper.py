@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Index, LargeBinary
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from backend.core.abstract_codec import abstract_codec
 from backend.core.database import Base
+from backend.schemas.arxiv_schema import ArxivAuthor, ArxivPaper
 
 class Paper(Base):
     __tablename__ = "papers_cache"
@@ -9,13 +12,84 @@ class Paper(Base):
     arxiv_id = Column(String, unique=True, index=True, nullable=False)
     title = Column(String, nullable=False)
     authors = Column(JSON) # Storing as JSON
-    abstract = Column(Text, nullable=True)
+    abstract_data = Column("abstract_z", LargeBinary, nullable=True)  # compressed, see `abstract`
+    abstract_codec = Column(String, nullable=True)  # AbstractCodec tag of abstract_data
     published_date = Column(DateTime, nullable=True)
+    updated_date = Column(DateTime, nullable=True)  # last revision on arXiv
     url = Column(String, nullable=True)
-    
+    primary_category = Column(String, nullable=True, index=True)
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    # Access statistics for cache eviction (see backend/crud/cache_maintenance.py)
+    last_accessed_at = Column(DateTime, nullable=True, index=True)  # naive UTC
+    hit_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    category_links = relationship(
+        "PaperCategory", back_populates="paper", order_by="PaperCategory.position", cascade="all, delete-orphan",
+        lazy="selectin"  # loaded with the paper; async sessions cannot lazy-load on attribute access
+    )
+
+    @property
+    def abstract(self):
+        return abstract_codec.decompress(self.abstract_data, self.abstract_codec)
+
+    @abstract.setter
+    def abstract(self, text):
+        self.abstract_data, self.abstract_codec = abstract_codec.compress(text)
+
+    @property
+    def categories(self):
+        return [link.category for link in self.category_links]
+
+    @categories.setter
+    def categories(self, categories):
+        self.category_links = [PaperCategory(category=category, position=index) for index, category in enumerate(categories)]
+
+    def to_arxiv(self) -> ArxivPaper:
+        """Rebuilds the arXiv search result this row was cached from."""
+        return ArxivPaper(
+            entry_id=f"http://arxiv.org/abs/{self.arxiv_id}",
+            title=self.title,
+            authors=[ArxivAuthor(name=name) for name in self.authors or []],
+            summary=self.abstract or "",
+            published=self.published_date,
+            updated=self.updated_date or self.published_date,
+            pdf_url=self.url,
+            categories=self.categories,
+            primary_category=self.primary_category,
+        )
+
     def __repr__(self):
         return f"<Paper(id={self.id}, arxiv_id='{self.arxiv_id}', title='{self.title[:30]}...')>"
+
+class PaperCategory(Base):
+    """One arXiv category of a cached paper; indexed by category for filtering."""
+    __tablename__ = "paper_categories"
+    __table_args__ = (Index("ix_paper_categories_category", "category", "paper_id"),)
+
+    paper_id = Column(Integer, ForeignKey("papers_cache.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False)  # order on arXiv; the primary category usually comes first
+
+    paper = relationship("Paper", back_populates="category_links")
+
+    def __repr__(self):
+        return f"<PaperCategory(paper_id={self.paper_id}, category='{self.category}')>"
+
+class CompressionDictionary(Base):
+    """A shared dictionary trained from cached abstracts (see AbstractCodec)."""
+    __tablename__ = "compression_dictionaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    codec = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<CompressionDictionary(id={self.id}, codec='{self.codec}', bytes={len(self.data)})>"
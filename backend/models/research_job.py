@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from backend.core.database import Base
+
+class ResearchJob(Base):
+    __tablename__ = "research_jobs"
+
+    id = Column(String, primary_key=True, index=True)  # UUID hex
+    status = Column(String, nullable=False, index=True, default="queued")  # queued / running / completed / failed
+    request = Column(JSON, nullable=False)  # ResearchTreeRequest as submitted
+    research_goal = Column(Text, nullable=True)
+    query_plan = Column(JSON, nullable=True)  # [{"query": ..., "description": ...}], stored once generated
+    error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    nodes = relationship(
+        "ResearchJobNode", back_populates="job", order_by="ResearchJobNode.position", cascade="all, delete-orphan",
+        lazy="selectin"  # loaded with the job; async sessions cannot lazy-load on attribute access
+    )
+
+    def __repr__(self):
+        return f"<ResearchJob(id='{self.id}', status='{self.status}')>"
+
+class ResearchJobNode(Base):
+    """A completed query node of a research job (the unit of resumption)."""
+    __tablename__ = "research_job_nodes"
+    __table_args__ = (UniqueConstraint("job_id", "position", name="uq_research_job_node_position"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("research_jobs.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # index in query_plan
+    query = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    papers = Column(JSON, nullable=False)  # list of ScoredPaper dicts
+    paper_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    job = relationship("ResearchJob", back_populates="nodes")
+
+    def __repr__(self):
+        return f"<ResearchJobNode(job_id='{self.job_id}', position={self.position}, query='{self.query[:30]}')>"
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from backend.core.database import Base
+
+class ResearchTreeCacheEntry(Base):
+    """A complete SearchTreeResponse cached under the canonical hash of its request."""
+    __tablename__ = "research_tree_cache"
+
+    key = Column(String, primary_key=True, index=True)  # pipeline_key of request + LLM fingerprint + prompt version
+    etag = Column(String, nullable=False)
+    body = Column(Text, nullable=False)  # serialized SearchTreeResponse JSON
+    expires_at = Column(DateTime, nullable=False, index=True)  # naive UTC
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Access statistics for cache eviction (see backend/crud/cache_maintenance.py)
+    last_accessed_at = Column(DateTime, nullable=True, index=True)  # naive UTC
+    hit_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<ResearchTreeCacheEntry(key='{self.key[:12]}', etag={self.etag})>"
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from backend.core.database import Base
+
+class SavedResearchTree(Base):
+    """A research tree kept for monitoring; refreshed incrementally with its stored plan."""
+    __tablename__ = "saved_research_trees"
+
+    id = Column(String, primary_key=True, index=True)  # UUID hex
+    request = Column(JSON, nullable=False)  # ResearchTreeRequest as submitted
+    research_goal = Column(Text, nullable=False)
+    watermark = Column(DateTime, nullable=False)  # naive UTC start time of the last (full or incremental) run
+    refresh_count = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    nodes = relationship(
+        "SavedResearchTreeNode", back_populates="tree", order_by="SavedResearchTreeNode.position", cascade="all, delete-orphan",
+        lazy="selectin"  # loaded with the tree; async sessions cannot lazy-load on attribute access
+    )
+
+    def __repr__(self):
+        return f"<SavedResearchTree(id='{self.id}', refresh_count={self.refresh_count})>"
+
+class SavedResearchTreeNode(Base):
+    __tablename__ = "saved_research_tree_nodes"
+    __table_args__ = (UniqueConstraint("tree_id", "position", name="uq_saved_tree_node_position"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    tree_id = Column(String, ForeignKey("saved_research_trees.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # index in the stored query plan
+    query = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    papers = Column(JSON, nullable=False)  # ScoredPaper dicts, ranked by relevance
+    arxiv_ids = Column(JSON, nullable=False)  # every arxiv_id this node has already scored
+
+    tree = relationship("SavedResearchTree", back_populates="nodes")
+
+    def __repr__(self):
+        return f"<SavedResearchTreeNode(tree_id='{self.tree_id}', position={self.position}, query='{self.query[:30]}')>"
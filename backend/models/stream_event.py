@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from backend.core.database import Base
+
+class StreamSession(Base):
+    """One run of a streaming pipeline; its events can be replayed on reconnect."""
+    __tablename__ = "stream_sessions"
+
+    id = Column(String, primary_key=True, index=True)  # UUID hex, first part of the SSE event id
+    key = Column(String, nullable=False, index=True)  # pipeline_key of the request parameters
+    status = Column(String, nullable=False, default="running")  # running / completed / failed / cancelled
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<StreamSession(id='{self.id}', status='{self.status}')>"
+
+class StreamEvent(Base):
+    """Append-only log of the SSE events of a stream session."""
+    __tablename__ = "stream_events"
+
+    session_id = Column(String, ForeignKey("stream_sessions.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)  # 1, 2, 3, ... within the session
+    data = Column(Text, nullable=False)  # the SSE event exactly as sent
+
+    def __repr__(self):
+        return f"<StreamEvent(session_id='{self.session_id}', seq={self.seq})>"
@@ -1,6 +1,20 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, List, Literal, Optional, Tuple
+from datetime import date, datetime
+import re
+
+# "http://arxiv.org/abs/2401.01234v2", "2401.01234v2", "hep-th/9901001v1", ".../pdf/2401.01234v2.pdf"
+_ARXIV_ID_PATTERN = re.compile(r"(?:^|/(?:abs|pdf)/)((?:[a-z-]+(?:\.[A-Z]{2})?/)?\d{4}\.?\d{3,5})(v\d+)?(?:\.pdf)?$", re.IGNORECASE)
+
+def canonical_arxiv_id(entry_id: str) -> str:
+    """
+    The version-less arXiv ID of an entry ID, URL or versioned ID, so that every version
+    of a paper has the same identity. Unrecognized IDs are returned as their last path segment.
+    """
+    match = _ARXIV_ID_PATTERN.search(entry_id.strip())
+    if match is None:
+        return entry_id.rstrip("/").split("/")[-1]
+    return match.group(1)
 
 class ArxivAuthor(BaseModel):
     name: str
@@ -14,10 +28,67 @@ class ArxivPaper(BaseModel):
     updated: datetime = Field(..., description="Date the paper was last updated")
     pdf_url: Optional[str] = Field(None, description="URL to the PDF of the paper")
     categories: List[str] = Field(..., description="Categories of the paper")
+    primary_category: Optional[str] = Field(None, description="Primary category of the paper")
+
+    @property
+    def arxiv_id(self) -> str:
+        """Canonical (version-less) arXiv ID"""
+        return canonical_arxiv_id(self.entry_id)
+
+# An arXiv category such as "cs.AI" or "hep-th"; the pattern also keeps it safe to embed in queries
+ArxivCategory = Annotated[str, Field(pattern=r"^[A-Za-z-]+(\.[A-Za-z-]+)?$")]
+
+SortOrder = Literal["relevance", "submitted", "updated"]
+
+class SearchFilters(BaseModel):
+    """Filters applied where papers are fetched: compiled into arXiv queries, or looked up in the local indexes."""
+    categories: Optional[List[ArxivCategory]] = Field(None, description="Only papers in any of these arXiv categories")
+    date_from: Optional[date] = Field(None, description="Only papers first submitted on or after this date")
+    date_to: Optional[date] = Field(None, description="Only papers first submitted on or before this date")
+    sort: SortOrder = Field("relevance", description="Order of the search results (submitted/updated: newest first)")
 
-class ArxivSearchRequest(BaseModel):
-    keyword: str = Field(..., description="Keyword to search for on arXiv")
+    def date_range(self) -> Tuple[Optional[date], Optional[date]]:
+        return self.date_from, self.date_to
+
+    @property
+    def has_filters(self) -> bool:
+        return bool(self.categories) or self.date_from is not None or self.date_to is not None
+
+    @model_validator(mode="after")
+    def _check_date_range(self):
+        date_from, date_to = self.date_range()
+        if date_from is not None and date_to is not None and date_from > date_to:
+            raise ValueError("the date range is empty (date_from is after date_to)")
+        return self
+
+class ArxivSearchRequest(SearchFilters):
+    keyword: Optional[str] = Field(None, description="Keyword to search for (required when searching arXiv)")
     max_results: int = Field(10, description="Maximum number of results to return")
+    source: Literal["arxiv", "local"] = Field("arxiv", description="Search arXiv, or only the papers cached locally")
+    authors: Optional[List[str]] = Field(None, description="Only papers by any of these authors")
+    year_from: Optional[int] = Field(None, description="Only papers published in or after this year")
+    year_to: Optional[int] = Field(None, description="Only papers published in or before this year")
+
+    def date_range(self) -> Tuple[Optional[date], Optional[date]]:
+        """date_from/date_to narrowed by year_from/year_to."""
+        date_from, date_to = self.date_from, self.date_to
+        if self.year_from is not None:
+            date_from = max(date_from or date.min, date(self.year_from, 1, 1))
+        if self.year_to is not None:
+            date_to = min(date_to or date.max, date(self.year_to, 12, 31))
+        return date_from, date_to
+
+    @property
+    def has_filters(self) -> bool:
+        return super().has_filters or bool(self.authors) or self.year_from is not None or self.year_to is not None
+
+    @model_validator(mode="after")
+    def _check_query(self):
+        if self.source == "arxiv" and not self.keyword:
+            raise ValueError("keyword is required when searching arXiv")
+        if self.source == "local" and not self.keyword and not self.has_filters:
+            raise ValueError("a local search needs a keyword or at least one filter")
+        return self
 
 class ArxivSearchResponse(BaseModel):
     papers: List[ArxivPaper]
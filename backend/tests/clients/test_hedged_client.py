@@ -0,0 +1,77 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from backend.app.clients.hedged_client import HedgedLLMClient
+from backend.core.metrics import LatencyTracker
+
+
+def _warm_tracker(latency: float, samples: int = 20) -> LatencyTracker:
+    tracker = LatencyTracker()
+    for _ in range(samples):
+        tracker.observe(latency)
+    return tracker
+
+
+class TestHedgedLLMClient(unittest.TestCase):
+
+    def test_no_hedge_before_min_samples(self):
+        primary = MagicMock()
+        primary.generate_text.return_value = "primary answer"
+        hedge = MagicMock()
+        client = HedgedLLMClient(primary, hedge, min_samples=5, tracker=LatencyTracker())
+
+        result = client.generate_text("prompt", timeout=1.0)
+
+        self.assertEqual(result, "primary answer")
+        primary.generate_text.assert_called_once_with("prompt", timeout=1.0)
+        hedge.generate_text.assert_not_called()
+        self.assertEqual(client.latency.count, 1)
+
+    def test_fast_primary_is_not_hedged(self):
+        primary = MagicMock()
+        primary.generate_text.return_value = "primary answer"
+        hedge = MagicMock()
+        client = HedgedLLMClient(primary, hedge, tracker=_warm_tracker(0.5))
+
+        self.assertEqual(client.generate_text("prompt"), "primary answer")
+        hedge.generate_text.assert_not_called()
+
+    def test_slow_primary_is_hedged(self):
+        primary = MagicMock()
+        primary.generate_text.side_effect = lambda prompt, **kwargs: time.sleep(0.5) or "slow answer"
+        hedge = MagicMock()
+        hedge.generate_text.return_value = "hedged answer"
+        client = HedgedLLMClient(primary, hedge, hedge_model="small-model", tracker=_warm_tracker(0.01))
+
+        result = client.generate_text("prompt", timeout=2.0)
+
+        self.assertEqual(result, "hedged answer")
+        args, kwargs = hedge.generate_text.call_args
+        self.assertEqual(args, ("prompt",))
+        self.assertEqual(kwargs["model"], "small-model")
+        self.assertLessEqual(kwargs["timeout"], 2.0)
+
+    def test_empty_primary_answer_falls_back_to_hedge(self):
+        primary = MagicMock()
+        primary.generate_text.return_value = ""
+        hedge = MagicMock()
+        hedge.generate_text.return_value = "hedged answer"
+        client = HedgedLLMClient(primary, hedge, tracker=_warm_tracker(0.5))
+
+        self.assertEqual(client.generate_text("prompt"), "hedged answer")
+
+    def test_both_slow_returns_empty_after_timeout(self):
+        slow = MagicMock()
+        slow.generate_text.side_effect = lambda prompt, **kwargs: time.sleep(0.5) or "late"
+        client = HedgedLLMClient(slow, slow, tracker=_warm_tracker(0.01))
+
+        started = time.monotonic()
+        result = client.generate_text("prompt", timeout=0.1)
+
+        self.assertEqual(result, "")
+        self.assertLess(time.monotonic() - started, 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
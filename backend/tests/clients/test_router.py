@@ -0,0 +1,117 @@
+import json
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.app.clients.router import RoutedLLMClient, RouteTarget
+from backend.core.config import get_llm_routes
+from backend.core.metrics import latency_tracker
+
+
+def _client(answer: str) -> MagicMock:
+    client = MagicMock()
+    client.generate_text.return_value = answer
+    return client
+
+
+def test_stage_uses_its_own_chain():
+    planner = _client("plan answer")
+    scorer = _client("score answer")
+    router = RoutedLLMClient({
+        "plan": [RouteTarget(provider="gemini", client=planner, model="strong-model")],
+        "score": [RouteTarget(provider="ollama", client=scorer, model="small-model")],
+    })
+
+    assert router.generate_text("p", stage="score") == "score answer"
+    scorer.generate_text.assert_called_once_with("p", model="small-model")
+    planner.generate_text.assert_not_called()
+
+
+def test_unknown_stage_falls_back_to_plan_chain():
+    planner = _client("plan answer")
+    router = RoutedLLMClient({"plan": [RouteTarget(provider="gemini", client=planner)]})
+
+    assert router.generate_text("p", stage="explain") == "plan answer"
+
+
+def test_empty_answer_falls_through_to_next_target():
+    failing = _client("")
+    backup = _client("backup answer")
+    router = RoutedLLMClient({"plan": [
+        RouteTarget(provider="ollama", client=failing, model="route-test-a", slo_ms=500),
+        RouteTarget(provider="gemini", client=backup, model="route-test-b"),
+    ]})
+
+    assert router.generate_text("p", timeout=10.0) == "backup answer"
+    # Non-final targets get at most their SLO as timeout.
+    assert failing.generate_text.call_args.kwargs["timeout"] == 0.5
+
+
+def test_target_over_slo_is_demoted():
+    slow = _client("slow answer")
+    fast = _client("fast answer")
+    slow_target = RouteTarget(provider="ollama", client=slow, model="route-test-slow", slo_ms=100, min_samples=3)
+    for _ in range(3):
+        latency_tracker(f"llm.{slow_target.name}").observe(1.0)
+    router = RoutedLLMClient({"plan": [
+        slow_target,
+        RouteTarget(provider="gemini", client=fast, model="route-test-fast"),
+    ]})
+
+    assert router.generate_text("p") == "fast answer"
+    slow.generate_text.assert_not_called()
+
+
+def test_demoted_target_recovers_once_its_latencies_age_out():
+    slow = _client("recovered answer")
+    fast = _client("fast answer")
+    slow_target = RouteTarget(
+        provider="ollama", client=slow, model="route-test-recovering", slo_ms=100, min_samples=3, latency_max_age_s=0.05
+    )
+    for _ in range(3):
+        slow_target.latency.observe(1.0)
+    router = RoutedLLMClient({"plan": [
+        slow_target,
+        RouteTarget(provider="gemini", client=fast, model="route-test-fast"),
+    ]})
+
+    assert router.generate_text("p") == "fast answer"
+    time.sleep(0.06)
+
+    assert slow_target.within_slo()
+    assert router.generate_text("p") == "recovered answer"
+
+
+def test_routing_table_requires_plan_stage():
+    with pytest.raises(ValueError):
+        RoutedLLMClient({"score": [RouteTarget(provider="gemini", client=_client("x"))]})
+
+
+def test_get_llm_routes_parses_env(monkeypatch):
+    monkeypatch.setenv("API_PROVIDER", "ollama")
+    monkeypatch.setenv("LLM_ROUTES", json.dumps({
+        "score": [{"provider": "Ollama", "model": "llama3.2:1b", "slo_ms": 1500}],
+    }))
+
+    routes = get_llm_routes()
+
+    assert routes["score"] == [{"provider": "ollama", "model": "llama3.2:1b", "slo_ms": 1500}]
+    assert routes["plan"] == [{"provider": "ollama"}]
+
+
+@pytest.mark.parametrize("raw", [
+    "not json",
+    json.dumps({"rerank": [{"provider": "gemini"}]}),
+    json.dumps({"plan": [{"provider": "openai"}]}),
+    json.dumps({"plan": []}),
+])
+def test_get_llm_routes_rejects_invalid_tables(monkeypatch, raw):
+    monkeypatch.setenv("LLM_ROUTES", raw)
+    with pytest.raises(ValueError):
+        get_llm_routes()
+
+
+def test_get_llm_routes_unset(monkeypatch):
+    monkeypatch.delenv("LLM_ROUTES", raising=False)
+    assert get_llm_routes() is None
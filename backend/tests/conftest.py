@@ -0,0 +1,12 @@
+import pytest
+
+from backend.app.tiered_cache import arxiv_search_cache, llm_response_cache, score_cache
+
+
+@pytest.fixture(autouse=True)
+def disable_shared_caches(monkeypatch):
+    # The process-wide caches are backed by the real cache database; keep tests independent
+    # of each other and of earlier runs. Cache tests use caches of their own.
+    for cache in (arxiv_search_cache, score_cache, llm_response_cache):
+        monkeypatch.setattr(cache, "ttl_s", 0)
+        cache.invalidate_local()
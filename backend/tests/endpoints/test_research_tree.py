@@ -1,7 +1,11 @@
+import arxiv
+import gzip
+import json
+import time
 import unittest
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi import HTTPException
-from datetime import datetime
+from datetime import date, datetime
 from typing import List
 
 # Modules to test
@@ -13,15 +17,26 @@ from backend.api.endpoints.research_tree import (
     _generate_research_plan,
     _calculate_relevance_score,
     _deduplicate_papers,
-    research_tree_search
+    _LiveTopK,
+    _stream_key,
+    research_tree,
+    research_tree_search,
+    research_tree_stream
 )
+from backend.app.admission import AdmissionController
+from backend.app.clients.router import RoutedLLMClient, RouteTarget
+from backend.app.response_cache import ResponseCache, etag_matches
+from backend.core.database import Base
+from sqlalchemy import StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 # Clients to mock
 # GeminiClient and OllamaClient might be used for spec if specific client behavior is tested,
 # but for generic LLM client mocking, a simple MagicMock is often sufficient.
-# from backend.app.clients.gemini_client import GeminiClient 
+from backend.app.clients.gemini_client import GeminiClient
 # from backend.app.clients.ollama_client import OllamaClient
 from backend.api.arxiv_client import ArxivAPIClient
+from backend.core.deadline import deadline_scope
 
 # For creating mock Arxiv paper objects
 from backend.schemas.arxiv_schema import ArxivPaper as MockArxivPaperSchema, ArxivAuthor
@@ -190,6 +205,20 @@ class TestCalculateRelevanceScore(unittest.IsolatedAsyncioTestCase):
         mock_gemini_client.generate_text.assert_called_once()
 
 
+    async def test_score_times_out_within_request_deadline(self):
+        mock_llm_client = MagicMock()
+        mock_llm_client.generate_text = MagicMock(side_effect=lambda **kwargs: time.sleep(0.5) or "Score: 0.9 | Explanation: late")
+
+        with deadline_scope(50):
+            score, explanation = await _calculate_relevance_score(
+                title="Slow", authors=[], abstract="Test", original_query="Test", client=mock_llm_client
+            )
+
+        self.assertEqual(score, 0.0)
+        self.assertEqual(explanation, "スコア計算タイムアウト")
+        self.assertLessEqual(mock_llm_client.generate_text.call_args.kwargs["timeout"], 0.05)
+
+
 class TestDeduplicatePapers(unittest.TestCase):
     def test_no_duplicates(self):
         nodes = [
@@ -294,6 +323,50 @@ class TestResearchTreeSearch(unittest.IsolatedAsyncioTestCase):
         mock_arxiv_client.search_papers.assert_called_once_with(keyword="query1", max_results=request.max_results_per_query)
         mock_calculate_score.assert_called_once()
 
+    @patch('backend.api.endpoints.research_tree._calculate_relevance_score', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
+    async def test_filters_are_pushed_down_to_arxiv(self, mock_generate_plan: AsyncMock, mock_calculate_score: AsyncMock):
+        mock_arxiv_client = MagicMock(spec=ArxivAPIClient)
+        mock_arxiv_client.search_papers = AsyncMock(return_value=[])
+        mock_generate_plan.return_value = ("Goal", [("query1", "desc1")])
+        request = ResearchTreeRequest(
+            natural_language_query="AI in education", max_results_per_query=3, max_queries=1,
+            categories=["cs.CY"], date_from=date(2024, 1, 1), sort="submitted",
+        )
+
+        await research_tree_search(request, MagicMock(spec=GeminiClient), mock_arxiv_client)
+
+        mock_arxiv_client.search_papers.assert_called_once_with(
+            keyword="query1", max_results=3, categories=["cs.CY"], date_from=date(2024, 1, 1),
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+        )
+        mock_calculate_score.assert_not_called()
+
+    @patch('backend.api.endpoints.research_tree._calculate_relevance_score', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
+    async def test_versions_and_near_duplicates_are_scored_once(self, mock_generate_plan: AsyncMock, mock_calculate_score: AsyncMock):
+        abstract = "We propose a retrieval augmented tutor that adapts explanations to the misconceptions of each student. " * 2
+        papers = {
+            "query1": [self._create_mock_arxiv_paper("2301.00001v1", "Adaptive Tutors", ["A"], abstract),
+                       self._create_mock_arxiv_paper("2301.00002v1", "Grading Essays", ["B"], "Essay grading with language models.")],
+            "query2": [self._create_mock_arxiv_paper("2301.00001v2", "Adaptive Tutors", ["A"], abstract),
+                       self._create_mock_arxiv_paper("2302.00009v1", "Adaptive tutors!", ["A"], abstract + " Cross-listed.")],
+        }
+        mock_arxiv_client = MagicMock(spec=ArxivAPIClient)
+        mock_arxiv_client.search_papers = AsyncMock(side_effect=lambda keyword, max_results: papers[keyword])
+        mock_generate_plan.return_value = ("Goal", [("query1", "desc1"), ("query2", "desc2")])
+        mock_calculate_score.return_value = (0.8, "ok")
+        request = ResearchTreeRequest(natural_language_query="AI tutors", max_results_per_query=2, max_queries=2)
+
+        response = await research_tree_search(request, MagicMock(spec=GeminiClient), mock_arxiv_client)
+
+        self.assertEqual(mock_calculate_score.await_count, 2)
+        second = {paper.arxiv_id: paper for paper in response.query_nodes[1].papers}
+        self.assertEqual(set(second), {"2301.00001", "2302.00009"})
+        self.assertIsNone(second["2301.00001"].duplicate_of)
+        self.assertEqual(second["2302.00009"].duplicate_of, "2301.00001")
+        self.assertEqual(second["2302.00009"].relevance_score, 0.8)
+        self.assertEqual(response.total_unique_papers, 2)
 
     @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
     async def test_generate_research_plan_failure(self, mock_generate_plan: AsyncMock):
@@ -430,5 +503,328 @@ class TestResearchTreeSearch(unittest.IsolatedAsyncioTestCase):
             self.assertTrue("Research tree search failed: Unexpected major failure" in str(context.exception.detail))
 
 
+def _scored_paper(arxiv_id: str, score: float) -> ScoredPaper:
+    return ScoredPaper(
+        title=f"Paper {arxiv_id}", authors=["A"], abstract="", published_date=datetime(2023, 1, 1),
+        url=f"http://arxiv.org/pdf/{arxiv_id}", categories=["cs.AI"], arxiv_id=arxiv_id,
+        relevance_score=score, relevance_explanation=""
+    )
+
+
+class TestLiveTopK(unittest.TestCase):
+    def test_keeps_highest_scores_in_order(self):
+        top_k = _LiveTopK(2)
+        self.assertTrue(top_k.add(_scored_paper("a", 0.2)))
+        self.assertTrue(top_k.add(_scored_paper("b", 0.9)))
+        self.assertTrue(top_k.add(_scored_paper("c", 0.5)))
+        self.assertFalse(top_k.add(_scored_paper("d", 0.1)))
+        self.assertEqual([p.arxiv_id for p in top_k.snapshot()], ["b", "c"])
+
+    def test_same_paper_keeps_best_score_only(self):
+        top_k = _LiveTopK(2)
+        top_k.add(_scored_paper("a", 0.4))
+        top_k.add(_scored_paper("b", 0.6))
+        self.assertFalse(top_k.add(_scored_paper("a", 0.3)))
+        self.assertTrue(top_k.add(_scored_paper("a", 0.8)))
+        self.assertTrue(top_k.add(_scored_paper("c", 0.7)))
+        snapshot = top_k.snapshot()
+        self.assertEqual([p.arxiv_id for p in snapshot], ["a", "c"])
+        self.assertEqual(snapshot[0].relevance_score, 0.8)
+
+
+class TestResearchTreeStream(unittest.IsolatedAsyncioTestCase):
+    _create_mock_arxiv_paper = TestResearchTreeSearch._create_mock_arxiv_paper
+
+    def test_streams_are_only_shared_under_the_same_llm_configuration(self):
+        def routed(model):
+            return RoutedLLMClient({"plan": [RouteTarget(provider="ollama", client=MagicMock(), model=model)]})
+        request = ResearchTreeRequest(natural_language_query="stream test")
+
+        self.assertEqual(_stream_key(request, routed("small")), _stream_key(request, routed("small")))
+        self.assertNotEqual(_stream_key(request, routed("small")), _stream_key(request, routed("large")))
+        self.assertNotEqual(_stream_key(request, routed("small")), _stream_key(request, routed("small"), "normalized"))
+
+    @patch('backend.api.endpoints.research_tree._calculate_relevance_score', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
+    async def test_emits_fine_grained_events(self, mock_generate_plan: AsyncMock, mock_calculate_score: AsyncMock):
+        mock_gemini_client = MagicMock(spec=GeminiClient)
+        mock_arxiv_client = MagicMock(spec=ArxivAPIClient)
+        request = ResearchTreeRequest(natural_language_query="stream test", max_results_per_query=2, max_queries=2, top_k=2)
+
+        mock_generate_plan.return_value = ("Goal", [("query1", "desc1"), ("query2", "desc2")])
+        papers = {
+            "query1": [self._create_mock_arxiv_paper("2301.0001", "P1", ["A"], "x"),
+                       self._create_mock_arxiv_paper("2301.0002", "P2", ["A"], "x")],
+            "query2": [self._create_mock_arxiv_paper("2301.0002", "P2", ["A"], "x"),
+                       self._create_mock_arxiv_paper("2301.0003", "P3", ["A"], "x")],
+        }
+        mock_arxiv_client.search_papers = AsyncMock(side_effect=lambda keyword, max_results: papers[keyword])
+        scores = {"P1": 0.3, "P2": 0.9, "P3": 0.6}
+        mock_calculate_score.side_effect = lambda title, authors, abstract, original_query, client: (scores[title], "ok")
+
+        response = await research_tree_stream(request, mock_gemini_client, mock_arxiv_client)
+        chunks = [chunk async for chunk in response.body_iterator]
+        events = [
+            json.loads(line[len("data: "):])
+            for chunk in chunks for line in chunk.splitlines() if line.startswith("data: ")
+        ]
+        event_ids = [line[len("id: "):] for chunk in chunks for line in chunk.splitlines() if line.startswith("id: ")]
+        types = [event["type"] for event in events]
+
+        self.assertEqual(types[0], "queries")
+        self.assertEqual(types[-2:], ["top_k", "done"])
+        self.assertEqual(types.count("papers_found"), 2)
+        self.assertEqual(types.count("paper_scored"), 4)
+        self.assertEqual(types.count("papers"), 2)
+        for query in ("query1", "query2"):
+            query_types = [event["type"] for event in events if event.get("query") == query]
+            self.assertEqual(query_types, ["papers_found", "paper_scored", "paper_scored", "papers"])
+
+        self.assertEqual([p["arxiv_id"] for p in events[-2]["papers"]], ["2301.0002", "2301.0003"])
+        self.assertEqual(events[-1]["total_papers"], 4)
+        self.assertEqual(events[-1]["total_unique_papers"], 3)
+        # Every event carries a resumable "<session>:<seq>" id
+        self.assertEqual([event_id.split(":")[1] for event_id in event_ids], [str(i) for i in range(1, len(events) + 1)])
+
+    @patch('backend.api.endpoints.research_tree._calculate_relevance_score', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
+    async def test_top_k_is_updated_as_papers_are_scored(self, mock_generate_plan: AsyncMock, mock_calculate_score: AsyncMock):
+        mock_arxiv_client = MagicMock(spec=ArxivAPIClient)
+        request = ResearchTreeRequest(natural_language_query="live top k", max_results_per_query=2, max_queries=1, top_k=2)
+        mock_generate_plan.return_value = ("Goal", [("query1", "desc1")])
+        mock_arxiv_client.search_papers = AsyncMock(return_value=[
+            self._create_mock_arxiv_paper("2301.0001", "Fast", ["A"], "x"),
+            self._create_mock_arxiv_paper("2301.0002", "Slow", ["A"], "y"),
+        ])
+
+        async def score(title, authors, abstract, original_query, client):
+            if title == "Slow":
+                await asyncio.sleep(0.2)
+            return 0.5, "ok"
+        mock_calculate_score.side_effect = score
+
+        response = await research_tree_stream(request, MagicMock(spec=GeminiClient), mock_arxiv_client)
+        events = [
+            json.loads(line[len("data: "):])
+            for chunk in [chunk async for chunk in response.body_iterator]
+            for line in chunk.splitlines() if line.startswith("data: ")
+        ]
+
+        types = [event["type"] for event in events]
+        first_top_k = types.index("top_k")
+        self.assertLess(first_top_k, types.index("papers"))
+        self.assertEqual([paper["arxiv_id"] for paper in events[first_top_k]["papers"]], ["2301.0001"])
+
+    @patch('backend.api.endpoints.research_tree._calculate_relevance_score', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
+    async def test_normalized_format_sends_each_paper_once(self, mock_generate_plan: AsyncMock, mock_calculate_score: AsyncMock):
+        mock_arxiv_client = MagicMock(spec=ArxivAPIClient)
+        request = ResearchTreeRequest(natural_language_query="normalized stream", max_results_per_query=2, max_queries=2, top_k=2)
+        mock_generate_plan.return_value = ("Goal", [("query1", "desc1"), ("query2", "desc2")])
+        papers = {
+            "query1": [self._create_mock_arxiv_paper("2301.0001", "P1", ["A"], "x"),
+                       self._create_mock_arxiv_paper("2301.0002", "P2", ["A"], "x")],
+            "query2": [self._create_mock_arxiv_paper("2301.0002", "P2", ["A"], "x")],
+        }
+        mock_arxiv_client.search_papers = AsyncMock(side_effect=lambda keyword, max_results: papers[keyword])
+        scores = {"P1": 0.3, "P2": 0.9}
+        mock_calculate_score.side_effect = lambda title, authors, abstract, original_query, client: (scores[title], "ok")
+
+        response = await research_tree_stream(request, MagicMock(spec=GeminiClient), mock_arxiv_client, None, "normalized")
+        events = [
+            json.loads(line[len("data: "):])
+            for chunk in [chunk async for chunk in response.body_iterator]
+            for line in chunk.splitlines() if line.startswith("data: ")
+        ]
+
+        sent_records = [arxiv_id for event in events if isinstance(event.get("papers"), dict) for arxiv_id in event["papers"]]
+        self.assertEqual(sorted(sent_records), ["2301.0001", "2301.0002"])
+        top_k = events[-2]
+        self.assertEqual(top_k["type"], "top_k")
+        self.assertEqual(top_k["papers"], {})
+        self.assertEqual([(ref["arxiv_id"], ref["rank"], ref["relevance_score"]) for ref in top_k["refs"]],
+                         [("2301.0002", 1, 0.9), ("2301.0001", 2, 0.3)])
+
+
+class TestResearchTreeResponseCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.addAsyncCleanup(engine.dispose)
+        self.cache = ResponseCache(session_factory=async_sessionmaker(engine, expire_on_commit=False), ttl_s=60)
+        patcher = patch('backend.api.endpoints.research_tree.research_tree_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _response(self, papers):
+        return SearchTreeResponse(
+            original_query="q", research_goal="q",
+            query_nodes=[QueryNode(query="q1", description="d1", papers=papers, paper_count=len(papers))],
+            total_papers=len(papers), total_unique_papers=len(papers)
+        )
+
+    async def _call(self, request, refresh=False, if_none_match=None):
+        return await research_tree(request, refresh, if_none_match, MagicMock(spec=GeminiClient), MagicMock(spec=ArxivAPIClient))
+
+    @patch('backend.api.endpoints.research_tree.research_tree_search', new_callable=AsyncMock)
+    async def test_repeated_request_is_served_from_cache(self, mock_search: AsyncMock):
+        mock_search.return_value = self._response([_scored_paper("a", 0.9)])
+        request = ResearchTreeRequest(natural_language_query="AI  in education")
+
+        first = await self._call(request)
+        # Whitespace and the time budget do not change the cache key
+        second = await self._call(ResearchTreeRequest(natural_language_query="AI in education", time_budget_ms=5000))
+
+        self.assertEqual(mock_search.await_count, 1)
+        self.assertEqual(first.headers["X-Cache"], "miss")
+        self.assertEqual(second.headers["X-Cache"], "hit")
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(first.headers["ETag"], second.headers["ETag"])
+
+        not_modified = await self._call(request, if_none_match=first.headers["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        refreshed = await self._call(request, refresh=True)
+        self.assertEqual(refreshed.headers["X-Cache"], "miss")
+        self.assertEqual(mock_search.await_count, 2)
+
+    @patch('backend.api.endpoints.research_tree.research_tree_search', new_callable=AsyncMock)
+    async def test_degraded_results_are_not_cached(self, mock_search: AsyncMock):
+        failed = _scored_paper("a", 0.0)
+        failed.relevance_explanation = "スコア計算エラー"
+        mock_search.return_value = self._response([failed])
+        request = ResearchTreeRequest(natural_language_query="q")
+
+        await self._call(request)
+        response = await self._call(request)
+
+        self.assertEqual(mock_search.await_count, 2)
+        self.assertNotIn("ETag", response.headers)
+
+    @patch('backend.api.endpoints.research_tree.research_tree_search', new_callable=AsyncMock)
+    async def test_normalized_format_is_cached_separately_and_compressed(self, mock_search: AsyncMock):
+        paper = _scored_paper("a", 0.9)
+        paper.abstract = "long abstract " * 200
+        paper.relevance_explanation = "ok"
+        mock_search.return_value = SearchTreeResponse(
+            original_query="q", research_goal="q",
+            query_nodes=[QueryNode(query=f"q{i}", description="d", papers=[paper], paper_count=1) for i in range(3)],
+            total_papers=3, total_unique_papers=1
+        )
+        request = ResearchTreeRequest(natural_language_query="q")
+        llm_client, arxiv_client = MagicMock(spec=GeminiClient), MagicMock(spec=ArxivAPIClient)
+
+        tree = await research_tree(request, False, None, llm_client, arxiv_client)
+        normalized = await research_tree(request, False, None, llm_client, arxiv_client, "normalized", "gzip, deflate")
+
+        self.assertEqual(mock_search.await_count, 2)
+        self.assertEqual(normalized.headers["Content-Encoding"], "gzip")
+        body = json.loads(gzip.decompress(normalized.body))
+        self.assertEqual(body["format"], "normalized")
+        self.assertEqual(list(body["papers"]), ["a"])
+        self.assertEqual([node["papers"] for node in body["query_nodes"]], [[{
+            "arxiv_id": "a", "rank": 1, "relevance_score": 0.9, "relevance_explanation": "ok",
+            "scored": True, "provisional_rank": None, "duplicate_of": None,
+        }]] * 3)
+        self.assertLess(len(gzip.decompress(normalized.body)), len(tree.body) / 2)
+        self.assertNotIn("Content-Encoding", tree.headers)
+
+    def test_etag_matching(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+        self.assertTrue(etag_matches('W/"abc", "def"', '"abc"'))
+        self.assertTrue(etag_matches('*', '"abc"'))
+        self.assertFalse(etag_matches('"def"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+
+class TestAdmissionControl(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout_s=1.0)
+        for target, value in (('admission_controller', self.controller), ('research_tree_cache', ResponseCache(ttl_s=0))):
+            patcher = patch(f'backend.api.endpoints.research_tree.{target}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch('backend.api.endpoints.research_tree.research_tree_search', new_callable=AsyncMock)
+    async def test_rejects_with_retry_after_when_queue_is_full(self, mock_search: AsyncMock):
+        ticket = await self.controller.acquire()
+        request = ResearchTreeRequest(natural_language_query="q")
+
+        with self.assertRaises(HTTPException) as context:
+            await research_tree(request, True, None, MagicMock(spec=GeminiClient), MagicMock(spec=ArxivAPIClient))
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertIn("Retry-After", context.exception.headers)
+        mock_search.assert_not_awaited()
+
+        with self.assertRaises(HTTPException):
+            await research_tree_stream(request, MagicMock(spec=GeminiClient), MagicMock(spec=ArxivAPIClient), None)
+
+        ticket.release()
+        mock_search.return_value = SearchTreeResponse(
+            original_query="q", research_goal="q", query_nodes=[], total_papers=0, total_unique_papers=0
+        )
+        response = await research_tree(request, True, None, MagicMock(spec=GeminiClient), MagicMock(spec=ArxivAPIClient))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.controller.stats()["active"], 0)
+
+
+class TestEarlyTermination(unittest.IsolatedAsyncioTestCase):
+    _create_mock_arxiv_paper = TestResearchTreeSearch._create_mock_arxiv_paper
+
+    def _arxiv_client(self, papers_per_query):
+        client = MagicMock(spec=ArxivAPIClient)
+        client.search_papers = AsyncMock(side_effect=lambda keyword, max_results: [
+            self._create_mock_arxiv_paper(f"{keyword}.{rank}", f"{keyword}-{rank}", ["A"], "x")
+            for rank in range(papers_per_query)
+        ])
+        return client
+
+    @patch('backend.api.endpoints.research_tree.EARLY_STOP_SCORING_WINDOW', 1)
+    @patch('backend.api.endpoints.research_tree._calculate_relevance_score', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
+    async def test_stops_scoring_once_target_is_reached(self, mock_generate_plan, mock_calculate_score):
+        mock_generate_plan.return_value = ("Goal", [("q1", "d1")])
+        mock_calculate_score.return_value = (0.9, "relevant")
+        request = ResearchTreeRequest(natural_language_query="q", max_results_per_query=3, target_high_relevance=1)
+
+        response = await research_tree_search(request, MagicMock(spec=GeminiClient), self._arxiv_client(3))
+
+        self.assertEqual(mock_calculate_score.await_count, 1)
+        self.assertEqual(response.stop_reason, "target_reached")
+        self.assertEqual(response.unscored_papers, 2)
+        papers = response.query_nodes[0].papers
+        self.assertEqual([(p.title, p.scored, p.provisional_rank) for p in papers],
+                         [("q1-0", True, None), ("q1-1", False, 2), ("q1-2", False, 3)])
+
+    @patch('backend.api.endpoints.research_tree.EARLY_STOP_SCORING_WINDOW', 1)
+    @patch('backend.api.endpoints.research_tree._calculate_relevance_score', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
+    async def test_scores_in_pre_rank_order_across_nodes(self, mock_generate_plan, mock_calculate_score):
+        mock_generate_plan.return_value = ("Goal", [("q1", "d1"), ("q2", "d2")])
+        mock_calculate_score.return_value = (0.1, "not relevant")
+        request = ResearchTreeRequest(natural_language_query="q", max_results_per_query=2, target_high_relevance=5)
+
+        response = await research_tree_search(request, MagicMock(spec=GeminiClient), self._arxiv_client(2))
+
+        scored_titles = [call.kwargs["title"] for call in mock_calculate_score.await_args_list]
+        self.assertEqual(scored_titles, ["q1-0", "q2-0", "q1-1", "q2-1"])
+        self.assertIsNone(response.stop_reason)
+        self.assertEqual(response.unscored_papers, 0)
+
+    @patch('backend.api.endpoints.research_tree.EARLY_STOP_MIN_REMAINING_MS', 10_000_000)
+    @patch('backend.api.endpoints.research_tree._calculate_relevance_score', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.research_tree._generate_research_plan', new_callable=AsyncMock)
+    async def test_spent_budget_leaves_papers_unscored(self, mock_generate_plan, mock_calculate_score):
+        mock_generate_plan.return_value = ("Goal", [("q1", "d1")])
+        request = ResearchTreeRequest(natural_language_query="q", max_results_per_query=2, time_budget_ms=60_000)
+
+        response = await research_tree_search(request, MagicMock(spec=GeminiClient), self._arxiv_client(2))
+
+        mock_calculate_score.assert_not_called()
+        self.assertEqual(response.stop_reason, "budget_spent")
+        self.assertEqual([p.provisional_rank for p in response.query_nodes[0].papers], [1, 2])
+
+
 if __name__ == '__main__':
     unittest.main()
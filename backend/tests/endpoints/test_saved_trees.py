@@ -0,0 +1,135 @@
+import unittest
+from datetime import datetime, timedelta
+from typing import List
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import arxiv
+from fastapi import HTTPException
+from sqlalchemy import StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.api.endpoints.research_tree import ResearchTreeRequest, ScoredPaper, QueryNode, SearchTreeResponse
+from backend.api.endpoints.saved_trees import create_saved_tree, refresh_saved_tree, get_saved_tree
+from backend.api.arxiv_client import ArxivAPIClient
+from backend.app.admission import AdmissionController
+from backend.app.clients.gemini_client import GeminiClient
+from backend.core.database import Base
+from backend.schemas.arxiv_schema import ArxivPaper, ArxivAuthor
+
+
+def _scored(arxiv_id: str, score: float, explanation: str = "ok") -> ScoredPaper:
+    return ScoredPaper(
+        title=arxiv_id, authors=["A"], abstract="", published_date=datetime(2024, 1, 1),
+        url=f"http://arxiv.org/pdf/{arxiv_id}", categories=["cs.AI"], arxiv_id=arxiv_id,
+        relevance_score=score, relevance_explanation=explanation
+    )
+
+
+def _arxiv_paper(arxiv_id: str) -> ArxivPaper:
+    return ArxivPaper(
+        entry_id=f"http://arxiv.org/abs/{arxiv_id}", title=arxiv_id, authors=[ArxivAuthor(name="A")],
+        summary="", published=datetime(2024, 3, 1), updated=datetime(2024, 3, 1),
+        pdf_url=f"http://arxiv.org/pdf/{arxiv_id}", categories=["cs.AI"]
+    )
+
+
+class TestSavedTreeRefresh(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.addAsyncCleanup(engine.dispose)
+        self.db = async_sessionmaker(engine, expire_on_commit=False)()
+        self.addAsyncCleanup(self.db.close)
+        self.llm_client = MagicMock(spec=GeminiClient)
+        self.arxiv_client = MagicMock(spec=ArxivAPIClient)
+
+    @patch('backend.api.endpoints.saved_trees.research_tree_search', new_callable=AsyncMock)
+    async def _save_tree(self, mock_search: AsyncMock):
+        mock_search.return_value = SearchTreeResponse(
+            original_query="q", research_goal="goal",
+            query_nodes=[QueryNode(query="q1", description="d1", papers=[_scored("old", 0.5)], paper_count=1)],
+            total_papers=1, total_unique_papers=1
+        )
+        return await create_saved_tree(ResearchTreeRequest(natural_language_query="q", max_results_per_query=5), self.db, self.llm_client, self.arxiv_client)
+
+    @patch('backend.api.endpoints.saved_trees._score_paper', new_callable=AsyncMock)
+    async def test_refresh_scores_only_unseen_papers_and_merges_ranking(self, mock_score: AsyncMock):
+        saved = await self._save_tree()
+        self.arxiv_client.search_papers = AsyncMock(return_value=[_arxiv_paper("new"), _arxiv_paper("old")])
+        mock_score.side_effect = lambda paper, original_query, client: _scored(paper.arxiv_id, 0.9)
+
+        refreshed = await refresh_saved_tree(saved.tree_id, None, self.db, self.llm_client, self.arxiv_client)
+
+        self.assertEqual(mock_score.await_count, 1)
+        self.assertEqual(refreshed.new_papers, 1)
+        self.assertEqual([paper.arxiv_id for paper in refreshed.query_nodes[0].papers], ["new", "old"])
+        self.assertEqual(refreshed.refresh_count, 1)
+        self.assertGreater(refreshed.watermark, saved.watermark)
+
+        kwargs = self.arxiv_client.search_papers.call_args.kwargs
+        self.assertEqual(kwargs["keyword"], "q1")
+        self.assertEqual(kwargs["sort_by"], arxiv.SortCriterion.SubmittedDate)
+        self.assertLess(kwargs["submitted_after"], saved.watermark)
+
+        stored = await get_saved_tree(saved.tree_id, self.db)
+        self.assertEqual(stored.total_papers, 2)
+
+    @patch('backend.api.endpoints.saved_trees._score_paper', new_callable=AsyncMock)
+    async def test_failed_scores_are_retried_and_keep_watermark(self, mock_score: AsyncMock):
+        saved = await self._save_tree()
+        self.arxiv_client.search_papers = AsyncMock(return_value=[_arxiv_paper("new")])
+        mock_score.side_effect = lambda paper, original_query, client: _scored(paper.arxiv_id, 0.0, "スコア計算エラー")
+
+        refreshed = await refresh_saved_tree(saved.tree_id, None, self.db, self.llm_client, self.arxiv_client)
+
+        self.assertEqual(refreshed.new_papers, 0)
+        self.assertEqual(refreshed.watermark, saved.watermark)
+        self.assertEqual([paper.arxiv_id for paper in refreshed.query_nodes[0].papers], ["old"])
+
+    @patch('backend.api.endpoints.saved_trees._score_paper', new_callable=AsyncMock)
+    @patch('backend.api.endpoints.saved_trees.research_tree_search', new_callable=AsyncMock)
+    async def test_papers_not_settled_at_creation_are_rescored_on_refresh(self, mock_search: AsyncMock, mock_score: AsyncMock):
+        unscored = _scored("unscored", 0.0, "未評価")
+        unscored.scored = False
+        mock_search.return_value = SearchTreeResponse(
+            original_query="q", research_goal="goal",
+            query_nodes=[QueryNode(
+                query="q1", description="d1",
+                papers=[_scored("old", 0.5), _scored("failed", 0.0, "スコア計算エラー"), unscored], paper_count=3
+            )],
+            total_papers=3, total_unique_papers=3
+        )
+        saved = await create_saved_tree(ResearchTreeRequest(natural_language_query="q", max_results_per_query=5), self.db, self.llm_client, self.arxiv_client)
+        self.arxiv_client.search_papers = AsyncMock(return_value=[_arxiv_paper("failed")])
+        mock_score.side_effect = lambda paper, original_query, client: _scored(paper.arxiv_id, 0.9 if paper.arxiv_id == "failed" else 0.3)
+
+        refreshed = await refresh_saved_tree(saved.tree_id, None, self.db, self.llm_client, self.arxiv_client)
+
+        self.assertEqual(sorted(call.args[0].arxiv_id for call in mock_score.await_args_list), ["failed", "unscored"])
+        self.assertEqual(refreshed.new_papers, 0)
+        self.assertEqual([paper.arxiv_id for paper in refreshed.query_nodes[0].papers], ["failed", "old", "unscored"])
+        self.assertTrue(all(paper.scored for paper in refreshed.query_nodes[0].papers))
+        self.assertGreater(refreshed.watermark, saved.watermark)
+
+    @patch('backend.api.endpoints.saved_trees._score_paper', new_callable=AsyncMock)
+    async def test_runs_are_rejected_with_retry_after_when_admission_is_full(self, mock_score: AsyncMock):
+        saved = await self._save_tree()
+        controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout_s=1.0)
+        self.arxiv_client.search_papers = AsyncMock(return_value=[_arxiv_paper("new")])
+        mock_score.side_effect = lambda paper, original_query, client: _scored(paper.arxiv_id, 0.9)
+
+        with patch('backend.api.endpoints.research_tree.admission_controller', controller):
+            ticket = await controller.acquire()
+            with self.assertRaises(HTTPException) as context:
+                await refresh_saved_tree(saved.tree_id, None, self.db, self.llm_client, self.arxiv_client)
+            self.assertEqual(context.exception.status_code, 429)
+            self.assertIn("Retry-After", context.exception.headers)
+            with self.assertRaises(HTTPException):
+                await self._save_tree()
+            mock_score.assert_not_awaited()
+
+            ticket.release()
+            refreshed = await refresh_saved_tree(saved.tree_id, None, self.db, self.llm_client, self.arxiv_client)
+            self.assertEqual(refreshed.new_papers, 1)
+            self.assertEqual(controller.stats()["active"], 0)
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from backend.app.admission import AdmissionController, AdmissionRejected
+
+
+@pytest.mark.asyncio
+async def test_waiting_requests_are_admitted_in_order():
+    controller = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout_s=1.0)
+    first = await controller.acquire()
+    order = []
+
+    async def wait(name):
+        ticket = await controller.acquire()
+        order.append(name)
+        ticket.release()
+
+    tasks = [asyncio.create_task(wait("a")), asyncio.create_task(wait("b"))]
+    await asyncio.sleep(0)
+    assert controller.stats()["queued"] == 2
+
+    first.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["a", "b"]
+    assert controller.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_immediately():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout_s=1.0)
+    ticket = await controller.acquire()
+    waiting = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire()
+    assert rejected.value.reason == "queue full"
+    assert rejected.value.retry_after_s >= 1
+
+    ticket.release()
+    (await waiting).release()
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects_and_frees_the_queue_position():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout_s=0.01)
+    ticket = await controller.acquire()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire()
+    assert rejected.value.reason == "queue timeout"
+    assert controller.stats()["queued"] == 0
+
+    ticket.release()
+    ticket.release()  # Releasing twice does not free a second slot
+    assert controller.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout_s=1.0)
+    ticket = await controller.acquire()
+    waiting = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    ticket.release()
+
+    stats = controller.stats()
+    assert stats["queued"] == 0
+    assert stats["active"] == 0
@@ -1,14 +1,14 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import arxiv # Keep this for spec
-from datetime import datetime
+from datetime import date, datetime
 from tenacity import RetryError # Import RetryError
 
 # Import the aliased exceptions, same as in arxiv_client.py
 from arxiv import HTTPError as ArxivHTTPError, UnexpectedEmptyPageError as ArxivUnexpectedEmptyPageError
 
-from backend.api.arxiv_client import ArxivAPIClient
-from backend.schemas.arxiv_schema import ArxivPaper, ArxivAuthor
+from backend.api.arxiv_client import ArxivAPIClient, compile_query, search_options
+from backend.schemas.arxiv_schema import ArxivPaper, ArxivAuthor, SearchFilters
 
 @pytest.fixture
 def arxiv_client_fixture(): # Renamed to avoid conflict if a test function is named arxiv_client
@@ -30,6 +30,7 @@ async def test_search_papers_success(arxiv_client_fixture: ArxivAPIClient, mocke
     mock_arxiv_result.updated = datetime(2023, 1, 2, 12, 0, 0)
     mock_arxiv_result.pdf_url = "http://arxiv.org/pdf/1234.5678v1"
     mock_arxiv_result.categories = ["cs.AI", "cs.LG"]
+    mock_arxiv_result.primary_category = "cs.AI"
 
     mocker.patch.object(arxiv_client_fixture.client, 'results', return_value=[mock_arxiv_result])
     
@@ -48,6 +49,7 @@ async def test_search_papers_success(arxiv_client_fixture: ArxivAPIClient, mocke
     assert paper.published == datetime(2023, 1, 1, 12, 0, 0)
     assert paper.pdf_url == "http://arxiv.org/pdf/1234.5678v1"
     assert paper.categories == ["cs.AI", "cs.LG"]
+    assert paper.primary_category == "cs.AI"
 
 @pytest.mark.asyncio
 async def test_search_papers_empty_results(arxiv_client_fixture: ArxivAPIClient, mocker):
@@ -107,6 +109,7 @@ async def test_search_papers_uses_default_max_results(arxiv_client_fixture: Arxi
     mock_arxiv_result.published = datetime(2023, 1, 1)
     mock_arxiv_result.updated = datetime(2023, 1, 1)
     mock_arxiv_result.pdf_url = "http://default.pdf"
+    mock_arxiv_result.primary_category = "cs.XX"
     mock_arxiv_result.categories = ["cs.XX"]
 
     mock_client_results = mocker.patch.object(arxiv_client_fixture.client, 'results', return_value=[mock_arxiv_result] * 5)
@@ -121,3 +124,63 @@ async def test_search_papers_uses_default_max_results(arxiv_client_fixture: Arxi
         sort_by=arxiv.SortCriterion.Relevance
     )
     assert mock_client_results.call_count == 1
+
+@pytest.mark.asyncio
+async def test_search_papers_stops_at_submitted_after(arxiv_client_fixture: ArxivAPIClient, mocker):
+    def make_result(entry_id: str, published: datetime):
+        result = MagicMock(spec=arxiv.Result)
+        result.entry_id = entry_id
+        result.title = entry_id
+        result.authors = []
+        result.summary = ""
+        result.published = published
+        result.updated = published
+        result.pdf_url = f"http://{entry_id}.pdf"
+        result.categories = []
+        result.primary_category = None
+        return result
+
+    consumed = []
+    def results(search):
+        for result in [make_result("new", datetime(2024, 3, 2)), make_result("old", datetime(2024, 2, 1)), make_result("older", datetime(2024, 1, 1))]:
+            consumed.append(result.entry_id)
+            yield result
+
+    mocker.patch.object(arxiv_client_fixture.client, 'results', side_effect=results)
+    mocker.patch('arxiv.Search', return_value=MagicMock())
+
+    papers = await arxiv_client_fixture.search_papers(
+        "monitoring", max_results=10,
+        sort_by=arxiv.SortCriterion.SubmittedDate, submitted_after=datetime(2024, 3, 1)
+    )
+
+    assert [paper.entry_id for paper in papers] == ["new"]
+    assert consumed == ["new", "old"]  # Stops reading at the first paper older than the watermark.
+    arxiv.Search.assert_called_once_with(query="monitoring", max_results=10, sort_by=arxiv.SortCriterion.SubmittedDate)
+
+def test_compile_query_adds_category_and_date_filters():
+    assert compile_query("llm agents") == "llm agents"
+    assert compile_query("llm agents", categories=["cs.AI", "cs.CL"], date_from=date(2023, 1, 1), date_to=date(2023, 12, 31)) == (
+        "(llm agents) AND (cat:cs.AI OR cat:cs.CL) AND submittedDate:[202301010000 TO 202312312359]"
+    )
+    assert compile_query("x", date_from=date(2024, 5, 1)) == "(x) AND submittedDate:[202405010000 TO 999912312359]"
+
+def test_search_options_are_empty_without_filters():
+    assert search_options(SearchFilters()) == {}
+    filters = SearchFilters(categories=["hep-th"], date_to=date(2020, 1, 1), sort="submitted")
+    assert search_options(filters) == {
+        "categories": ["hep-th"], "date_to": date(2020, 1, 1), "sort_by": arxiv.SortCriterion.SubmittedDate
+    }
+    assert "sort_by" not in search_options(filters, sort=False)
+
+@pytest.mark.asyncio
+async def test_search_papers_pushes_filters_into_the_query(arxiv_client_fixture: ArxivAPIClient, mocker):
+    mocker.patch.object(arxiv_client_fixture.client, 'results', return_value=iter([]))
+    mocker.patch('arxiv.Search', return_value=MagicMock())
+
+    await arxiv_client_fixture.search_papers("graphs", max_results=3, categories=["cs.LG"], date_from=date(2022, 1, 1))
+
+    arxiv.Search.assert_called_once_with(
+        query="(graphs) AND (cat:cs.LG) AND submittedDate:[202201010000 TO 999912312359]",
+        max_results=3, sort_by=arxiv.SortCriterion.Relevance
+    )
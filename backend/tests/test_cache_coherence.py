@@ -0,0 +1,209 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app.cache_coherence import CacheCoherence
+from backend.app.tiered_cache import JSONStore, TieredCache
+from backend.core import deadline
+from backend.core.database import Base
+from backend.crud import cache_leases
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _worker(session_factory, worker_id, **kwargs):
+    # Each TieredCache with its own worker_id behaves like the cache of another process.
+    return TieredCache(
+        "scores", ttl_s=60, store=JSONStore(decode=tuple), session_factory=session_factory,
+        lease_computations=True, lease_poll_interval_s=0.01, worker_id=worker_id, **kwargs
+    )
+
+
+class _SlowComputation:
+    def __init__(self, value, delay_s=0.05):
+        self.value = value
+        self.delay_s = delay_s
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        return self.value
+
+
+@pytest.mark.asyncio
+async def test_leases_are_exclusive_until_released_or_expired(session_factory):
+    async with session_factory() as db:
+        assert await cache_leases.try_acquire(db, "scores", "k", "a", ttl_s=60)
+        assert await cache_leases.try_acquire(db, "scores", "k", "a", ttl_s=60)  # re-entrant
+        assert not await cache_leases.try_acquire(db, "scores", "k", "b", ttl_s=60)
+        await cache_leases.release(db, "scores", "k", "a")
+        assert await cache_leases.try_acquire(db, "scores", "k", "b", ttl_s=0)
+        assert await cache_leases.try_acquire(db, "scores", "k", "a", ttl_s=60)  # b's lease expired
+        assert not await cache_leases.renew(db, "scores", "k", "b", ttl_s=60)
+
+
+def _counting_commits(session_factory, commits):
+    def factory():
+        session = session_factory()
+        commit = session.commit
+
+        async def counted():
+            commits.append(1)
+            await commit()
+
+        session.commit = counted
+        return session
+    return factory
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lease_computations, expected_commits", [(True, 2), (False, 1)])
+async def test_a_miss_writes_its_value_log_and_lease_release_in_one_transaction(
+    session_factory, lease_computations, expected_commits
+):
+    commits = []
+    cache = _worker(_counting_commits(session_factory, commits), "a")
+    cache.lease_computations = lease_computations
+
+    assert await cache.get_or_compute("k", _SlowComputation((0.5, "ok"), delay_s=0)) == (0.5, "ok")
+
+    assert len(commits) == expected_commits  # the lease, if any, then the value, its log entry and the release
+    async with session_factory() as db:
+        assert not await cache_leases.is_held(db, "scores", "k")
+        assert [key for _, _, key, _ in await cache_leases.invalidations_since(db, 0)] == ["k"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_in_one_process_share_a_computation(session_factory):
+    cache = _worker(session_factory, "a")
+    compute = _SlowComputation((0.5, "ok"))
+
+    results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+    assert results == [(0.5, "ok")] * 5
+    assert compute.calls == 1
+    assert cache.stats()["computing"] == 0
+
+
+@pytest.mark.asyncio
+async def test_workers_wait_for_the_lease_holder_instead_of_computing(session_factory):
+    first, second = _worker(session_factory, "a"), _worker(session_factory, "b")
+    compute_a, compute_b = _SlowComputation((0.5, "a")), _SlowComputation((0.5, "b"))
+
+    results = await asyncio.gather(first.get_or_compute("k", compute_a), second.get_or_compute("k", compute_b))
+
+    assert results == [(0.5, "a"), (0.5, "a")]
+    assert (compute_a.calls, compute_b.calls) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_uncacheable_results_are_not_shared_across_workers(session_factory):
+    first, second = _worker(session_factory, "a"), _worker(session_factory, "b")
+    failed, compute_b = _SlowComputation((0.0, "error")), _SlowComputation((0.5, "b"))
+    cacheable = lambda result: result[1] != "error"
+
+    results = await asyncio.gather(
+        first.get_or_compute("k", failed, cacheable), second.get_or_compute("k", compute_b, cacheable)
+    )
+
+    assert results == [(0.0, "error"), (0.5, "b")]
+    assert await first.get("k") == (0.5, "b")
+
+
+@pytest.mark.asyncio
+async def test_lease_of_a_crashed_worker_expires(session_factory):
+    async with session_factory() as db:
+        await cache_leases.try_acquire(db, "scores", "k", "crashed", ttl_s=0.1)
+    cache = _worker(session_factory, "a")
+    compute = _SlowComputation((0.5, "ok"), delay_s=0)
+
+    assert await cache.get_or_compute("k", compute) == (0.5, "ok")
+    assert compute.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_of_other_workers_invalidate_the_memory_tier(session_factory):
+    writer, reader = _worker(session_factory, "a"), _worker(session_factory, "b")
+    coherence = CacheCoherence([reader], interval_s=0, session_factory=session_factory)
+    assert await coherence.run_once() == 0
+    await writer.put("k", (0.1, "old"))
+    assert await coherence.run_once() == 1
+    assert await reader.get("k") == (0.1, "old")  # now in the reader's memory tier
+
+    await writer.put("k", (0.9, "new"))
+    await reader.put("own", (0.2, "x"))  # the reader's own writes do not invalidate its memory
+    assert await reader.get("k") == (0.1, "old")
+    assert await coherence.run_once() == 1
+    assert await reader.get("k") == (0.9, "new")
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_not_shared_with_callers_under_longer_deadlines(session_factory):
+    cache = _worker(session_factory, "a")
+    calls = []
+
+    async def compute():
+        calls.append(deadline.get_deadline())
+        await asyncio.sleep(0.05)
+        left = deadline.remaining()
+        if left is not None and left <= 0:
+            raise deadline.DeadlineExceeded("budget spent")
+        return (0.5, "ok")
+
+    async def tight():
+        with deadline.deadline_scope(10):
+            return await cache.get_or_compute("k", compute)
+
+    async def unbounded():
+        while not calls:  # joins the computation started by the tight caller
+            await asyncio.sleep(0.001)
+        return await cache.get_or_compute("k", compute)
+
+    results = await asyncio.gather(tight(), unbounded(), return_exceptions=True)
+
+    assert isinstance(results[0], deadline.DeadlineExceeded)
+    assert results[1] == (0.5, "ok")
+    assert len(calls) == 2 and calls[1] is None  # recomputed under the waiter's own (absent) deadline
+
+
+async def _budget_aware_compute(value, delay_s=0.3):
+    left = deadline.remaining()
+    if left is not None and left <= 0:
+        return (0.0, "timeout")
+    await asyncio.sleep(delay_s)
+    return value
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("same_worker", [True, False])
+async def test_waiters_give_up_on_a_slow_holder_at_their_own_deadline(session_factory, same_worker):
+    holder = _worker(session_factory, "a")
+    waiter = holder if same_worker else _worker(session_factory, "b")
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        return await _budget_aware_compute((0.5, "ok"))
+
+    async def tight():
+        await started.wait()
+        with deadline.deadline_scope(30):
+            begun = asyncio.get_running_loop().time()
+            result = await waiter.get_or_compute("k", lambda: _budget_aware_compute((0.5, "late")))
+            return result, asyncio.get_running_loop().time() - begun
+
+    (held, (waited, elapsed)) = await asyncio.gather(holder.get_or_compute("k", slow), tight())
+
+    assert held == (0.5, "ok")
+    assert waited == (0.0, "timeout")
+    assert elapsed < 0.2
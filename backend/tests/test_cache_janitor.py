@@ -0,0 +1,97 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app.cache_janitor import CacheJanitor
+from backend.core.database import Base, configure_sqlite
+from backend.crud import cache_maintenance as crud
+from backend.crud import papers as papers_crud
+from backend.crud import response_cache as response_crud
+from backend.models.paper import PaperCategory
+
+
+async def _engine(path, tuned=True):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    if tuned:
+        configure_sqlite(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = await _engine(tmp_path / "cache.db")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+def _paper(arxiv_id, abstract_length=100):
+    return {"arxiv_id": arxiv_id, "title": arxiv_id, "abstract": "x" * abstract_length, "categories": ["cs.IR"]}
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used_entries(session_factory):
+    async with session_factory() as db:
+        for key in ("a", "b", "c"):
+            await response_crud.put_entry(db, key, "etag", "{}", ttl_s=3600)
+        await response_crud.get_entry(db, "a")
+
+        table = crud.research_tree_cache_table(max_rows=2, max_bytes=0, policy="lru")
+        result = await crud.enforce_budget(db, table)
+
+        assert (result.evicted, result.rows) == (1, 2)
+        assert await response_crud.get_entry(db, "b") is None
+        assert await response_crud.get_entry(db, "a") is not None
+
+
+@pytest.mark.asyncio
+async def test_lfu_byte_budget_keeps_frequently_hit_papers(session_factory):
+    async with session_factory() as db:
+        await papers_crud.upsert_papers(db, [_paper(f"2401.0000{index}") for index in range(4)])
+        for _ in range(3):
+            await papers_crud.get_papers(db, ["2401.00000", "2401.00003"])
+        await papers_crud.get_paper(db, "2401.00001")
+        table = crud.paper_cache_table(max_rows=0, max_bytes=0, policy="lfu")
+        _, size = await crud.usage(db, table)
+        table.max_bytes = size // 2
+
+        result = await crud.enforce_budget(db, table)
+
+        assert result.evicted == 2
+        assert result.bytes <= table.max_bytes
+        assert sorted(await papers_crud.get_papers(db, [f"2401.0000{index}" for index in range(4)])) == ["2401.00000", "2401.00003"]
+        assert await db.scalar(select(func.count()).select_from(PaperCategory)) == 2
+
+
+def test_unknown_eviction_policy_is_rejected():
+    with pytest.raises(ValueError):
+        crud.paper_cache_table(max_rows=1, max_bytes=0, policy="fifo")
+
+
+@pytest.mark.asyncio
+async def test_run_once_enables_incremental_vacuum_and_reports_sizes(tmp_path):
+    engine = await _engine(tmp_path / "legacy.db", tuned=False)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as db:
+        await papers_crud.upsert_papers(db, [_paper(f"2401.{index:05d}", 2000) for index in range(50)])
+    janitor = CacheJanitor(
+        tables=[crud.paper_cache_table(max_rows=10, max_bytes=0, policy="lru")],
+        session_factory=session_factory,
+        engine=engine,
+    )
+
+    await janitor.run_once()
+    await janitor.run_once()
+
+    stats = janitor.stats()
+    assert stats["tables"]["papers"]["rows"] == 10
+    assert stats["database"]["auto_vacuum"] == 2
+    assert stats["database"]["free_bytes"] == 0
+    await engine.dispose()
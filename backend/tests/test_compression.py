@@ -0,0 +1,35 @@
+import gzip
+
+import pytest
+
+from backend.app.compression import MIN_COMPRESS_BYTES, encode_body, negotiate_encoding
+
+
+def test_negotiates_supported_encoding_by_quality():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("deflate") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") in ("br", "gzip")
+    assert negotiate_encoding(None) is None
+
+
+def test_encode_body_compresses_only_large_bodies():
+    small, headers = encode_body(b"{}", "gzip")
+    assert small == b"{}"
+    assert "Content-Encoding" not in headers
+    assert headers["Vary"] == "Accept-Encoding"
+
+    body = b"x" * MIN_COMPRESS_BYTES
+    compressed, headers = encode_body(body, "gzip")
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed) == body
+
+
+def test_brotli_is_preferred_when_the_client_accepts_it():
+    brotli = pytest.importorskip("brotli")
+    body = b"x" * MIN_COMPRESS_BYTES
+
+    compressed, headers = encode_body(body, "gzip, br")
+
+    assert headers["Content-Encoding"] == "br"
+    assert brotli.decompress(compressed) == body
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.core import deadline
+from backend.core.deadline import DeadlineExceeded, deadline_scope
+
+
+def test_no_deadline_uses_default_timeout():
+    assert deadline.get_deadline() is None
+    assert deadline.call_timeout(5.0) == 5.0
+    assert deadline.call_timeout() is None
+
+
+def test_deadline_scope_caps_call_timeout():
+    with deadline_scope(100):
+        timeout = deadline.call_timeout(5.0)
+        assert 0 < timeout <= 0.1
+    assert deadline.get_deadline() is None
+
+
+def test_expired_deadline_raises():
+    with deadline_scope(1):
+        time.sleep(0.01)
+        with pytest.raises(DeadlineExceeded):
+            deadline.call_timeout(5.0)
+
+
+@pytest.mark.asyncio
+async def test_run_in_thread_times_out():
+    with pytest.raises(TimeoutError):
+        await deadline.run_in_thread(lambda: time.sleep(0.5), timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_deadline_propagates_to_worker_threads():
+    with deadline_scope(1000) as expected:
+        seen = await deadline.run_in_thread(deadline.get_deadline)
+    assert seen == expected
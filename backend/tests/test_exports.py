@@ -0,0 +1,98 @@
+import io
+from datetime import datetime
+
+import orjson
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app import exports
+from backend.app.main import app
+from backend.core.database import Base
+from backend.crud import papers as papers_crud
+from backend.crud import research_jobs as jobs_crud
+from backend.crud import saved_trees as trees_crud
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    async with factory() as db:
+        await papers_crud.upsert_papers(db, [
+            {
+                "arxiv_id": f"2401.{index:05d}", "title": f"Paper {index}", "authors": ["A. Author"],
+                "abstract": "An abstract. " * 20, "published_date": datetime(2024, 1, index + 1),
+                "categories": ["cs.IR", "cs.CL"] if index % 2 else [],
+            }
+            for index in range(7)
+        ])
+        paper = {"arxiv_id": "2401.00001", "title": "Paper 1", "relevance_score": 0.9, "relevance_explanation": "ok"}
+        await trees_crud.create_tree(
+            db, {"natural_language_query": "retrieval"}, "Goal",
+            [{"query": "q1", "description": "d1", "papers": [paper, {**paper, "arxiv_id": "2401.00002", "duplicate_of": "2401.00001"}]},
+             {"query": "q2", "description": "d2", "papers": [paper]}],
+            datetime(2024, 2, 1),
+        )
+        job = await jobs_crud.create_job(db, {"natural_language_query": "ranking"})
+        await jobs_crud.save_node(db, job.id, 0, {"query": "q", "description": "d", "papers": [paper], "paper_count": 1})
+    yield factory
+    await engine.dispose()
+
+
+async def _ndjson(dataset, session_factory, batch_size=3):
+    chunks = [chunk async for chunk in exports.export(dataset, "ndjson", session_factory, batch_size=batch_size)]
+    return chunks, [orjson.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_papers_are_streamed_in_batches(session_factory):
+    chunks, rows = await _ndjson("papers", session_factory)
+
+    assert len(chunks) == 3  # 7 papers, 3 per batch
+    assert [row["arxiv_id"] for row in rows] == [f"2401.{index:05d}" for index in range(7)]
+    assert rows[1]["categories"] == ["cs.IR", "cs.CL"] and rows[2]["categories"] == []
+    assert rows[0]["abstract"] == "An abstract. " * 20
+    assert rows[0]["published_date"] == "2024-01-01T00:00:00"
+
+
+@pytest.mark.asyncio
+async def test_trees_and_scores_cover_saved_trees_and_jobs(session_factory):
+    _, trees = await _ndjson("trees", session_factory)
+    _, scores = await _ndjson("scores", session_factory)
+
+    assert [(tree["source"], tree["natural_language_query"]) for tree in trees] == [
+        ("saved_tree", "retrieval"), ("research_job", "ranking"),
+    ]
+    assert trees[1]["status"] == "queued"
+    assert [(row["source"], row["node_position"], row["rank"], row["arxiv_id"]) for row in scores] == [
+        ("saved_tree", 0, 1, "2401.00001"), ("saved_tree", 0, 2, "2401.00002"), ("saved_tree", 1, 1, "2401.00001"),
+        ("research_job", 0, 1, "2401.00001"),
+    ]
+    assert scores[1]["duplicate_of"] == "2401.00001" and scores[0]["scored"] is True
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_writes_a_row_group_per_batch(session_factory):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    chunks = [chunk async for chunk in exports.export("trees", "parquet", session_factory, batch_size=1)]
+    table = pyarrow.parquet.read_table(io.BytesIO(b"".join(chunks)))
+
+    assert table.column("source").to_pylist() == ["saved_tree", "research_job"]
+    assert orjson.loads(table.column("request")[0].as_py()) == {"natural_language_query": "retrieval"}
+    assert pyarrow.parquet.ParquetFile(io.BytesIO(b"".join(chunks))).num_row_groups == 2
+
+
+def test_parquet_needs_pyarrow(monkeypatch):
+    monkeypatch.setattr(exports, "pyarrow", None)
+    client = TestClient(app)
+
+    response = client.get("/api/exports/papers?format=parquet")
+
+    assert response.status_code == 501
+    assert client.get("/api/exports/unknown").status_code == 422
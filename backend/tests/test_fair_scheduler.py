@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from backend.app.fair_scheduler import FairScheduler, Flow, flow_scope, use_flow
+
+
+async def _hold_slot(scheduler: FairScheduler, flow: Flow, log: list, release: asyncio.Event):
+    with use_flow(flow):
+        async with scheduler.slot():
+            log.append(flow.flow_id)
+            await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_slots_are_interleaved_across_flows():
+    scheduler = FairScheduler(max_concurrency=1, max_in_flight_per_flow=1)
+    big, small = Flow("big"), Flow("small")
+    order = []
+
+    async def call(flow):
+        with use_flow(flow):
+            async with scheduler.slot():
+                order.append(flow.flow_id)
+                await asyncio.sleep(0)
+
+    # The big flow queues all of its work before the small flow arrives.
+    tasks = [asyncio.create_task(call(big)) for _ in range(6)]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(call(small)) for _ in range(2)]
+    await asyncio.gather(*tasks)
+
+    assert order.index("small") <= 2
+    assert order[-1] == "big"
+
+
+@pytest.mark.asyncio
+async def test_interactive_flow_gets_larger_share_than_background():
+    scheduler = FairScheduler(max_concurrency=1, max_in_flight_per_flow=1)
+    background, interactive = Flow("bg", priority="background"), Flow("ia", priority="interactive")
+    order = []
+
+    async def call(flow):
+        with use_flow(flow):
+            async with scheduler.slot():
+                order.append(flow.flow_id)
+                await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(call(background)) for _ in range(10)]
+    tasks += [asyncio.create_task(call(interactive)) for _ in range(8)]
+    await asyncio.gather(*tasks)
+
+    first_ten = order[:10]
+    assert first_ten.count("ia") > first_ten.count("bg")
+
+
+@pytest.mark.asyncio
+async def test_per_flow_cap_limits_in_flight_calls():
+    scheduler = FairScheduler(max_concurrency=10, max_in_flight_per_flow=2)
+    flow = Flow("capped")
+    release = asyncio.Event()
+    log = []
+
+    tasks = [asyncio.create_task(_hold_slot(scheduler, flow, log, release)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    assert len(log) == 2
+    assert scheduler.stats()["waiting_interactive"] == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert len(log) == 5
+    assert scheduler.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = FairScheduler(max_concurrency=1, max_in_flight_per_flow=1)
+    release = asyncio.Event()
+    log = []
+    holder = asyncio.create_task(_hold_slot(scheduler, Flow("a"), log, release))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(_hold_slot(scheduler, Flow("b"), log, release))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    release.set()
+    await holder
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert log == ["a"]
+    assert scheduler.stats() == {"in_flight": 0, "backlogged_flows": 0, "waiting_interactive": 0, "waiting_background": 0}
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        with flow_scope(priority="urgent"):
+            pass
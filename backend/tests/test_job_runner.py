@@ -0,0 +1,200 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.api.endpoints.research_jobs import get_research_job_results
+from backend.api.endpoints.research_tree import QueryNode
+from backend.app.job_runner import ResearchJobRunner
+from backend.core.database import Base
+from backend.crud import research_jobs as crud
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    # A file database, so that concurrent node writes get connections of their own
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _runner(session_factory, max_concurrent_jobs=2):
+    return ResearchJobRunner(
+        max_concurrent_jobs=max_concurrent_jobs,
+        session_factory=session_factory,
+        llm_client_factory=MagicMock,
+        arxiv_client_factory=MagicMock,
+        max_attempts=3,
+        retry_delay_s=0,
+    )
+
+
+def _node(query, description, *args, **kwargs):
+    return QueryNode(query=query, description=description, papers=[], paper_count=0)
+
+
+async def _create_job(session_factory, query="AI in education"):
+    async with session_factory() as db:
+        return (await crud.create_job(db, {"natural_language_query": query, "max_results_per_query": 1, "max_queries": 2})).id
+
+
+@pytest.mark.asyncio
+@patch("backend.api.endpoints.research_tree._build_query_node", new_callable=AsyncMock)
+@patch("backend.api.endpoints.research_tree._generate_research_plan", new_callable=AsyncMock)
+async def test_job_runs_to_completion_and_persists_nodes(mock_plan, mock_build, session_factory):
+    mock_plan.return_value = ("Goal", [("q1", "d1"), ("q2", "d2")])
+    mock_build.side_effect = _node
+    job_id = await _create_job(session_factory)
+
+    await _runner(session_factory).run_job(job_id)
+
+    async with session_factory() as db:
+        job = await crud.get_job(db, job_id)
+        assert job.status == "completed"
+        assert job.research_goal == "Goal"
+        assert job.query_plan == [{"query": "q1", "description": "d1"}, {"query": "q2", "description": "d2"}]
+        assert [node.query for node in job.nodes] == ["q1", "q2"]
+        assert job.finished_at is not None
+
+
+@pytest.mark.asyncio
+@patch("backend.api.endpoints.research_tree._build_query_node", new_callable=AsyncMock)
+@patch("backend.api.endpoints.research_tree._generate_research_plan", new_callable=AsyncMock)
+async def test_interrupted_job_resumes_from_last_completed_node(mock_plan, mock_build, session_factory):
+    mock_build.side_effect = _node
+    job_id = await _create_job(session_factory)
+    async with session_factory() as db:
+        await crud.mark_running(db, job_id)
+        await crud.save_plan(db, job_id, "Goal", [{"query": "q1", "description": "d1"}, {"query": "q2", "description": "d2"}])
+        await crud.save_node(db, job_id, 0, {"query": "q1", "description": "d1", "papers": [], "paper_count": 0})
+
+    runner = _runner(session_factory)
+    await runner.start()
+    for _ in range(100):
+        async with session_factory() as db:
+            if (await crud.get_job(db, job_id)).status == "completed":
+                break
+        await asyncio.sleep(0.01)
+    await runner.stop()
+
+    mock_plan.assert_not_called()
+    assert [call.args[0] for call in mock_build.call_args_list] == ["q2"]
+    async with session_factory() as db:
+        assert (await crud.get_job(db, job_id)).status == "completed"
+        assert await crud.completed_positions(db, job_id) == [0, 1]
+
+
+@pytest.mark.asyncio
+@patch("backend.api.endpoints.research_tree._generate_research_plan", new_callable=AsyncMock)
+async def test_plan_failure_marks_job_failed(mock_plan, session_factory):
+    mock_plan.side_effect = Exception("LLM down")
+    job_id = await _create_job(session_factory)
+
+    await _runner(session_factory).run_job(job_id)
+
+    async with session_factory() as db:
+        job = await crud.get_job(db, job_id)
+        assert job.status == "failed"
+        assert job.error == "LLM down"
+
+
+@pytest.mark.asyncio
+@patch("backend.api.endpoints.research_tree._build_query_node", new_callable=AsyncMock)
+@patch("backend.api.endpoints.research_tree._generate_research_plan", new_callable=AsyncMock)
+async def test_failed_searches_are_not_persisted_and_are_retried(mock_plan, mock_build, session_factory):
+    mock_plan.return_value = ("Goal", [("q1", "d1"), ("q2", "d2")])
+    failures = {"q2": 1}
+
+    async def flaky_node(query, description, *args, **kwargs):
+        assert kwargs["raise_errors"] is True
+        if failures.get(query):
+            failures[query] -= 1
+            raise Exception("arXiv unavailable")
+        return _node(query, description)
+
+    mock_build.side_effect = flaky_node
+    job_id = await _create_job(session_factory)
+
+    await _runner(session_factory).run_job(job_id)
+
+    async with session_factory() as db:
+        job = await crud.get_job(db, job_id)
+        assert job.status == "completed"
+        assert [node.query for node in job.nodes] == ["q1", "q2"]
+    assert [call.args[0] for call in mock_build.call_args_list] == ["q1", "q2", "q2"]
+    assert mock_plan.call_count == 1
+
+
+@pytest.mark.asyncio
+@patch("backend.api.endpoints.research_tree._build_query_node", new_callable=AsyncMock)
+@patch("backend.api.endpoints.research_tree._generate_research_plan", new_callable=AsyncMock)
+async def test_job_fails_without_persisting_nodes_that_keep_failing(mock_plan, mock_build, session_factory):
+    mock_plan.return_value = ("Goal", [("q1", "d1"), ("q2", "d2")])
+
+    async def broken_node(query, description, *args, **kwargs):
+        if query == "q2":
+            raise Exception("arXiv unavailable")
+        return _node(query, description)
+
+    mock_build.side_effect = broken_node
+    job_id = await _create_job(session_factory)
+
+    await _runner(session_factory).run_job(job_id)
+
+    async with session_factory() as db:
+        job = await crud.get_job(db, job_id)
+        assert job.status == "failed"
+        assert job.error == "1 of 2 query nodes failed: arXiv unavailable"
+        assert await crud.completed_positions(db, job_id) == [0]
+    assert mock_build.call_count == 1 + 3  # q1 once, q2 on each of the 3 attempts
+
+
+@pytest.mark.asyncio
+@patch("backend.api.endpoints.research_tree._build_query_node", new_callable=AsyncMock)
+@patch("backend.api.endpoints.research_tree._generate_research_plan", new_callable=AsyncMock)
+async def test_concurrent_jobs_are_capped(mock_plan, mock_build, session_factory):
+    running = 0
+    peak = 0
+
+    async def slow_plan(*args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return "Goal", [("q1", "d1")]
+
+    mock_plan.side_effect = slow_plan
+    mock_build.side_effect = _node
+    job_ids = [await _create_job(session_factory, query=f"query {i}") for i in range(3)]
+
+    runner = _runner(session_factory, max_concurrent_jobs=1)
+    await runner.start()
+    for _ in range(200):
+        async with session_factory() as db:
+            if all([(await crud.get_job(db, job_id)).status == "completed" for job_id in job_ids]):
+                break
+        await asyncio.sleep(0.01)
+    await runner.stop()
+
+    assert peak == 1
+    assert mock_plan.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_results_endpoint_returns_completed_nodes_only(session_factory):
+    job_id = await _create_job(session_factory)
+    async with session_factory() as db:
+        await crud.save_plan(db, job_id, "Goal", [{"query": "q1", "description": "d1"}, {"query": "q2", "description": "d2"}])
+        await crud.save_node(db, job_id, 0, {"query": "q1", "description": "d1", "papers": [], "paper_count": 0})
+    async with session_factory() as db:
+        results = await get_research_job_results(job_id, db)
+
+    assert results.status == "queued"
+    assert results.total_nodes == 2
+    assert results.completed_nodes == 1
+    assert [node.query for node in results.query_nodes] == ["q1"]
@@ -0,0 +1,114 @@
+import sqlite3
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+
+from backend.core import migrations
+from backend.core.database import Base
+from backend.models.paper import Paper
+
+# papers_cache as created by versions before the compressed abstract storage
+_LEGACY_PAPERS_CACHE = """
+CREATE TABLE papers_cache (
+    id INTEGER NOT NULL,
+    arxiv_id VARCHAR NOT NULL,
+    title VARCHAR NOT NULL,
+    authors JSON,
+    abstract TEXT,
+    published_date DATETIME,
+    url VARCHAR,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_papers_cache_arxiv_id ON papers_cache (arxiv_id);
+"""
+
+
+def _legacy_database(path):
+    with sqlite3.connect(path) as conn:
+        conn.executescript(_LEGACY_PAPERS_CACHE)
+        conn.execute(
+            "INSERT INTO papers_cache (arxiv_id, title, authors, abstract) VALUES (?, ?, ?, ?)",
+            ("2401.00001v1", "Legacy paper", '["A. Author"]', "A legacy abstract about retrieval. " * 10),
+        )
+        conn.execute("INSERT INTO papers_cache (arxiv_id, title) VALUES (?, ?)", ("2401.00002v1", "No abstract"))
+
+
+def test_upgrade_migrates_legacy_paper_cache(tmp_path):
+    path = tmp_path / "legacy.db"
+    _legacy_database(path)
+    engine = create_engine(f"sqlite:///{path}")
+
+    with engine.begin() as conn:
+        assert migrations.upgrade(conn, Base.metadata) == migrations.SCHEMA_VERSION
+    with engine.begin() as conn:
+        assert migrations.upgrade(conn, Base.metadata) == 0
+        assert conn.exec_driver_sql("PRAGMA user_version").scalar() == migrations.SCHEMA_VERSION
+
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("papers_cache")}
+    assert "abstract" not in columns
+    assert {"abstract_z", "abstract_codec", "updated_date", "primary_category"} <= columns
+    assert "paper_categories" in inspector.get_table_names()
+
+    with Session(engine) as db:
+        migrated = db.query(Paper).filter(Paper.arxiv_id == "2401.00001").one()
+        assert migrated.abstract == "A legacy abstract about retrieval. " * 10
+        assert migrated.abstract_codec in ("zlib", "zstd")
+        assert migrated.authors == ["A. Author"]
+        assert db.query(Paper).filter(Paper.arxiv_id == "2401.00002").one().abstract is None
+    engine.dispose()
+
+
+def test_abstracts_are_backfilled_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrations, "_BACKFILL_BATCH_SIZE", 2)
+    path = tmp_path / "legacy.db"
+    _legacy_database(path)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO papers_cache (arxiv_id, title, abstract) VALUES (?, ?, ?)",
+            [(f"2402.{index:05d}", f"Paper {index}", f"Abstract {index}") for index in range(5)],
+        )
+    engine = create_engine(f"sqlite:///{path}")
+
+    with engine.begin() as conn:
+        migrations.upgrade(conn, Base.metadata)
+
+    with Session(engine) as db:
+        abstracts = {paper.arxiv_id: paper.abstract for paper in db.query(Paper)}
+    assert abstracts == {
+        "2401.00001": "A legacy abstract about retrieval. " * 10, "2401.00002": None,
+        **{f"2402.{index:05d}": f"Abstract {index}" for index in range(5)},
+    }
+    engine.dispose()
+
+
+def test_upgrade_creates_fresh_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with engine.begin() as conn:
+        migrations.upgrade(conn, Base.metadata)
+        assert conn.exec_driver_sql("PRAGMA user_version").scalar() == migrations.SCHEMA_VERSION
+    assert "papers_cache" in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_upgrade_canonicalizes_versioned_paper_ids(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'versioned.db'}")
+    with engine.begin() as conn:
+        migrations.upgrade(conn, Base.metadata)
+        for paper_id, arxiv_id, updated in ((1, "2401.00003v2", "2024-03-01"), (2, "2401.00003v1", "2024-01-01"),
+                                            (3, "hep-th/9901001v1", None)):
+            conn.exec_driver_sql(
+                "INSERT INTO papers_cache (id, arxiv_id, title, updated_date) VALUES (?, ?, ?, ?)",
+                (paper_id, arxiv_id, arxiv_id, updated),
+            )
+            conn.exec_driver_sql("INSERT INTO paper_categories (paper_id, category, position) VALUES (?, 'cs.IR', 0)", (paper_id,))
+        conn.exec_driver_sql(f"PRAGMA user_version = {migrations.SCHEMA_VERSION - 1}")
+    with engine.begin() as conn:
+        assert migrations.upgrade(conn, Base.metadata) == 1
+        assert conn.exec_driver_sql("SELECT id, arxiv_id, title FROM papers_cache ORDER BY id").fetchall() == [
+            (1, "2401.00003", "2401.00003v2"), (3, "hep-th/9901001", "hep-th/9901001v1"),
+        ]
+        assert conn.exec_driver_sql("SELECT paper_id FROM paper_categories ORDER BY paper_id").scalars().all() == [1, 3]
+    engine.dispose()
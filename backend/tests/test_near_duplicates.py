@@ -0,0 +1,64 @@
+import pytest
+
+from backend.app import near_duplicates
+from backend.app.near_duplicates import NearDuplicateIndex, estimated_similarity, minhash, shingles
+from backend.schemas.arxiv_schema import canonical_arxiv_id
+
+ABSTRACT = (
+    "We introduce a sparse mixture of experts language model that routes each token to two of "
+    "sixty four experts and matches dense models at a fraction of the inference cost. "
+)
+
+
+@pytest.mark.parametrize("entry_id, expected", [
+    ("http://arxiv.org/abs/2401.01234v2", "2401.01234"),
+    ("2401.01234v1", "2401.01234"),
+    ("2401.01234", "2401.01234"),
+    ("http://arxiv.org/pdf/2401.01234v3.pdf", "2401.01234"),
+    ("http://arxiv.org/abs/hep-th/9901001v1", "hep-th/9901001"),
+    ("math.GT/0309136", "math.GT/0309136"),
+])
+def test_canonical_arxiv_id_strips_the_version(entry_id, expected):
+    assert canonical_arxiv_id(entry_id) == expected
+
+
+def test_similarity_estimate_tracks_jaccard_similarity():
+    first, second = shingles(ABSTRACT * 2), shingles(ABSTRACT + "Code is available online.")
+    jaccard = len(first & second) / len(first | second)
+
+    estimate = estimated_similarity(minhash(first, 256), minhash(second, 256))
+
+    assert abs(estimate - jaccard) < 0.1
+    assert estimated_similarity(minhash(first), minhash(first)) == 1.0
+
+
+def test_pure_python_signatures_are_deterministic(monkeypatch):
+    monkeypatch.setattr(near_duplicates, "numpy", None)
+    hashes = shingles(ABSTRACT)
+    assert minhash(hashes, 16) == minhash(set(hashes), 16)
+    assert all(0 <= value < 2 ** 32 for value in minhash(hashes, 16))
+
+
+def test_numpy_and_pure_python_signatures_are_equal(monkeypatch):
+    pytest.importorskip("numpy")
+    hashes = shingles(ABSTRACT + "Code is available online.") | {0, 2 ** 32 - 1}
+    vectorized = minhash(hashes, 128)
+
+    monkeypatch.setattr(near_duplicates, "numpy", None)
+
+    assert minhash(hashes, 128) == vectorized
+
+
+def test_index_returns_the_first_near_duplicate():
+    index = NearDuplicateIndex(threshold=0.8, num_perm=64, bands=16)
+
+    assert index.add("a", f"Sparse Experts {ABSTRACT}") is None
+    assert index.add("b", "Grading essays with large language models and rubric-aware prompting.") is None
+    assert index.add("c", f"Sparse experts. {ABSTRACT} ") == "a"  # punctuation and case are ignored
+    assert index.add("d", "") is None
+    assert len(index) == 2  # duplicates are not indexed themselves
+
+
+def test_bands_must_divide_the_signature():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=64, bands=10)
@@ -0,0 +1,152 @@
+from array import array
+from datetime import date, datetime
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app.cache_coherence import CacheCoherence
+from backend.app.main import app
+from backend.app.paper_index import PaperIndex, _intersect
+from backend.core.database import Base
+from backend.crud import papers as crud
+from backend.models.paper import Paper
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'papers.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _row(arxiv_id, authors, categories, year, title="Title", abstract="Abstract"):
+    return {
+        "arxiv_id": arxiv_id, "title": title, "authors": authors, "abstract": abstract,
+        "published_date": datetime(year, 1, 1), "categories": categories,
+    }
+
+
+async def _upsert(session_factory, *rows):
+    async with session_factory() as db:
+        await crud.upsert_papers(db, rows)
+
+
+def test_intersect_sorted_arrays():
+    assert list(_intersect(array("q", [1, 3, 5, 7, 9]), array("q", [2, 3, 4, 9]))) == [3, 9]
+    assert list(_intersect(array("q"), array("q", [1]))) == []
+
+
+@pytest.mark.asyncio
+async def test_index_is_built_from_the_cache_and_filters_combine(session_factory):
+    await _upsert(
+        session_factory,
+        _row("2101.00001", ["Ada Lovelace", "Alan Turing"], ["cs.AI", "cs.LG"], 2021),
+        _row("2201.00002", ["Alan  Turing"], ["cs.LG"], 2022),
+        _row("2301.00003", ["Grace Hopper"], ["cs.PL"], 2023),
+    )
+    index = PaperIndex(session_factory=session_factory)
+    await index.load()
+
+    def arxiv_ids(papers):
+        return [paper.arxiv_id for paper in papers]
+
+    assert len(index) == 3
+    assert arxiv_ids(await index.search(authors=["alan turing"])) == ["2201.00002", "2101.00001"]  # newest first
+    assert arxiv_ids(await index.search(authors=["Alan Turing"], categories=["cs.AI"])) == ["2101.00001"]
+    assert arxiv_ids(await index.search(categories=["cs.LG", "cs.PL"], date_from=date(2022, 1, 1))) == ["2301.00003", "2201.00002"]
+    assert arxiv_ids(await index.search(authors=["Nobody"])) == []
+    assert arxiv_ids(await index.search(keyword="abstract", date_to=date(2021, 12, 31))) == ["2101.00001"]
+    # Within the boundary years of a range, dates are compared exactly
+    assert arxiv_ids(await index.search(date_from=date(2021, 1, 2), date_to=date(2023, 1, 1))) == ["2301.00003", "2201.00002"]
+
+
+@pytest.mark.asyncio
+async def test_upserts_update_a_loaded_index(session_factory):
+    await _upsert(session_factory, _row("2101.00001", ["Ada Lovelace"], ["cs.AI"], 2021))
+    index = PaperIndex(session_factory=session_factory)
+    await index.load()
+
+    await _upsert(
+        session_factory,
+        _row("2101.00001", ["Ada Lovelace"], ["math.NA"], 2021),  # recategorized
+        _row("2401.00009", ["Ada Lovelace"], ["cs.AI"], 2024, title="Engines", abstract="Analytical engines"),
+    )
+
+    assert [paper.arxiv_id for paper in await index.search(categories=["cs.AI"])] == ["2401.00009"]
+    assert index.stats()["categories"] == 2
+    assert [paper.arxiv_id for paper in await index.search(keyword="analytical ENGINES")] == ["2401.00009"]
+    more = await index.more_from_authors("2101.00001")
+    assert [paper.arxiv_id for paper in more] == ["2401.00009"]
+    assert await index.more_from_authors("9999.99999") is None
+
+
+@pytest.mark.asyncio
+async def test_papers_written_by_other_workers_are_applied_by_the_coherence_loop(session_factory, monkeypatch):
+    await _upsert(session_factory, _row("2101.00001", ["Ada Lovelace"], ["cs.AI"], 2021))
+    index = PaperIndex(session_factory=session_factory)
+    await index.load()
+    coherence = CacheCoherence([], interval_s=0, session_factory=session_factory, paper_index=index, worker_id="a")
+    assert await coherence.run_once() == 0
+
+    with monkeypatch.context() as m:
+        m.setattr(crud, "_upsert_hooks", [])  # another process: its upserts do not reach this index
+        async with session_factory() as db:
+            await crud.upsert_papers(db, [
+                _row("2101.00001", ["Ada Lovelace"], ["math.NA"], 2021),
+                _row("2401.00009", ["Ada Lovelace"], ["cs.AI"], 2024),
+            ], origin="b")
+    assert [paper.arxiv_id for paper in await index.search(categories=["cs.AI"])] == ["2101.00001"]
+
+    assert await coherence.run_once() == 2
+    assert [paper.arxiv_id for paper in await index.search(categories=["cs.AI"])] == ["2401.00009"]
+    assert len(index) == 2
+
+    async with session_factory() as db:
+        await crud.upsert_papers(db, [_row("2501.00010", ["Ada Lovelace"], ["cs.AI"], 2025)], origin="a")
+    assert await coherence.run_once() == 0  # applied by this worker's own upsert hook
+    assert len(index) == 3
+
+
+@pytest.mark.asyncio
+async def test_evicted_papers_are_dropped_from_the_index(session_factory):
+    await _upsert(
+        session_factory,
+        _row("2101.00001", ["Ada Lovelace"], ["cs.AI"], 2021),
+        _row("2201.00002", ["Ada Lovelace"], ["cs.AI"], 2022),
+    )
+    index = PaperIndex(session_factory=session_factory)
+    await index.load()
+    async with session_factory() as db:
+        await db.execute(delete(Paper).where(Paper.arxiv_id == "2201.00002"))
+        await db.commit()
+
+    assert [paper.arxiv_id for paper in await index.search(authors=["Ada Lovelace"])] == ["2101.00001"]
+    assert len(index) == 1
+
+
+def test_local_search_endpoint_does_not_call_arxiv(mocker):
+    paper = Paper(
+        arxiv_id="2101.00001", title="Local", authors=["Ada Lovelace"], published_date=datetime(2021, 1, 1),
+        url=None, primary_category="cs.AI",
+    )
+    paper.abstract = "Cached"
+    search = AsyncMock(return_value=[paper])
+    mocker.patch("backend.api.endpoints.arxiv.paper_index.search", new=search)
+    arxiv_search = mocker.patch("backend.api.arxiv_client.ArxivAPIClient.search_papers", new=AsyncMock())
+    client = TestClient(app)
+
+    response = client.get("/api/arxiv/search?source=local&author=Ada%20Lovelace&category=cs.AI&year_from=2020&date_to=2021-06-30")
+
+    assert response.status_code == 200
+    assert response.json()["papers"][0]["title"] == "Local"
+    assert search.await_args.kwargs["authors"] == ["Ada Lovelace"]
+    assert search.await_args.kwargs["date_from"] == date(2020, 1, 1)
+    assert search.await_args.kwargs["date_to"] == date(2021, 6, 30)
+    arxiv_search.assert_not_awaited()
+    assert client.get("/api/arxiv/search?source=local").status_code == 422
@@ -0,0 +1,146 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.core.abstract_codec import AbstractCodec
+from backend.core.database import Base, configure_sqlite
+from backend.crud import papers as crud
+from backend.models import paper as paper_model
+from backend.schemas.arxiv_schema import ArxivAuthor, ArxivPaper
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    # A file database: WAL does not apply to in-memory databases
+    engine = configure_sqlite(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'papers.db'}"), wal=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+def _row(arxiv_id, title="Title"):
+    return {"arxiv_id": arxiv_id, "title": title, "authors": ["A. Author"], "abstract": "Abstract", "url": f"http://arxiv.org/pdf/{arxiv_id}"}
+
+
+@pytest.mark.asyncio
+async def test_connections_use_tuned_profile(engine):
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() > 0
+
+
+@pytest.mark.asyncio
+async def test_upsert_inserts_and_updates_by_arxiv_id(session_factory):
+    async with session_factory() as db:
+        assert await crud.upsert_papers(db, [_row("2401.00001"), _row("2401.00002")]) == 2
+    async with session_factory() as db:
+        await crud.upsert_papers(db, [_row("2401.00002", title="Revised"), _row("2401.00003")])
+
+    async with session_factory() as db:
+        papers = await crud.get_papers(db, ["2401.00001", "2401.00002", "2401.00003", "missing"])
+        assert sorted(papers) == ["2401.00001", "2401.00002", "2401.00003"]
+        assert papers["2401.00002"].title == "Revised"
+        assert papers["2401.00002"].authors == ["A. Author"]
+        assert papers["2401.00002"].abstract == "Abstract"
+        assert (await db.execute(text("SELECT COUNT(*) FROM papers_cache"))).scalar() == 3
+
+
+@pytest.mark.asyncio
+async def test_upsert_spans_several_statements(session_factory, monkeypatch):
+    monkeypatch.setattr(crud, "UPSERT_CHUNK_SIZE", 2)
+    async with session_factory() as db:
+        await crud.upsert_papers(db, [_row(f"2401.{index:05d}") for index in range(5)])
+    async with session_factory() as db:
+        assert (await crud.get_paper(db, "2401.00004")).title == "Title"
+        assert (await db.execute(text("SELECT COUNT(*) FROM papers_cache"))).scalar() == 5
+
+
+def _arxiv_paper(arxiv_id, categories=("cs.CL", "cs.IR")):
+    return ArxivPaper(
+        entry_id=f"http://arxiv.org/abs/{arxiv_id}",
+        title=f"Paper {arxiv_id}",
+        authors=[ArxivAuthor(name="A. Author"), ArxivAuthor(name="B. Author")],
+        summary="We study the relevance of retrieved passages for question answering. " * 5,
+        published=datetime(2024, 1, 1),
+        updated=datetime(2024, 2, 1),
+        pdf_url=f"http://arxiv.org/pdf/{arxiv_id}",
+        categories=list(categories),
+        primary_category=categories[0],
+    )
+
+
+@pytest.mark.asyncio
+async def test_cached_paper_rebuilds_arxiv_result(session_factory):
+    original = _arxiv_paper("2401.00001")
+    async with session_factory() as db:
+        await crud.upsert_papers(db, [crud.paper_row(original)])
+
+    async with session_factory() as db:
+        paper = await crud.get_paper(db, "2401.00001")
+        assert paper.abstract_codec in ("zlib", "zstd")
+        assert len(paper.abstract_data) < len(original.summary)
+        assert paper.to_arxiv() == original
+
+
+@pytest.mark.asyncio
+async def test_upsert_replaces_categories(session_factory):
+    async with session_factory() as db:
+        await crud.upsert_papers(db, [crud.paper_row(_arxiv_paper("2401.00001")), crud.paper_row(_arxiv_paper("2401.00002"))])
+        await crud.upsert_papers(db, [crud.paper_row(_arxiv_paper("2401.00002", categories=("cs.LG",)))])
+
+    async with session_factory() as db:
+        assert [paper.arxiv_id for paper in await crud.get_papers_in_category(db, "cs.IR")] == ["2401.00001"]
+        assert [paper.arxiv_id for paper in await crud.get_papers_in_category(db, "cs.LG")] == ["2401.00002"]
+        assert (await crud.get_paper(db, "2401.00002")).categories == ["cs.LG"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("codec_name", ["zlib", "zstd"])
+async def test_trained_dictionary_is_used_and_persisted(session_factory, monkeypatch, codec_name):
+    if codec_name == "zstd":
+        pytest.importorskip("zstandard")
+    codec = AbstractCodec(codec_name)
+    monkeypatch.setattr(crud, "abstract_codec", codec)
+    monkeypatch.setattr(paper_model, "abstract_codec", codec)
+    async with session_factory() as db:
+        await crud.upsert_papers(db, [crud.paper_row(_arxiv_paper(f"2401.{index:05d}")) for index in range(20)])
+        plain_size = len((await crud.get_paper(db, "2401.00000")).abstract_data)
+
+        dictionary = await crud.train_compression_dictionary(db)
+
+    async with session_factory() as db:
+        paper = await crud.get_paper(db, "2401.00000")
+        assert paper.abstract_codec == f"{codec_name}:{dictionary.id}"
+        assert len(paper.abstract_data) < plain_size
+        expected = _arxiv_paper("2401.00000").summary
+
+        # A fresh process must load the dictionary before reading the abstract
+        restarted = AbstractCodec(codec_name)
+        monkeypatch.setattr(crud, "abstract_codec", restarted)
+        monkeypatch.setattr(paper_model, "abstract_codec", restarted)
+        with pytest.raises(LookupError):
+            paper.abstract
+        assert await crud.load_compression_dictionaries(db) == 1
+        assert paper.abstract == expected
+        assert restarted.current_tag == f"{codec_name}:{dictionary.id}"
+
+
+@pytest.mark.asyncio
+async def test_versions_of_a_paper_share_one_row(session_factory):
+    async with session_factory() as db:
+        await crud.upsert_papers(db, [crud.paper_row(_arxiv_paper("2401.00001v1"))])
+        await crud.upsert_papers(db, [crud.paper_row(_arxiv_paper("2401.00001v2", categories=("cs.LG",)))])
+
+    async with session_factory() as db:
+        assert (await db.execute(text("SELECT COUNT(*) FROM papers_cache"))).scalar() == 1
+        assert (await crud.get_paper(db, "2401.00001")).categories == ["cs.LG"]
@@ -0,0 +1,273 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app.pipeline_hub import PipelineHub, parse_event_id, pipeline_key
+from backend.app.stream_log import StreamEventLog
+from backend.core.database import Base
+import backend.models.stream_event  # noqa: F401  (registers the tables)
+
+
+@pytest_asyncio.fixture
+async def event_log():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield StreamEventLog(session_factory=async_sessionmaker(engine, autoflush=False, expire_on_commit=False))
+    await engine.dispose()
+
+
+def test_pipeline_key_ignores_dict_order():
+    assert pipeline_key({"a": 1, "b": 2}) == pipeline_key({"b": 2, "a": 1})
+    assert pipeline_key({"a": 1}) != pipeline_key({"a": 2})
+
+
+async def _collect(stream):
+    return [event async for event in stream]
+
+
+@pytest.mark.asyncio
+async def test_identical_pipelines_run_once_and_fan_out():
+    hub = PipelineHub()
+    runs = []
+    release = asyncio.Event()
+
+    async def producer():
+        runs.append(1)
+        yield "plan"
+        await release.wait()
+        yield "papers"
+
+    first = asyncio.create_task(_collect(hub.subscribe("k", producer)))
+    await asyncio.sleep(0.01)
+    # Joins after "plan" was emitted and still receives it.
+    second = asyncio.create_task(_collect(hub.subscribe("k", producer)))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await first == ["plan", "papers"]
+    assert await second == ["plan", "papers"]
+    assert len(runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_finished_pipeline_is_not_reused():
+    hub = PipelineHub()
+    runs = []
+
+    async def producer():
+        runs.append(1)
+        yield "event"
+
+    assert await _collect(hub.subscribe("k", producer)) == ["event"]
+    await asyncio.sleep(0)
+    assert hub.get("k") is None
+    assert await _collect(hub.subscribe("k", producer)) == ["event"]
+    assert len(runs) == 2
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    hub = PipelineHub()
+    runs = []
+
+    async def producer():
+        runs.append(1)
+        yield "event"
+
+    await asyncio.gather(_collect(hub.subscribe("a", producer)), _collect(hub.subscribe("b", producer)))
+    assert len(runs) == 2
+
+
+@pytest.mark.asyncio
+async def test_producer_error_reaches_subscribers():
+    hub = PipelineHub()
+
+    async def producer():
+        yield "partial"
+        raise RuntimeError("boom")
+
+    received = []
+    with pytest.raises(RuntimeError):
+        async for event in hub.subscribe("k", producer):
+            received.append(event)
+    assert received == ["partial"]
+
+
+@pytest.mark.asyncio
+async def test_last_subscriber_leaving_cancels_the_producer():
+    hub = PipelineHub()
+    cleaned_up = asyncio.Event()
+
+    async def producer():
+        try:
+            yield "plan"
+            await asyncio.sleep(60)
+            yield "papers"
+        finally:
+            cleaned_up.set()
+
+    async def read_one(stream):
+        async for event in stream:
+            return event
+
+    first = hub.subscribe("k", producer)
+    second = hub.subscribe("k", producer)
+    assert await read_one(first) == "plan"
+    assert await read_one(second) == "plan"
+
+    await first.aclose()
+    assert not cleaned_up.is_set()  # Still has a subscriber.
+    await second.aclose()
+    await asyncio.wait_for(cleaned_up.wait(), timeout=1)
+    await asyncio.sleep(0)
+    assert hub.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_heartbeats_are_not_recorded_or_replayed():
+    hub = PipelineHub()
+    release = asyncio.Event()
+
+    async def producer():
+        yield "data: 1\n\n"
+        for _ in range(100):
+            yield ": heartbeat\n\n"
+        await release.wait()
+        yield "data: 2\n\n"
+
+    first = asyncio.create_task(_collect(hub.subscribe("k", producer)))
+    await asyncio.sleep(0.01)
+    broadcast = hub.get("k")
+    assert [event for _, event in broadcast.events] == ["data: 1\n\n"]
+
+    late = asyncio.create_task(_collect(hub.subscribe("k", producer)))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await late == ["data: 1\n\n", "data: 2\n\n"]
+    assert (await first)[1] == ": heartbeat\n\n"
+
+
+def test_parse_event_id():
+    assert parse_event_id("abc:12") == ("abc", 12)
+    assert parse_event_id("abc") is None
+    assert parse_event_id("abc:x") is None
+    assert parse_event_id(None) is None
+
+
+@pytest.mark.asyncio
+async def test_reconnect_with_last_event_id_reattaches_to_live_producer():
+    hub = PipelineHub(resume_grace_s=5, event_ids=True)
+    runs = []
+    release = asyncio.Event()
+
+    async def producer():
+        runs.append(1)
+        yield "data: 1\n\n"
+        yield "data: 2\n\n"
+        await release.wait()
+        yield "data: 3\n\n"
+
+    first = hub.subscribe("k", producer)
+    received = [await first.__anext__(), await first.__anext__()]
+    await first.aclose()  # Connection dropped after the first two events.
+    last_event_id = received[-1].split("\n")[0][len("id: "):]
+
+    resumed = asyncio.create_task(_collect(hub.subscribe("k", producer, last_event_id=last_event_id)))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    session_id = last_event_id.split(":")[0]
+    assert await resumed == [f"id: {session_id}:3\ndata: 3\n\n"]
+    assert len(runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_reconnect_after_producer_finished_replays_from_event_log(event_log):
+    hub = PipelineHub(event_log=event_log, event_ids=True)
+
+    async def producer():
+        yield "data: 1\n\n"
+        yield ": heartbeat\n\n"
+        yield "data: 2\n\n"
+        yield "data: 3\n\n"
+
+    events = await _collect(hub.subscribe("k", producer))
+    assert ": heartbeat\n\n" in events
+    assert len(events) == 4
+    session_id = events[0].split("\n")[0][len("id: "):].split(":")[0]
+    await asyncio.sleep(0.01)
+    assert hub.get("k") is None
+
+    replayed = await _collect(hub.subscribe("k", producer, last_event_id=f"{session_id}:1"))
+    assert replayed == [f"id: {session_id}:2\ndata: 2\n\n", f"id: {session_id}:3\ndata: 3\n\n"]
+
+    # The session belongs to another pipeline key: treated as a fresh subscription.
+    other = await _collect(hub.subscribe("other", producer, last_event_id=f"{session_id}:1"))
+    assert len([event for event in other if event.startswith("id: ")]) == 3
+    assert not other[0].startswith(f"id: {session_id}:")
+
+
+@pytest.mark.asyncio
+async def test_reconnect_to_a_cancelled_session_starts_the_pipeline_again(event_log):
+    hub = PipelineHub(event_log=event_log, event_ids=True)
+    await event_log.open_session("old", "k")
+    await event_log.append("old", [(1, "data: 1\n\n")])
+    await event_log.close_session("old", "cancelled")
+
+    async def producer():
+        yield "data: 1\n\n"
+        yield "data: 2\n\n"
+
+    events = await _collect(hub.subscribe("k", producer, last_event_id="old:1"))
+
+    assert [event.split("\n", 1)[1] for event in events] == ["data: 1\n\n", "data: 2\n\n"]
+    assert not events[0].startswith("id: old:")
+    # A retry with an id of the new session is a normal replay of a completed session.
+    await asyncio.sleep(0.01)
+    assert len(await _collect(hub.subscribe("k", producer, last_event_id=events[0].split("\n")[0][len("id: "):]))) == 1
+
+
+@pytest.mark.asyncio
+async def test_reconnect_follows_a_session_running_in_another_worker(event_log):
+    hub = PipelineHub(event_log=event_log, event_ids=True, log_poll_interval_s=0.01)
+    await event_log.open_session("remote", "k")
+    await event_log.append("remote", [(1, "data: 1\n\n"), (2, "data: 2\n\n")])
+    runs = []
+
+    async def producer():
+        runs.append(1)
+        yield "data: local\n\n"
+
+    resumed = asyncio.create_task(_collect(hub.subscribe("k", producer, last_event_id="remote:1")))
+    await asyncio.sleep(0.05)
+    assert not resumed.done()
+    await event_log.append("remote", [(3, "data: 3\n\n")])
+    await event_log.close_session("remote", "completed")
+
+    assert await resumed == ["id: remote:2\ndata: 2\n\n", "id: remote:3\ndata: 3\n\n"]
+    assert runs == []
+
+
+@pytest.mark.asyncio
+async def test_abandoned_producer_is_cancelled_after_grace_period():
+    hub = PipelineHub(resume_grace_s=0.05)
+    cleaned_up = asyncio.Event()
+
+    async def producer():
+        try:
+            yield "plan"
+            await asyncio.sleep(60)
+        finally:
+            cleaned_up.set()
+
+    stream = hub.subscribe("k", producer)
+    assert await stream.__anext__() == "plan"
+    await stream.aclose()
+    await asyncio.sleep(0.01)
+    assert not cleaned_up.is_set()
+    await asyncio.wait_for(cleaned_up.wait(), timeout=1)
@@ -0,0 +1,179 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.app.clients.router import RoutedLLMClient, RouteTarget
+from backend.app.scoring_batcher import ScoringBatcher, build_batch_prompt, parse_batch_response, ScoringJob
+
+
+def _submit(batcher: ScoringBatcher, client, title: str, single_scorer, query: str = "q"):
+    return batcher.score(
+        title=title, authors=["A"], abstract="abstract", original_query=query,
+        client=client, single_scorer=single_scorer,
+    )
+
+
+def test_parse_batch_response_ignores_out_of_range_items():
+    response = (
+        "[1] Score: 0.9 | Explanation: Very relevant.\n"
+        "[3] Score: 1.7 | Explanation: Clamped.\n"
+        "[7] Score: 0.5 | Explanation: Out of range.\n"
+    )
+    assert parse_batch_response(response, 3) == {0: (0.9, "Very relevant."), 2: (1.0, "Clamped.")}
+
+
+def test_build_batch_prompt_numbers_jobs():
+    loop = asyncio.new_event_loop()
+    try:
+        jobs = [
+            ScoringJob(title=f"T{i}", authors=[], abstract="", original_query="q", client=None,
+                       single_scorer=AsyncMock(), future=loop.create_future())
+            for i in range(2)
+        ]
+    finally:
+        loop.close()
+    prompt = build_batch_prompt(jobs)
+    assert "[1]\nResearch Question: q\nPaper Title: T0" in prompt
+    assert "[2]\nResearch Question: q\nPaper Title: T1" in prompt
+
+
+@pytest.mark.asyncio
+async def test_concurrent_jobs_share_one_batched_call():
+    client = MagicMock()
+    client.generate_text.return_value = (
+        "[1] Score: 0.9 | Explanation: first\n"
+        "[2] Score: 0.2 | Explanation: second\n"
+    )
+    single_scorer = AsyncMock(return_value=(0.0, "single"))
+    batcher = ScoringBatcher(window_ms=20, max_batch_size=8, max_batch_tokens=10000)
+
+    results = await asyncio.gather(
+        _submit(batcher, client, "P1", single_scorer, query="request one"),
+        _submit(batcher, client, "P2", single_scorer, query="request two"),
+    )
+
+    assert results == [(0.9, "first"), (0.2, "second")]
+    client.generate_text.assert_called_once()
+    single_scorer.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_differently_configured_clients_of_one_class_are_not_batched_together():
+    def routed(model):
+        provider = MagicMock()
+        provider.generate_text.return_value = "[1] Score: 0.5 | Explanation: ok\n[2] Score: 0.5 | Explanation: ok\n"
+        return provider, RoutedLLMClient({"plan": [RouteTarget(provider="ollama", client=provider, model=model)]})
+    small, small_client = routed("small-model")
+    large, large_client = routed("large-model")
+    single_scorer = AsyncMock(side_effect=lambda title, authors, abstract, original_query, client: (0.1, client.routes["plan"][0].model))
+    batcher = ScoringBatcher(window_ms=20, max_batch_size=8, max_batch_tokens=10000)
+
+    results = await asyncio.gather(
+        _submit(batcher, small_client, "P1", single_scorer),
+        _submit(batcher, large_client, "P2", single_scorer),
+    )
+
+    # Each request is scored alone, with its own client and model.
+    assert results == [(0.1, "small-model"), (0.1, "large-model")]
+    small.generate_text.assert_not_called()
+    large.generate_text.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unanswered_jobs_fall_back_to_single_scorer():
+    client = MagicMock()
+    client.generate_text.return_value = "[2] Score: 0.4 | Explanation: only second"
+    single_scorer = AsyncMock(return_value=(0.7, "single"))
+    batcher = ScoringBatcher(window_ms=20, max_batch_size=8, max_batch_tokens=10000)
+
+    results = await asyncio.gather(
+        _submit(batcher, client, "P1", single_scorer),
+        _submit(batcher, client, "P2", single_scorer),
+    )
+
+    assert results == [(0.7, "single"), (0.4, "only second")]
+    assert single_scorer.call_args.kwargs["title"] == "P1"
+
+
+@pytest.mark.asyncio
+async def test_single_job_uses_single_scorer():
+    client = MagicMock()
+    single_scorer = AsyncMock(return_value=(0.8, "single"))
+    batcher = ScoringBatcher(window_ms=5, max_batch_size=8, max_batch_tokens=10000)
+
+    assert await _submit(batcher, client, "P1", single_scorer) == (0.8, "single")
+    client.generate_text.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_batch_size_cap_flushes_without_waiting_for_window():
+    client = MagicMock()
+    client.generate_text.return_value = "[1] Score: 0.5 | Explanation: a\n[2] Score: 0.5 | Explanation: b"
+    batcher = ScoringBatcher(window_ms=60_000, max_batch_size=2, max_batch_tokens=10000)
+
+    results = await asyncio.wait_for(asyncio.gather(
+        *(_submit(batcher, client, f"P{i}", AsyncMock()) for i in range(4))
+    ), timeout=2)
+
+    assert len(results) == 4
+    assert client.generate_text.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_jobs_are_dropped_from_the_batch():
+    client = MagicMock()
+    single_scorer = AsyncMock(return_value=(0.3, "single"))
+    batcher = ScoringBatcher(window_ms=20, max_batch_size=8, max_batch_tokens=10000)
+
+    abandoned = asyncio.create_task(_submit(batcher, client, "P1", single_scorer))
+    kept = asyncio.create_task(_submit(batcher, client, "P2", single_scorer))
+    await asyncio.sleep(0)
+    abandoned.cancel()
+
+    assert await kept == (0.3, "single")
+    client.generate_text.assert_not_called()
+    single_scorer.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_withdrawn_jobs_leave_no_pending_batch():
+    batcher = ScoringBatcher(window_ms=60_000, max_batch_size=8, max_batch_tokens=10000)
+    client = MagicMock()
+    tasks = [asyncio.create_task(_submit(batcher, client, f"P{i}", AsyncMock())) for i in range(2)]
+    await asyncio.sleep(0)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert batcher._pending == {}
+    assert batcher._timers == {}
+
+
+@pytest.mark.asyncio
+async def test_batch_call_is_cancelled_when_every_caller_goes_away(monkeypatch):
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow_generate_text(client, prompt, stage):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr("backend.app.scoring_batcher.llm.generate_text", slow_generate_text)
+    single_scorer = AsyncMock(return_value=(0.3, "single"))
+    batcher = ScoringBatcher(window_ms=1, max_batch_size=8, max_batch_tokens=10000)
+    client = MagicMock()
+
+    tasks = [asyncio.create_task(_submit(batcher, client, f"P{i}", single_scorer)) for i in range(2)]
+    await asyncio.wait_for(started.wait(), timeout=2)
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=2)
+    await asyncio.sleep(0.01)
+    single_scorer.assert_not_called()
+    assert not batcher._running
@@ -0,0 +1,27 @@
+import json
+from datetime import datetime
+
+from backend.api.endpoints.research_tree import QueryNode, ScoredPaper, SearchTreeResponse
+from backend.app.serialization import ORJSONResponse, dumps
+
+
+def _response() -> SearchTreeResponse:
+    paper = ScoredPaper(
+        title="T", authors=["A"], abstract="ä", published_date=datetime(2024, 1, 2, 3, 4, 5),
+        url="u", categories=["cs.AI"], arxiv_id="1", relevance_score=0.5, relevance_explanation="ok",
+    )
+    return SearchTreeResponse(
+        original_query="q", research_goal="g",
+        query_nodes=[QueryNode(query="q1", description="d", papers=[paper], paper_count=1)],
+        total_papers=1, total_unique_papers=1,
+    )
+
+
+def test_dumps_matches_pydantic_serialization():
+    response = _response()
+    assert json.loads(dumps(response)) == json.loads(response.model_dump_json())
+
+
+def test_orjson_response_passes_bytes_through():
+    assert ORJSONResponse(content=b'{"a":1}').body == b'{"a":1}'
+    assert json.loads(ORJSONResponse(content=_response()).body)["total_papers"] == 1
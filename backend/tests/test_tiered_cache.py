@@ -0,0 +1,160 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app import llm
+from backend.app.tiered_cache import ArxivSearchStore, JSONStore, LRUCache, TieredCache, _MISSING
+from backend.core.database import Base
+from backend.schemas.arxiv_schema import ArxivAuthor, ArxivPaper
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    await engine.dispose()
+
+
+class _CountingSessions:
+    """Session factory that counts how often the SQLite tier is used."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self.session_factory()
+
+
+def test_lru_cache_bounds_entries_and_bytes():
+    cache = LRUCache(max_entries=2, max_bytes=100)
+    cache.put("a", 1, 10, ttl_s=60)
+    cache.put("b", 2, 10, ttl_s=60)
+    assert cache.get("a") == 1  # "b" is now the least recently used entry
+    cache.put("c", 3, 10, ttl_s=60)
+    assert cache.get("b") is _MISSING
+    cache.put("d", 4, 85, ttl_s=60)  # over 100 bytes: evicts "a"
+    assert (len(cache), cache.bytes, cache.evictions) == (2, 95, 2)
+    assert cache.get("c") == 3
+    cache.put("e", 5, 1000, ttl_s=60)  # larger than the whole budget: not cached
+    assert cache.get("e") is _MISSING and cache.get("d") == 4
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache()
+    cache.put("a", 1, 1, ttl_s=0)
+    assert cache.get("a") is _MISSING
+    assert cache.bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_hot_keys_are_served_from_memory(session_factory):
+    sessions = _CountingSessions(session_factory)
+    cache = TieredCache("scores", ttl_s=60, store=JSONStore(decode=tuple), session_factory=sessions)
+
+    await cache.put("k", (0.5, "ok"))
+    opened = sessions.opened
+    assert await cache.get("k") == (0.5, "ok")
+    assert sessions.opened == opened
+
+    cache.invalidate_local()
+    assert await cache.get("k") == (0.5, "ok")  # from SQLite, which refills memory
+    assert sessions.opened == opened + 1
+    assert await cache.get("k") == (0.5, "ok")
+    assert sessions.opened == opened + 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_both_tiers_and_notifies_hooks(session_factory):
+    cache = TieredCache("llm_responses", ttl_s=60, session_factory=session_factory)
+    hook = MagicMock()
+    cache.add_invalidation_hook(hook)
+    await cache.put("k", "answer")
+
+    await cache.invalidate("k")
+
+    assert await cache.get("k") is None
+    hook.assert_called_once_with("llm_responses", "k")
+
+
+@pytest.mark.asyncio
+async def test_sqlite_failures_degrade_to_memory_only():
+    def broken_sessions():
+        raise RuntimeError("database is locked")
+    cache = TieredCache("llm_responses", ttl_s=60, session_factory=broken_sessions)
+
+    assert await cache.get("k") is None
+    await cache.put("k", "answer")
+    assert await cache.get("k") == "answer"
+
+
+@pytest.mark.asyncio
+async def test_arxiv_searches_are_rebuilt_from_the_paper_cache(session_factory):
+    cache = TieredCache("arxiv_searches", ttl_s=60, store=ArxivSearchStore(), session_factory=session_factory)
+    papers = [
+        ArxivPaper(
+            entry_id=f"http://arxiv.org/abs/2401.0000{index}",
+            title=f"Paper {index}",
+            authors=[ArxivAuthor(name="A. Author")],
+            summary="Abstract",
+            published=datetime(2024, 1, index + 1),
+            updated=datetime(2024, 2, index + 1),
+            pdf_url=f"http://arxiv.org/pdf/2401.0000{index}",
+            categories=["cs.IR"],
+            primary_category="cs.IR",
+        )
+        for index in (2, 0, 1)
+    ]
+    await cache.put("q", papers)
+    cache.invalidate_local()
+
+    assert await cache.get("q") == papers
+
+
+@pytest.mark.asyncio
+async def test_llm_answers_are_cached_per_stage(session_factory):
+    cache = TieredCache("llm_responses", ttl_s=60, session_factory=session_factory)
+    client = MagicMock()
+    client.generate_text.return_value = "answer"
+    with patch.object(llm, "llm_response_cache", cache):
+        assert await llm.generate_text(client, "prompt", stage="plan") == "answer"
+        assert await llm.generate_text(client, "prompt", stage="plan") == "answer"
+        assert client.generate_text.call_count == 1
+        await llm.generate_text(client, "prompt", stage="score")
+        assert client.generate_text.call_count == 2
+
+        client.generate_text.return_value = ""  # error signal: not cached
+        await llm.generate_text(client, "other", stage="plan")
+        await llm.generate_text(client, "other", stage="plan")
+        assert client.generate_text.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_scores_are_cached_unless_scoring_failed(session_factory):
+    from backend.api.endpoints import research_tree
+    cache = TieredCache("scores", ttl_s=60, store=JSONStore(decode=tuple), session_factory=session_factory)
+
+    def paper(arxiv_id):
+        return research_tree.ScoredPaper(
+            title="T", authors=[], abstract="A", published_date=datetime(2024, 1, 1), url="u", categories=[], arxiv_id=arxiv_id,
+            relevance_score=0.0, relevance_explanation="", scored=False,
+        )
+
+    with patch.object(research_tree, "score_cache", cache), \
+            patch.object(research_tree.scoring_batcher, "score") as score:
+        score.return_value = (0.8, "relevant")
+        await research_tree._score_paper(paper("1"), "query", MagicMock())
+        cached = await research_tree._score_paper(paper("1"), "query", MagicMock())
+        assert (cached.relevance_score, cached.relevance_explanation, cached.scored) == (0.8, "relevant", True)
+        assert score.call_count == 1
+
+        score.return_value = (0.0, research_tree.SCORE_TIMEOUT_EXPLANATION)
+        await research_tree._score_paper(paper("2"), "query", MagicMock())
+        await research_tree._score_paper(paper("2"), "query", MagicMock())
+        assert score.call_count == 3